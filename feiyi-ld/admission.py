@@ -0,0 +1,256 @@
+"""
+上游AI调用的准入控制模块
+
+限制同时进行的上游调用数，超出的请求进入有界等待队列：
+- 交互问答优先于后台任务（如生成介绍），后台任务不占用为交互问答保留的名额；
+- 同一优先级中，当前占用名额最少、其次最久未获名额的会话先获得名额（轮转），
+  单个会话排队与占用的总数有上限，一个会话的连续提问不会挤占其他用户；
+- 队列已满、会话超出上限或等待超时时立即拒绝，由接口返回 429 与 Retry-After。
+上游变慢时排队的问答被限制在队列长度以内，页面与其他接口不受问答流量影响。
+同步线程与协程共用同一组名额。
+"""
+import asyncio
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, List, Optional
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 优先级，数值越小越优先
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+
+class AdmissionRejected(Exception):
+    """上游调用未获准入"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"AI服务繁忙（{reason}），{retry_after}秒后重试")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """等待名额的调用"""
+    __slots__ = ('priority', 'session_id', 'seq', 'wake', 'granted')
+
+    def __init__(self, priority: int, session_id: Optional[str], seq: int, wake: Callable[[], None]):
+        self.priority = priority
+        self.session_id = session_id
+        self.seq = seq
+        self.wake = wake
+        self.granted = False
+
+
+class AdmissionController:
+    """带优先级与会话公平性的并发限制器"""
+
+    def __init__(self, max_concurrent: int = None,
+                 max_queue: int = None,
+                 max_wait: float = None,
+                 per_session: int = None,
+                 reserved: int = None,
+                 enabled: bool = None):
+        """
+        初始化准入控制
+
+        Args:
+            max_concurrent: 同时进行的上游调用上限
+            max_queue: 等待队列长度上限，队列满时立即拒绝
+            max_wait: 在队列中的最长等待时间（秒），超时拒绝
+            per_session: 单个会话排队与进行中的调用总数上限
+            reserved: 只供交互问答使用的名额数，后台任务不可占用
+            enabled: 为False时不做限制
+        """
+        self.max_concurrent = max_concurrent or int(os.getenv('FEIYI_AI_MAX_CONCURRENT', 8))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv('FEIYI_AI_MAX_QUEUE', 32))
+        self.max_wait = max_wait or float(os.getenv('FEIYI_AI_MAX_WAIT', 10))
+        self.per_session = per_session or int(os.getenv('FEIYI_AI_PER_SESSION', 2))
+        self.reserved = reserved if reserved is not None else int(os.getenv('FEIYI_AI_RESERVED_INTERACTIVE', 1))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_AI_ADMISSION_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._sessions = Counter()
+        self._running_sessions = Counter()
+        # 各会话最近一次获得名额的序号，用于轮转
+        self._last_served: 'OrderedDict[str, int]' = OrderedDict()
+        self._grants = itertools.count()
+        # 单次调用占用名额时长的滑动平均（秒），用于估算 Retry-After
+        self._service_time = 5.0
+        self._stats = {'admitted': 0, 'queued': 0, 'rejected': 0, 'timeouts': 0}
+
+    def _can_run(self, priority: int) -> bool:
+        limit = self.max_concurrent
+        if priority != PRIORITY_INTERACTIVE:
+            limit = max(1, limit - self.reserved)
+        return self._active < limit
+
+    def _grant(self, session_id: Optional[str]):
+        self._active += 1
+        self._stats['admitted'] += 1
+        if session_id:
+            self._running_sessions[session_id] += 1
+            self._last_served[session_id] = next(self._grants)
+            self._last_served.move_to_end(session_id)
+            if len(self._last_served) > 10000:
+                self._last_served.popitem(last=False)
+
+    def retry_after(self) -> int:
+        """按排队长度与平均占用时长估算的重试等待秒数"""
+        rounds = (len(self._waiters) + 1) / self.max_concurrent
+        return max(1, min(60, math.ceil(self._service_time * rounds)))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self._stats['rejected'] += 1
+        metrics.inc('feiyi_ai_admission_rejected_total', (reason,))
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _enqueue(self, session_id: Optional[str], priority: int, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """
+        申请名额
+
+        Returns:
+            立即获得名额时为None，否则为排队中的等待者
+
+        Raises:
+            AdmissionRejected: 会话超出上限或队列已满
+        """
+        with self._lock:
+            if session_id and self._sessions[session_id] >= self.per_session:
+                raise self._reject('session_limit')
+            # 排队的只有较低优先级（如后台任务受保留名额限制而等待）时，空闲名额可直接分配
+            ahead = any(w.priority <= priority for w in self._waiters)
+            if not ahead and self._can_run(priority):
+                self._grant(session_id)
+                waiter = None
+            elif len(self._waiters) >= self.max_queue:
+                raise self._reject('queue_full')
+            else:
+                waiter = _Waiter(priority, session_id, next(self._seq), wake)
+                self._waiters.append(waiter)
+                self._stats['queued'] += 1
+            if session_id:
+                self._sessions[session_id] += 1
+            return waiter
+
+    def _dispatch(self):
+        """把空出的名额依次分给优先级最高、会话占用最少、会话最久未获名额、最早到达的等待者（须持有锁）"""
+        while self._waiters:
+            eligible = [w for w in self._waiters if self._can_run(w.priority)]
+            if not eligible:
+                return
+            waiter = min(eligible, key=lambda w: (w.priority, self._running_sessions[w.session_id],
+                                                  self._last_served.get(w.session_id, -1), w.seq))
+            self._waiters.remove(waiter)
+            self._grant(waiter.session_id)
+            waiter.granted = True
+            waiter.wake()
+
+    def _cancel(self, waiter: _Waiter) -> bool:
+        """
+        放弃排队
+
+        Returns:
+            是否已移出队列；为False表示名额已分配，调用方须照常使用并释放
+        """
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiters.remove(waiter)
+            if waiter.session_id:
+                self._sessions[waiter.session_id] -= 1
+                if not self._sessions[waiter.session_id]:
+                    del self._sessions[waiter.session_id]
+            return True
+
+    def _timeout(self) -> AdmissionRejected:
+        with self._lock:
+            self._stats['timeouts'] += 1
+            return self._reject('timeout')
+
+    def _release(self, session_id: Optional[str], started: float):
+        with self._lock:
+            self._active -= 1
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - started)
+            if session_id:
+                self._running_sessions[session_id] -= 1
+                if not self._running_sessions[session_id]:
+                    del self._running_sessions[session_id]
+                self._sessions[session_id] -= 1
+                if not self._sessions[session_id]:
+                    del self._sessions[session_id]
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, session_id: str = None, priority: int = PRIORITY_INTERACTIVE):
+        """
+        在名额内执行一次上游调用
+
+        Args:
+            session_id: 会话ID（用于公平调度，可为空）
+            priority: PRIORITY_INTERACTIVE 或 PRIORITY_BACKGROUND
+
+        Raises:
+            AdmissionRejected: 未获准入
+        """
+        if not self.enabled:
+            yield
+            return
+        granted = threading.Event()
+        waiter = self._enqueue(session_id, priority, granted.set)
+        if waiter is not None and not granted.wait(self.max_wait) and self._cancel(waiter):
+            raise self._timeout()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(session_id, started)
+
+    @asynccontextmanager
+    async def slot_async(self, session_id: str = None, priority: int = PRIORITY_INTERACTIVE):
+        """slot 的协程版本，排队时不占用线程"""
+        if not self.enabled:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(True))
+
+        waiter = self._enqueue(session_id, priority, wake)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), self.max_wait)
+            except asyncio.TimeoutError:
+                if self._cancel(waiter):
+                    raise self._timeout()
+            except asyncio.CancelledError:
+                # 客户端断开：未分配则出队，已分配则归还名额
+                if not self._cancel(waiter):
+                    self._release(session_id, time.monotonic())
+                raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(session_id, started)
+
+    def stats(self) -> Dict[str, int]:
+        """进行中与排队的调用数，及准入、排队、拒绝、超时计数"""
+        with self._lock:
+            return dict(self._stats, active=self._active, waiting=len(self._waiters),
+                        max_concurrent=self.max_concurrent, max_queue=self.max_queue)
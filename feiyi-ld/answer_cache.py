@@ -0,0 +1,231 @@
+"""
+AI回答缓存模块
+
+以归一化后的问题、模型与系统提示为键，将回答保存在各工作进程共享的SQLite文件中，
+支持过期时间（TTL）、按条数上限的LRU淘汰以及命中/未命中计数。
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opencc import OpenCC
+    _t2s = OpenCC('t2s').convert
+except ImportError:
+    _t2s = None
+
+# 未安装OpenCC时使用的常用繁简对照（覆盖站内常见非遗词汇与疑问用语）
+_TRADITIONAL = '崑劇戲藝術針節氣錦織繡華國遺產傳統醫藥樂學說麼這個們與為問請歷護畫書語話麵龍鳳獅紙燈雜園間頭體導創濟興義東門長見觀關讓'
+_SIMPLIFIED = '昆剧戏艺术针节气锦织绣华国遗产传统医药乐学说么这个们与为问请历护画书语话面龙凤狮纸灯杂园间头体导创济兴义东门长见观关让'
+_T2S_TABLE = str.maketrans(_TRADITIONAL, _SIMPLIFIED)
+
+
+def normalize_question(question: str) -> str:
+    """
+    归一化问题文本
+
+    全角/半角折叠（NFKC）、转小写、繁体转简体，并去除标点、符号与空白，
+    使“昆曲是什么？”“ 崑曲是什麼 ”等写法得到相同结果。
+    """
+    text = unicodedata.normalize('NFKC', question or '').lower()
+    text = _t2s(text) if _t2s else text.translate(_T2S_TABLE)
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] not in 'PZSC')
+
+
+class AnswerCache:
+    """跨进程共享的AI回答缓存"""
+
+    def __init__(self, path: str = None, ttl: int = None, max_entries: int = None, enabled: bool = None):
+        """
+        初始化回答缓存
+
+        Args:
+            path: SQLite缓存文件路径
+            ttl: 缓存有效期（秒）
+            max_entries: 最大条目数，超出时淘汰最久未访问的条目
+            enabled: 是否启用缓存
+        """
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'answer_cache.db')
+        self.path = path or os.getenv('FEIYI_ANSWER_CACHE_PATH', default_path)
+        self.ttl = ttl or int(os.getenv('FEIYI_ANSWER_CACHE_TTL', 7 * 24 * 3600))
+        self.max_entries = max_entries or int(os.getenv('FEIYI_ANSWER_CACHE_MAX_ENTRIES', 10000))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_ANSWER_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+        self._local = threading.local()
+        self._schema_ready = False
+        if hasattr(os, 'register_at_fork'):
+            # fork出的子进程（preload的工作进程）不沿用父进程打开的SQLite连接
+            os.register_at_fork(after_in_child=self._reset_connections)
+
+    def _reset_connections(self):
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的缓存连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                conn.execute('''CREATE TABLE IF NOT EXISTS answers (
+                    key TEXT PRIMARY KEY,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )''')
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_answers_accessed_at ON answers(accessed_at)')
+                conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+                conn.execute('''CREATE TABLE IF NOT EXISTS locks (
+                    key TEXT PRIMARY KEY,
+                    token TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )''')
+                conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(question: str, model: str, system_prompt: str) -> str:
+        """由归一化问题、模型与系统提示生成缓存键"""
+        prompt_digest = hashlib.sha256((system_prompt or '').encode('utf-8')).hexdigest()
+        raw = f'{model}\x00{prompt_digest}\x00{normalize_question(question)}'
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, question: str, model: str, system_prompt: str) -> Optional[str]:
+        """
+        查询缓存
+
+        Returns:
+            命中时返回回答，否则返回None
+        """
+        if not self.enabled:
+            return None
+        key = self.make_key(question, model, system_prompt)
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT answer, created_at FROM answers WHERE key = ?', (key,)).fetchone()
+            hit = row is not None and now - row[1] < self.ttl
+            with conn:
+                if hit:
+                    conn.execute('UPDATE answers SET accessed_at = ? WHERE key = ?', (now, key))
+                elif row is not None:
+                    conn.execute('DELETE FROM answers WHERE key = ?', (key,))
+                conn.execute('UPDATE stats SET value = value + 1 WHERE name = ?', ('hits' if hit else 'misses',))
+            return row[0] if hit else None
+        except sqlite3.Error as e:
+            logger.warning(f"回答缓存读取失败: {e}")
+            return None
+
+    def set(self, question: str, model: str, system_prompt: str, answer: str):
+        """写入缓存，超出条数上限时按最久未访问淘汰"""
+        if not self.enabled or not answer:
+            return
+        key = self.make_key(question, model, system_prompt)
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)', (key, answer, now, now))
+                count = conn.execute('SELECT count(*) FROM answers').fetchone()[0]
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    conn.execute('DELETE FROM answers WHERE key IN '
+                                 '(SELECT key FROM answers ORDER BY accessed_at LIMIT ?)', (overflow,))
+                    conn.execute("UPDATE stats SET value = value + ? WHERE name = 'evictions'", (overflow,))
+        except sqlite3.Error as e:
+            logger.warning(f"回答缓存写入失败: {e}")
+
+    def peek(self, key: str) -> Optional[str]:
+        """按缓存键读取未过期的回答，不计入命中统计也不更新访问时间"""
+        if not self.enabled:
+            return None
+        try:
+            row = self._connect().execute('SELECT answer FROM answers WHERE key = ? AND created_at >= ?',
+                                          (key, time.time() - self.ttl)).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"回答缓存读取失败: {e}")
+            return None
+
+    def try_lock(self, key: str, token: str, ttl: float) -> bool:
+        """
+        尝试为缓存键加跨进程锁，已过期的锁视为已释放
+
+        缓存未启用或读写失败时返回True，调用方按无协调处理。
+        """
+        if not self.enabled:
+            return True
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('DELETE FROM locks WHERE key = ? AND expires_at < ?', (key, now))
+                return conn.execute('INSERT OR IGNORE INTO locks VALUES (?, ?, ?)',
+                                    (key, token, now + ttl)).rowcount == 1
+        except sqlite3.Error as e:
+            logger.warning(f"回答缓存加锁失败: {e}")
+            return True
+
+    def unlock(self, key: str, token: str):
+        """释放由token持有的锁"""
+        if not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('DELETE FROM locks WHERE key = ? AND token = ?', (key, token))
+        except sqlite3.Error as e:
+            logger.warning(f"回答缓存解锁失败: {e}")
+
+    def is_locked(self, key: str) -> bool:
+        """缓存键是否被未过期的锁持有"""
+        if not self.enabled:
+            return False
+        try:
+            return self._connect().execute('SELECT 1 FROM locks WHERE key = ? AND expires_at >= ?',
+                                           (key, time.time())).fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除条数"""
+        try:
+            conn = self._connect()
+            with conn:
+                return conn.execute('DELETE FROM answers WHERE created_at < ?',
+                                    (time.time() - self.ttl,)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"回答缓存清理失败: {e}")
+            return 0
+
+    def clear(self):
+        """清空缓存条目与计数"""
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM answers')
+            conn.execute('UPDATE stats SET value = 0')
+
+    def stats(self) -> Dict[str, int]:
+        """返回缓存条目数与命中/未命中/淘汰计数"""
+        if not self.enabled:
+            return {'enabled': False}
+        conn = self._connect()
+        result = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+        result['entries'] = conn.execute('SELECT count(*) FROM answers').fetchone()[0]
+        lookups = result.get('hits', 0) + result.get('misses', 0)
+        result['hit_rate'] = round(result.get('hits', 0) / lookups, 4) if lookups else 0.0
+        result['enabled'] = True
+        return result
+
@@ -1,337 +1,44 @@
-from flask import Flask, render_template, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, abort
 from flask_cors import CORS
-from markupsafe import Markup
 import os
-from datetime import datetime
 from dotenv import load_dotenv
-import requests
 import json
 
-# 加载环境变量
-load_dotenv()
-
-app = Flask(__name__)
-CORS(app)
-
-# 数据库配置
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///feiyi.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-
-db = SQLAlchemy(app)
-
-# 数据库模型定义
-class FeiyiItem(db.Model):
-    """非遗项目模型"""
-    __tablename__ = 'feiyi_items'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False, comment='项目名称')
-    category_id = db.Column(db.Integer, nullable=False, comment='分类ID')
-    description = db.Column(db.Text, comment='项目描述')
-    origin_location = db.Column(db.String(100), comment='发源地')
-    historical_background = db.Column(db.Text, comment='历史背景')
-    cultural_value = db.Column(db.Text, comment='文化价值')
-    inheritance_status = db.Column(db.Text, comment='传承状况')
-    protection_measures = db.Column(db.Text, comment='保护措施')
-    protection_level = db.Column(db.String(50), comment='保护级别')
-    representative_inheritor = db.Column(db.String(200), comment='代表性传承人')
-    declaration_date = db.Column(db.String(50), comment='申报时间')
-    images = db.Column(db.Text, comment='相关图片URL，JSON格式')
-    videos = db.Column(db.Text, comment='相关视频URL，JSON格式')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
-    
-    def to_dict(self):
-        """转换为字典格式"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'category_id': self.category_id,
-            'description': self.description,
-            'origin_location': self.origin_location,
-            'historical_background': self.historical_background,
-            'cultural_value': self.cultural_value,
-            'inheritance_status': self.inheritance_status,
-            'protection_measures': self.protection_measures,
-            'protection_level': self.protection_level,
-            'representative_inheritor': self.representative_inheritor,
-            'declaration_date': self.declaration_date,
-            'images': self.images,
-            'videos': self.videos,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+from sqlalchemy import func
 
-class FeiyiKnowledge(db.Model):
-    """非遗知识库模型"""
-    __tablename__ = 'feiyi_knowledge'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(300), nullable=False, comment='知识标题')
-    content = db.Column(db.Text, nullable=False, comment='知识内容')
-    category_id = db.Column(db.Integer, comment='关联分类ID')
-    item_id = db.Column(db.Integer, db.ForeignKey('feiyi_items.id'), comment='关联项目ID')
-    keywords = db.Column(db.String(500), comment='关键词，逗号分隔')
-    source = db.Column(db.String(200), comment='知识来源')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
-    
-    # 关联关系
-    item = db.relationship('FeiyiItem', backref=db.backref('knowledge_items', lazy=True))
-    
-    def to_dict(self):
-        """转换为字典格式"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'content': self.content,
-            'category_id': self.category_id,
-            'item_id': self.item_id,
-            'keywords': self.keywords,
-            'source': self.source,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+from models import (db, FeiyiItem, FeiyiKnowledge, UserInteraction, FEIYI_CATEGORIES,
+                    ensure_indexes, init_db, build_search_indexes, build_item_documents)
+from metrics import metrics
+from admission import AdmissionRejected
+from huawei_ai import get_ai_response, get_ai_response_stream
+from fieldsets import FieldSet, InvalidFields
+from pagination import InvalidCursor, paginate_by_cursor
+from introductions import KIND_CATEGORY
+from media import image_names
 
-class UserInteraction(db.Model):
-    """用户交互记录模型"""
-    __tablename__ = 'user_interactions'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.String(100), comment='会话ID')
-    question = db.Column(db.Text, nullable=False, comment='用户问题')
-    answer = db.Column(db.Text, comment='AI回答')
-    category_id = db.Column(db.Integer, comment='相关分类ID')
-    item_id = db.Column(db.Integer, comment='相关项目ID')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
-    
-    def to_dict(self):
-        """转换为字典格式"""
-        return {
-            'id': self.id,
-            'session_id': self.session_id,
-            'question': self.question,
-            'answer': self.answer,
-            'category_id': self.category_id,
-            'item_id': self.item_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+# 列表接口的字段投影：summary 视图供卡片列表使用，detail 为全部字段
+item_fields = FieldSet(FeiyiItem, {
+    'summary': ['id', 'name', 'category_id', 'description', 'origin_location', 'protection_level', 'images']
+})
+knowledge_fields = FieldSet(FeiyiKnowledge, {
+    'summary': ['id', 'title', 'category_id', 'item_id', 'keywords', 'source']
+})
+
+# 接口数据可在浏览器与代理缓存一分钟；页面每次确认，数据未变时返回304
+API_CACHE_CONTROL = 'public, max-age=60'
 
-# 导入华为云AI模块
-from huawei_ai import get_ai_response, huawei_ai_client
-
-# 非遗分类
-FEIYI_CATEGORIES = [
-    {'id': 1, 'name': '民间文学', 'description': '包括神话、传说、民间故事、民间歌谣、谚语等'},
-    {'id': 2, 'name': '传统音乐', 'description': '包括民间音乐、文人音乐、宫廷音乐、宗教音乐等'},
-    {'id': 3, 'name': '传统舞蹈', 'description': '包括民间舞蹈、宫廷舞蹈、宗教舞蹈等'},
-    {'id': 4, 'name': '传统戏剧', 'description': '包括昆曲、京剧、豫剧、越剧等各种地方戏曲'},
-    {'id': 5, 'name': '曲艺', 'description': '包括相声、评书、快板、大鼓等说唱艺术'},
-    {'id': 6, 'name': '传统体育、游艺与杂技', 'description': '包括武术、龙舟、风筝、杂技等'},
-    {'id': 7, 'name': '传统美术', 'description': '包括绘画、雕塑、建筑装饰、工艺美术等'},
-    {'id': 8, 'name': '传统技艺', 'description': '包括纺织、冶炼、制茶、烹饪、中医药等传统工艺'},
-    {'id': 9, 'name': '传统医药', 'description': '包括中医诊疗法、中药炮制技艺、针灸等'},
-    {'id': 10, 'name': '民俗', 'description': '包括节庆、婚丧嫁娶、祭祀等民间习俗'}
-]
-
-@app.route('/')
-def index():
-    """首页"""
-    return render_template('index.html', categories=FEIYI_CATEGORIES)
-
-@app.route('/api/categories')
-def get_categories():
-    """获取非遗分类API"""
-    return jsonify(FEIYI_CATEGORIES)
-
-@app.route('/ai-chat')
-def ai_chat_page():
-    """AI聊天页面"""
-    return render_template('ai_chat.html')
-
-@app.route('/api/category/<int:category_id>')
-def get_category_detail(category_id):
-    """获取分类详情API"""
-    category = next((cat for cat in FEIYI_CATEGORIES if cat['id'] == category_id), None)
-    if not category:
-        return jsonify({'error': '分类不存在'}), 404
-    
-    # 这里可以添加更多该分类下的具体项目
-    items = FeiyiItem.query.filter_by(category_id=category_id).all()
-    category_data = category.copy()
-    category_data['items'] = [item.to_dict() for item in items]
-    
-    return jsonify(category_data)
-
-@app.route('/api/ai/chat', methods=['POST'])
-def ai_chat():
-    """AI智能问答接口"""
-    data = request.get_json()
-    user_question = data.get('question', '')
-    session_id = data.get('session_id', '')
-    
-    if not user_question:
-        return jsonify({'error': '问题不能为空'}), 400
-    
-    try:
-        # 调用华为云AI接口
-        ai_response = get_ai_response(user_question)
-        
-        # 保存用户交互记录
-        interaction = UserInteraction(
-            session_id=session_id,
-            question=user_question,
-            answer=ai_response
-        )
-        db.session.add(interaction)
-        db.session.commit()
-        
-        return jsonify({
-            'answer': ai_response,
-            'session_id': session_id,
-            'timestamp': interaction.created_at.isoformat()
-        })
-    except Exception as e:
-        return jsonify({'error': f'AI服务暂时不可用: {str(e)}'}), 500
-
-@app.route('/api/knowledge')
-def get_knowledge():
-    """获取知识库API"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    category_id = request.args.get('category_id', type=int)
-    keyword = request.args.get('keyword', '')
-    
-    query = FeiyiKnowledge.query
-    
-    if category_id:
-        query = query.filter_by(category_id=category_id)
-    
-    if keyword:
-        query = query.filter(FeiyiKnowledge.title.contains(keyword) | 
-                           FeiyiKnowledge.content.contains(keyword) |
-                           FeiyiKnowledge.keywords.contains(keyword))
-    
-    knowledge_items = query.order_by(FeiyiKnowledge.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    return jsonify({
-        'items': [item.to_dict() for item in knowledge_items.items],
-        'total': knowledge_items.total,
-        'pages': knowledge_items.pages,
-        'current_page': page,
-        'per_page': per_page
-    })
-
-@app.route('/api/items')
-def get_items():
-    """获取非遗项目列表API"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 12, type=int)
-    category_id = request.args.get('category_id', type=int)
-    keyword = request.args.get('keyword', '')
-    
-    query = FeiyiItem.query
-    
-    if category_id:
-        query = query.filter_by(category_id=category_id)
-    
-    if keyword:
-        query = query.filter(FeiyiItem.name.contains(keyword) | 
-                           FeiyiItem.description.contains(keyword))
-    
-    items = query.order_by(FeiyiItem.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    return jsonify({
-        'items': [item.to_dict() for item in items.items],
-        'total': items.total,
-        'pages': items.pages,
-        'current_page': page,
-        'per_page': per_page
-    })
-
-@app.route('/api/item/<int:item_id>')
-def get_item_detail(item_id):
-    """获取非遗项目详情API"""
-    item = FeiyiItem.query.get_or_404(item_id)
-    
-    # 获取相关知识
-    related_knowledge = FeiyiKnowledge.query.filter_by(item_id=item_id).all()
-    
-    item_data = item.to_dict()
-    item_data['related_knowledge'] = [k.to_dict() for k in related_knowledge]
-    
-    return jsonify(item_data)
-
-@app.route('/api/search')
-def search():
-    """全局搜索API"""
-    keyword = request.args.get('keyword', '')
-    if not keyword:
-        return jsonify({'error': '搜索关键词不能为空'}), 400
-    
-    # 搜索项目
-    items = FeiyiItem.query.filter(
-        FeiyiItem.name.contains(keyword) | 
-        FeiyiItem.description.contains(keyword) |
-        FeiyiItem.characteristics.contains(keyword)
-    ).limit(10).all()
-    
-    # 搜索知识库
-    knowledge = FeiyiKnowledge.query.filter(
-        FeiyiKnowledge.title.contains(keyword) |
-        FeiyiKnowledge.content.contains(keyword) |
-        FeiyiKnowledge.keywords.contains(keyword)
-    ).limit(10).all()
-    
-    return jsonify({
-        'items': [item.to_dict() for item in items],
-        'knowledge': [k.to_dict() for k in knowledge],
-        'keyword': keyword
-    })
-
-@app.route('/categories')
-def categories_page():
-    """分类页面"""
-    return render_template('categories.html', categories=FEIYI_CATEGORIES)
-
-@app.route('/category/<int:category_id>')
-def category_detail_page(category_id):
-    """分类详情页面"""
-    category = next((cat for cat in FEIYI_CATEGORIES if cat['id'] == category_id), None)
-    if not category:
-        return "分类不存在", 404
-    
-    # 获取该分类下的项目
-    items = FeiyiItem.query.filter_by(category_id=category_id).all()
-    
-    return render_template('category_detail.html', category=category, items=items)
-
-@app.route('/item/<int:item_id>')
-def item_detail_page(item_id):
-    """项目详情页面"""
-    item = FeiyiItem.query.get_or_404(item_id)
-    category = next((cat for cat in FEIYI_CATEGORIES if cat['id'] == item.category_id), None)
-    
-    # 获取相关知识
-    related_knowledge = FeiyiKnowledge.query.filter_by(item_id=item_id).all()
-    
-    # 获取相关项目（同分类的其他项目）
-    related_items = FeiyiItem.query.filter(
-        FeiyiItem.category_id == item.category_id,
-        FeiyiItem.id != item_id
-    ).limit(4).all()
-    
-    return render_template('item_detail.html', 
-                         item=item, 
-                         category=category,
-                         related_knowledge=related_knowledge,
-                         related_items=related_items)
+
+def busy_response(rejection):
+    """上游并发已满时的429响应"""
+    response = jsonify({'error': 'AI服务繁忙，请稍后重试', 'retry_after': rejection.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(rejection.retry_after)
+    return response
+
+def sse_event(data, event=None):
+    """格式化一条Server-Sent Events消息"""
+    message = f"event: {event}\n" if event else ''
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 def get_category_description(category_id):
     """获取分类描述"""
@@ -349,7 +56,524 @@ def get_category_description(category_id):
     }
     return descriptions.get(category_id, '传统文化的重要组成部分')
 
+def get_category_name(category_id):
+    """获取分类名称"""
+    category = next((cat for cat in FEIYI_CATEGORIES if cat['id'] == category_id), None)
+    return category['name'] if category else '未知分类'
+
+def get_level_class(level):
+    """保护级别对应的样式类"""
+    if level and '国家' in level:
+        return 'level-national'
+    if level and '省' in level:
+        return 'level-provincial'
+    return 'level-municipal'
+
+def template_helpers():
+    """模板中使用的辅助函数"""
+    return {
+        'get_category_name': get_category_name,
+        'get_category_description': get_category_description,
+        'get_level_class': get_level_class
+    }
+
+
+class Services:
+    """应用的组件，由 create_app 创建，存放在 app.extensions['feiyi']"""
+
+    def __init__(self, **components):
+        self.__dict__.update(components)
+
+    def save_interaction(self, session_id, question, answer):
+        """保存用户交互记录（入队后由后台线程批量写入），返回记录时间"""
+        self.conversation_store.append(session_id, question, answer)
+        return self.interaction_writer.submit(session_id, question, answer)
+
+
+def create_app(config=None):
+    """
+    创建Flask应用及其组件并注册路由
+
+    每次调用都得到相互独立的应用：数据库连接、全文索引、各级缓存、AI客户端与读模型均属于该应用，
+    可为测试分别创建使用不同数据库的实例。组件的重量级状态（全文索引检查、关键词自动机、分类统计、
+    模板编译与响应缓存）在首次使用时才建立，入口进程的预热见 startup.py。
+
+    Args:
+        config: 覆盖的配置项（如 SQLALCHEMY_DATABASE_URI），在读取环境变量之后应用
+
+    Returns:
+        Flask应用，组件见 app.extensions['feiyi']
+    """
+    # 加载环境变量
+    load_dotenv()
+
+    app = Flask(__name__)
+    CORS(app)
+    app.config['SECRET_KEY'] = 'your-secret-key-here'
+
+    # 数据库配置（DATABASE_URL 及连接参数见 database.py）
+    init_db(app, config)
+
+    # 数据库迁移（flask --app app db upgrade）；alembic 导入较慢，只在 flask 命令行中注册
+    if os.getenv('FLASK_RUN_FROM_CLI'):
+        from flask_migrate import Migrate
+        from database import include_in_migrations
+        Migrate(app, db, include_object=include_in_migrations)
+
+    # 运行指标：各路由延迟与每个请求的SQL条数/耗时，由 /metrics 导出
+    metrics.init_app(app)
+
+    # 页面样式与脚本：模板通过 asset_url() 引用内容哈希命名、预压缩的发布文件（python assets.py build）
+    from assets import StaticAssets
+    static_assets = StaticAssets(app)
+
+    # JSON直接输出UTF-8中文并原生序列化日期时间（有 orjson 时使用之）；较大的响应按 Accept-Encoding 压缩
+    from json_provider import FastJSONProvider
+    from compression import ResponseCompressor
+    app.json = FastJSONProvider(app)
+    response_compressor = ResponseCompressor(app)
+
+    # 全文检索索引（随模型写入自动同步）
+    item_index, knowledge_index = build_search_indexes(app)
+
+    # 本地知识检索：高置信度问题直接作答，其余为AI提示注入相关段落
+    from retrieval import KnowledgeRetriever
+    knowledge_retriever = KnowledgeRetriever(app, item_index, knowledge_index)
+
+    # 用户交互记录的后台批量写入
+    from interaction_log import InteractionWriter
+    interaction_writer = InteractionWriter(app, db, UserInteraction)
+
+    # 多轮对话记忆：最近轮次加滚动摘要，由交互记录重建
+    from conversation import ConversationStore
+    conversation_store = ConversationStore(app, db, UserInteraction)
+
+    # AI不可用时的本地回退：由数据库关键词生成的自动机路由
+    from keyword_router import KeywordRouter
+    keyword_router = KeywordRouter(app, db, FeiyiItem, FeiyiKnowledge)
+
+    # 华为云AI客户端：回答缓存、本地知识、对话记忆与本地回退均属于本应用
+    from answer_cache import AnswerCache
+    from huawei_ai import HuaweiAIClient
+    answer_cache = AnswerCache()
+    huawei_ai_client = HuaweiAIClient(answer_cache=answer_cache,
+                                      knowledge_retriever=knowledge_retriever,
+                                      conversation_store=conversation_store,
+                                      keyword_router=keyword_router)
+
+    # 分类聚合统计（一条分组查询，写入后自动失效）
+    from category_stats import CategoryStats
+    category_stats = CategoryStats(app, db, FeiyiItem, FeiyiKnowledge)
+
+    # 列表游标分页与总数缓存
+    from pagination import CountCache
+    count_cache = CountCache([FeiyiItem, FeiyiKnowledge])
+
+    # 只读接口与页面的条件请求（ETag/304）与响应缓存
+    from http_cache import ResponseCache
+    response_cache = ResponseCache(app, [FeiyiItem, FeiyiKnowledge])
+
+    # 项目详情读模型：反规范化的详情文档，详情页与接口只需一次主键查询；
+    # 文档包含离线预生成的介绍（python introductions.py）与项目图片的衍生图（由 /media/ 以长缓存发送）
+    item_documents = build_item_documents(app)
+    item_documents.media.after_save.append(response_cache.clear)
+
+    app.extensions['feiyi'] = Services(
+        db=db,
+        static_assets=static_assets,
+        response_compressor=response_compressor,
+        item_index=item_index,
+        knowledge_index=knowledge_index,
+        knowledge_retriever=knowledge_retriever,
+        interaction_writer=interaction_writer,
+        conversation_store=conversation_store,
+        keyword_router=keyword_router,
+        answer_cache=answer_cache,
+        huawei_ai_client=huawei_ai_client,
+        category_stats=category_stats,
+        count_cache=count_cache,
+        response_cache=response_cache,
+        introductions=item_documents.introductions,
+        media_library=item_documents.media,
+        item_documents=item_documents,
+    )
+    register_routes(app)
+    app.context_processor(template_helpers)
+    return app
+
+
+def register_routes(app):
+    """在应用上注册页面与接口路由，视图使用 app.extensions['feiyi'] 中的组件"""
+    services = app.extensions['feiyi']
+    item_index, knowledge_index = services.item_index, services.knowledge_index
+    interaction_writer = services.interaction_writer
+    answer_cache, huawei_ai_client = services.answer_cache, services.huawei_ai_client
+    category_stats, count_cache = services.category_stats, services.count_cache
+    response_cache = services.response_cache
+    introductions, media_library = services.introductions, services.media_library
+    item_documents = services.item_documents
+
+    def _data_version(model, *criteria):
+        """满足条件的行数与最大更新时间"""
+        return db.session.query(func.count(model.id), func.max(model.updated_at)).filter(*criteria).one()
+
+    def category_data_version(category_id):
+        """分类详情依赖的数据版本：该分类下的全部项目、项目图片的衍生图与分类介绍"""
+        count, latest = _data_version(FeiyiItem, FeiyiItem.category_id == category_id)
+        images = db.session.query(FeiyiItem.images).filter(FeiyiItem.category_id == category_id)
+        media_count, media_latest = media_library.version(
+            name for (value,) in images for name in image_names(value))
+        # 衍生图记录与介绍经Core写入，不改变项目的 updated_at，各自计入版本
+        version = f"{count}:{latest}:{media_count}:{media_latest}"
+        changed = [latest, media_latest]
+        introduction = introductions.get(KIND_CATEGORY, category_id)
+        if introduction is not None:
+            version += f":{introduction['digest']}"
+            changed.append(introduction['generated_at'])
+        return max((value for value in changed if value is not None), default=None), version
+
+    def item_data_version(item_id):
+        """项目详情依赖的数据版本：取自详情文档的摘要，文档随项目、知识与相关项目的变化刷新"""
+        return item_documents.version(item_id)
+
+    @app.route('/')
+    def index():
+        """首页"""
+        return render_template('index.html', categories=FEIYI_CATEGORIES)
+
+    @app.route('/api/categories')
+    def get_categories():
+        """获取非遗分类API，stats=1 时附带各分类的项目数、知识数与保护级别分布"""
+        if request.args.get('stats', type=int):
+            return jsonify([dict(category, stats=category_stats.get(category['id']))
+                            for category in FEIYI_CATEGORIES])
+        return jsonify(FEIYI_CATEGORIES)
+
+    @app.route('/ai-chat')
+    def ai_chat_page():
+        """AI聊天页面"""
+        return render_template('ai_chat.html')
+
+    @app.route('/api/category/<int:category_id>')
+    @response_cache.cached(category_data_version, cache_control=API_CACHE_CONTROL)
+    def get_category_detail(category_id):
+        """获取分类详情API"""
+        category = next((cat for cat in FEIYI_CATEGORIES if cat['id'] == category_id), None)
+        if not category:
+            return jsonify({'error': '分类不存在'}), 404
+        
+        try:
+            fields = item_fields.from_request(request.args)
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # 这里可以添加更多该分类下的具体项目
+        items = FeiyiItem.query.filter_by(category_id=category_id).options(item_fields.options(fields)).all()
+        category_data = category.copy()
+        category_data['items'] = media_library.attach([item_fields.serialize(item, fields) for item in items])
+        introduction = introductions.get(KIND_CATEGORY, category_id)
+        category_data['introduction'] = introduction['content'] if introduction else None
+        
+        return jsonify(category_data)
+
+    @app.route('/api/ai/chat', methods=['POST'])
+    def ai_chat():
+        """AI智能问答接口"""
+        data = request.get_json()
+        user_question = data.get('question', '')
+        session_id = data.get('session_id', '')
+        
+        if not user_question:
+            return jsonify({'error': '问题不能为空'}), 400
+        
+        try:
+            # 调用华为云AI接口
+            ai_response = get_ai_response(huawei_ai_client, user_question, session_id)
+            
+            # 保存用户交互记录
+            created_at = services.save_interaction(session_id, user_question, ai_response)
+            
+            return jsonify({
+                'answer': ai_response,
+                'session_id': session_id,
+                'timestamp': created_at.isoformat()
+            })
+        except AdmissionRejected as e:
+            return busy_response(e)
+        except Exception as e:
+            return jsonify({'error': f'AI服务暂时不可用: {str(e)}'}), 500
+
+    @app.route('/api/ai/chat/stream', methods=['POST'])
+    def ai_chat_stream():
+        """AI智能问答流式接口（Server-Sent Events）"""
+        data = request.get_json()
+        user_question = data.get('question', '')
+        session_id = data.get('session_id', '')
+        
+        if not user_question:
+            return jsonify({'error': '问题不能为空'}), 400
+        
+        # 在返回响应头之前取得首段内容，未获准入时仍可返回429
+        stream = get_ai_response_stream(huawei_ai_client, user_question, session_id)
+        try:
+            first = next(stream, None)
+        except AdmissionRejected as e:
+            return busy_response(e)
+        except Exception as e:
+            return jsonify({'error': f'AI服务暂时不可用: {str(e)}'}), 500
+        
+        def generate():
+            chunks = []
+            try:
+                if first is not None:
+                    chunks.append(first)
+                    yield sse_event({'delta': first})
+                for delta in stream:
+                    chunks.append(delta)
+                    yield sse_event({'delta': delta})
+                
+                # 流结束后保存用户交互记录
+                created_at = services.save_interaction(session_id, user_question, ''.join(chunks))
+                
+                yield sse_event({
+                    'session_id': session_id,
+                    'timestamp': created_at.isoformat()
+                }, event='done')
+            except Exception as e:
+                yield sse_event({'error': f'AI服务暂时不可用: {str(e)}'}, event='error')
+        
+        return Response(stream_with_context(generate()),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/api/ai/cache/stats')
+    def ai_cache_stats():
+        """AI回答缓存与相同问题合并统计API"""
+        stats = answer_cache.stats()
+        if huawei_ai_client.single_flight is not None:
+            stats['coalescing'] = huawei_ai_client.single_flight.stats()
+        return jsonify(stats)
+
+    @app.route('/api/ai/admission/stats')
+    def ai_admission_stats():
+        """上游AI调用的并发准入统计API"""
+        return jsonify(huawei_ai_client.admission.stats())
+
+    @app.route('/api/ai/interactions/stats')
+    def ai_interaction_stats():
+        """交互记录写入队列统计API"""
+        return jsonify(interaction_writer.stats())
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Prometheus格式的运行指标（合并全部工作进程）"""
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    def cursor_page_response(query, field_set, fields, per_page, ranked, count_key):
+        """
+        游标分页的列表响应
+        
+        with_total=1 时附带总数，总数取自缓存，不随每页重复计数。
+        """
+        model = field_set.model
+        try:
+            rows, next_cursor = paginate_by_cursor(
+                query.options(field_set.options(fields, extra=['created_at'])),
+                model, request.args.get('after', ''), per_page, ranked=ranked
+            )
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        
+        data = {
+            'items': media_library.attach([field_set.serialize(row, fields) for row in rows]),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+            'per_page': per_page
+        }
+        if request.args.get('with_total', type=int):
+            data['total'] = count_cache.count(count_key, query)
+        return jsonify(data)
+
+    @app.route('/api/cache/stats')
+    def response_cache_stats():
+        """响应缓存统计API"""
+        return jsonify(response_cache.stats())
+
+    @app.route('/api/knowledge')
+    def get_knowledge():
+        """获取知识库API"""
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
+        category_id = request.args.get('category_id', type=int)
+        keyword = request.args.get('keyword', '')
+        
+        try:
+            fields = knowledge_fields.from_request(request.args)
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = FeiyiKnowledge.query
+        
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        
+        # 游标分页：传入 after 参数（第一页为空字符串）
+        if 'after' in request.args:
+            if keyword:
+                query = knowledge_index.search(query, keyword)
+            return cursor_page_response(query, knowledge_fields, fields, per_page, bool(keyword),
+                                        ('knowledge', category_id, keyword))
+        
+        if keyword:
+            query = knowledge_index.search(query, keyword)
+        else:
+            query = query.order_by(FeiyiKnowledge.created_at.desc())
+        
+        knowledge_items = query.options(knowledge_fields.options(fields)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'items': [knowledge_fields.serialize(item, fields) for item in knowledge_items.items],
+            'total': knowledge_items.total,
+            'pages': knowledge_items.pages,
+            'current_page': page,
+            'per_page': per_page
+        })
+
+    @app.route('/api/items')
+    def get_items():
+        """获取非遗项目列表API"""
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 12, type=int)
+        category_id = request.args.get('category_id', type=int)
+        keyword = request.args.get('keyword', '')
+        
+        try:
+            fields = item_fields.from_request(request.args)
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = FeiyiItem.query
+        
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        
+        # 游标分页：传入 after 参数（第一页为空字符串）
+        if 'after' in request.args:
+            if keyword:
+                query = item_index.search(query, keyword)
+            return cursor_page_response(query, item_fields, fields, per_page, bool(keyword),
+                                        ('items', category_id, keyword))
+        
+        if keyword:
+            query = item_index.search(query, keyword)
+        else:
+            query = query.order_by(FeiyiItem.created_at.desc())
+        
+        items = query.options(item_fields.options(fields)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'items': media_library.attach([item_fields.serialize(item, fields) for item in items.items]),
+            'total': items.total,
+            'pages': items.pages,
+            'current_page': page,
+            'per_page': per_page
+        })
+
+    @app.route('/api/item/<int:item_id>')
+    @response_cache.cached(item_data_version, cache_control=API_CACHE_CONTROL)
+    def get_item_detail(item_id):
+        """获取非遗项目详情API"""
+        document = item_documents.get(item_id)
+        if document is None:
+            abort(404)
+        
+        item_data = dict(document['item'])
+        item_data['related_knowledge'] = document['related_knowledge']
+        item_data['introduction'] = document.get('introduction')
+        item_data['media'] = document.get('media') or []
+        
+        return jsonify(item_data)
+
+    @app.route('/api/search')
+    def search():
+        """全局搜索API"""
+        keyword = request.args.get('keyword', '')
+        if not keyword:
+            return jsonify({'error': '搜索关键词不能为空'}), 400
+        
+        try:
+            fields = item_fields.from_request(request.args)
+            k_fields = knowledge_fields.parse(request.args.get('knowledge_fields'), request.args.get('view'))
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # 搜索项目（按相关度排序），摘要所需的检索字段一并加载
+        items = item_index.search(FeiyiItem.query, keyword) \
+            .options(item_fields.options(fields, extra=item_index.fields)).limit(10).all()
+        
+        # 搜索知识库
+        knowledge = knowledge_index.search(FeiyiKnowledge.query, keyword) \
+            .options(knowledge_fields.options(k_fields, extra=knowledge_index.fields)).limit(10).all()
+        
+        return jsonify({
+            'items': [dict(item_fields.serialize(item, fields), snippet=item_index.snippet(item, keyword))
+                      for item in items],
+            'knowledge': [dict(knowledge_fields.serialize(k, k_fields), snippet=knowledge_index.snippet(k, keyword))
+                          for k in knowledge],
+            'keyword': keyword
+        })
+
+    @app.route('/categories')
+    def categories_page():
+        """分类页面"""
+        return render_template('categories.html', categories=FEIYI_CATEGORIES)
+
+    @app.route('/category/<int:category_id>')
+    @response_cache.cached(category_data_version)
+    def category_detail_page(category_id):
+        """分类详情页面"""
+        category = next((cat for cat in FEIYI_CATEGORIES if cat['id'] == category_id), None)
+        if not category:
+            return "分类不存在", 404
+        
+        # 获取该分类下的项目
+        items = FeiyiItem.query.filter_by(category_id=category_id).all()
+        introduction = introductions.get(KIND_CATEGORY, category_id)
+        
+        return render_template('category_detail.html', category=category, items=items,
+                             introduction=introduction['content'] if introduction else None)
+
+    @app.route('/item/<int:item_id>')
+    @response_cache.cached(item_data_version)
+    def item_detail_page(item_id):
+        """项目详情页面"""
+        # 详情文档已包含所属分类、相关知识与相关项目（同分类的其他项目）
+        document = item_documents.get(item_id)
+        if document is None:
+            abort(404)
+        
+        return render_template('item_detail.html', 
+                             item=document['item'], 
+                             category=document['category'],
+                             related_knowledge=document['related_knowledge'],
+                             related_items=document['related_items'],
+                             introduction=document.get('introduction'),
+                             media=document.get('media') or [])
+
+
 if __name__ == '__main__':
+    from startup import configure_logging
+    configure_logging()
+    app = create_app()
+    metrics.start()
+    services = app.extensions['feiyi']
     with app.app_context():
         db.create_all()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+        ensure_indexes()
+        services.item_index.ensure_ready()
+        services.knowledge_index.ensure_ready()
+    app.run(debug=True, host='0.0.0.0', port=5000)
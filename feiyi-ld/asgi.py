@@ -0,0 +1,191 @@
+"""
+ASGI入口
+
+AI问答接口由事件循环直接处理，单个进程即可同时等待大量上游调用；
+其余页面与API仍由Flask应用处理，在线程池中执行。
+
+启动示例（监听地址、进程数与 preload 见 gunicorn.conf.py）：
+    gunicorn -c gunicorn.conf.py
+"""
+import asyncio
+import json
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+
+from startup import load_app
+
+# 创建并预热Flask应用；gunicorn preload 时只在主进程执行一次，工作进程共享
+app = load_app()
+services = app.extensions['feiyi']
+
+from app import sse_event
+from admission import AdmissionRejected
+from huawei_ai_async import create_async_client, get_ai_response_async, get_ai_response_stream_async
+from metrics import metrics
+
+# 与Flask路由的同步客户端共享熔断状态、回答缓存、请求合并器与并发名额
+async_huawei_ai_client = create_async_client(services.huawei_ai_client)
+
+# 承载Flask同步路由的线程数
+flask_app = WSGIMiddleware(app, workers=int(os.getenv('FEIYI_WSGI_THREADS', 10)))
+
+
+async def read_json(receive):
+    """读取并解析请求体JSON，不是JSON对象时视为空对象"""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def send_json(send, data, status=200, headers=()):
+    """发送JSON响应"""
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                    (b'content-length', str(len(body)).encode()),
+                    *headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_busy(send, rejection):
+    """上游并发已满时的429响应"""
+    await send_json(send, {'error': 'AI服务繁忙，请稍后重试', 'retry_after': rejection.retry_after}, 429,
+                    [(b'retry-after', str(rejection.retry_after).encode())])
+
+
+async def ai_chat(scope, receive, send):
+    """AI智能问答接口（异步）"""
+    data = await read_json(receive)
+    user_question = data.get('question', '')
+    session_id = data.get('session_id', '')
+
+    if not user_question:
+        return await send_json(send, {'error': '问题不能为空'}, 400)
+
+    try:
+        ai_response = await get_ai_response_async(async_huawei_ai_client, user_question, session_id)
+        # 记录会话记忆时会查询数据库，放到线程中执行
+        created_at = await asyncio.to_thread(services.save_interaction, session_id, user_question, ai_response)
+
+        await send_json(send, {
+            'answer': ai_response,
+            'session_id': session_id,
+            'timestamp': created_at.isoformat()
+        })
+    except AdmissionRejected as e:
+        await send_busy(send, e)
+    except Exception as e:
+        await send_json(send, {'error': f'AI服务暂时不可用: {str(e)}'}, 500)
+
+
+async def ai_chat_stream(scope, receive, send):
+    """AI智能问答流式接口（异步，Server-Sent Events）"""
+    data = await read_json(receive)
+    user_question = data.get('question', '')
+    session_id = data.get('session_id', '')
+
+    if not user_question:
+        return await send_json(send, {'error': '问题不能为空'}, 400)
+
+    # 在发送响应头之前取得首段内容，未获准入时仍可返回429
+    stream = get_ai_response_stream_async(async_huawei_ai_client, user_question, session_id)
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except AdmissionRejected as e:
+        return await send_busy(send, e)
+    except Exception as e:
+        return await send_json(send, {'error': f'AI服务暂时不可用: {str(e)}'}, 500)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')]
+    })
+
+    async def emit(chunk):
+        await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+    chunks = []
+    try:
+        if first is not None:
+            chunks.append(first)
+            await emit(sse_event({'delta': first}))
+        async for delta in stream:
+            chunks.append(delta)
+            await emit(sse_event({'delta': delta}))
+
+        # 流结束后保存用户交互记录
+        created_at = await asyncio.to_thread(services.save_interaction, session_id, user_question, ''.join(chunks))
+        await emit(sse_event({
+            'session_id': session_id,
+            'timestamp': created_at.isoformat()
+        }, event='done'))
+    except Exception as e:
+        await emit(sse_event({'error': f'AI服务暂时不可用: {str(e)}'}, event='error'))
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+# 由事件循环直接处理的路由
+ASYNC_ROUTES = {
+    ('POST', '/api/ai/chat'): ai_chat,
+    ('POST', '/api/ai/chat/stream'): ai_chat_stream,
+}
+
+
+async def lifespan(receive, send):
+    """处理进程启动与关闭事件"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_huawei_ai_client.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def timed(handler, scope, receive, send):
+    """执行异步路由并记录延迟指标（流式响应计至响应结束）"""
+    status = 500
+    started = time.perf_counter()
+
+    async def send_and_record(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        await send(message)
+
+    try:
+        await handler(scope, receive, send_and_record)
+    finally:
+        metrics.record_request(scope['method'], scope['path'], status, time.perf_counter() - started)
+
+
+async def application(scope, receive, send):
+    """ASGI应用：AI问答走异步路径，其余请求交由Flask"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    if scope['type'] == 'http':
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            return await timed(handler, scope, receive, send)
+
+    await flask_app(scope, receive, send)
@@ -0,0 +1,258 @@
+"""
+静态资源构建与发布模块
+
+页面的样式与脚本源文件位于 assets/（css/、js/），由构建步骤发布到 static/dist/：
+- 压缩（安装 rcssmin / rjsmin 时使用之，否则使用内置的保守压缩：去注释与多余空白）；
+- 以内容哈希命名（如 css/base.3f2a1b9c.css），内容不变则文件名不变；
+- 预先生成 gzip 与 brotli（需安装 Brotli）压缩版本；
+- 写入 manifest.json，记录源文件名到发布文件名的映射。
+
+模板通过 asset_url('css/base.css') 引用资源：有清单时返回带哈希的地址，浏览器可永久缓存
+（Cache-Control: immutable），按 Accept-Encoding 直接发送预压缩文件；
+尚未构建时返回源文件地址并每次确认，开发时修改源文件即可生效。
+
+用法：
+    python assets.py build
+    python assets.py build --clean
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from typing import Dict
+
+from flask import abort, request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 发布文件可被浏览器与代理永久缓存，内容变化时文件名随之变化
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# 未构建时直接提供源文件，每次确认
+SOURCE_CACHE_CONTROL = 'no-cache'
+
+MANIFEST_NAME = 'manifest.json'
+
+# 小于该字节数的文件不生成压缩版本
+COMPRESS_MIN_SIZE = 256
+
+MIMETYPES = {'.css': 'text/css', '.js': 'text/javascript'}
+
+# (Accept-Encoding 名称, 文件后缀)，按优先顺序
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_STRING_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+
+
+def _minify_css_fallback(source: str) -> str:
+    """去掉注释与多余空白，字符串字面量原样保留"""
+    parts = _STRING_RE.split(_CSS_COMMENT_RE.sub('', source))
+    for index in range(0, len(parts), 2):
+        text = re.sub(r'\s+', ' ', parts[index])
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        text = re.sub(r':\s+', ':', text)
+        parts[index] = text.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def _minify_js_fallback(source: str) -> str:
+    """逐行去掉缩进、空行与整行注释，保留换行以免改变自动分号插入"""
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def minify(name: str, source: str) -> str:
+    """按扩展名压缩样式或脚本"""
+    if name.endswith('.css'):
+        return rcssmin.cssmin(source) if rcssmin else _minify_css_fallback(source)
+    if name.endswith('.js'):
+        return rjsmin.jsmin(source) if rjsmin else _minify_js_fallback(source)
+    return source
+
+
+def _write(path: str, data: bytes):
+    """先写临时文件再替换，服务中的进程不会读到半个文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class StaticAssets:
+    """带内容哈希与预压缩的静态资源"""
+
+    def __init__(self, app=None, source_dir: str = None, dist_dir: str = None, url_prefix: str = '/assets'):
+        """
+        初始化静态资源
+
+        Args:
+            app: Flask应用，提供时立即注册
+            source_dir: 源文件目录
+            dist_dir: 发布目录
+            url_prefix: 资源地址前缀
+        """
+        self.source_dir = source_dir or os.path.join(ROOT, 'assets')
+        self.dist_dir = dist_dir or os.path.join(ROOT, 'static', 'dist')
+        self.url_prefix = url_prefix.rstrip('/')
+        self.manifest: Dict[str, str] = {}
+        self._published = set()
+        self.load_manifest()
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.dist_dir, MANIFEST_NAME)
+
+    def load_manifest(self):
+        """读取构建清单，没有清单时使用源文件"""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self._published = set(self.manifest.values())
+        if not self.manifest:
+            logger.info("静态资源尚未构建（python assets.py build），使用源文件")
+
+    def url(self, name: str) -> str:
+        """资源地址：已构建时为带哈希的发布文件，否则为源文件"""
+        return f"{self.url_prefix}/{self.manifest.get(name, name)}"
+
+    def build(self, clean: bool = False) -> Dict[str, int]:
+        """
+        压缩、按内容哈希命名并预压缩全部源文件，写入清单
+
+        Args:
+            clean: 删除不在新清单中的旧发布文件（默认保留，仍在使用旧页面的客户端可继续加载）
+
+        Returns:
+            构建统计：文件数、源文件与发布文件总字节数、gzip与brotli总字节数
+        """
+        manifest = {}
+        totals = {'files': 0, 'source_bytes': 0, 'minified_bytes': 0, 'gzip_bytes': 0, 'brotli_bytes': 0}
+        for directory, _, names in sorted(os.walk(self.source_dir)):
+            for filename in sorted(names):
+                ext = os.path.splitext(filename)[1]
+                if ext not in MIMETYPES:
+                    continue
+                source_path = os.path.join(directory, filename)
+                name = os.path.relpath(source_path, self.source_dir).replace(os.sep, '/')
+                with open(source_path, encoding='utf-8') as f:
+                    source = f.read()
+                data = minify(name, source).encode('utf-8')
+                digest = hashlib.sha256(data).hexdigest()[:10]
+                published = f"{os.path.splitext(name)[0]}.{digest}{ext}"
+                path = os.path.join(self.dist_dir, published)
+
+                _write(path, data)
+                totals['files'] += 1
+                totals['source_bytes'] += len(source.encode('utf-8'))
+                totals['minified_bytes'] += len(data)
+                if len(data) >= COMPRESS_MIN_SIZE:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                    _write(path + '.gz', compressed)
+                    totals['gzip_bytes'] += len(compressed)
+                    if brotli is not None:
+                        compressed = brotli.compress(data, quality=11)
+                        _write(path + '.br', compressed)
+                        totals['brotli_bytes'] += len(compressed)
+                manifest[name] = published
+
+        if brotli is None:
+            logger.warning("未安装Brotli，只生成gzip压缩版本")
+        _write(self.manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8'))
+        if clean:
+            totals['removed'] = self._clean(set(manifest.values()))
+        self.manifest = manifest
+        self._published = set(manifest.values())
+        return totals
+
+    def _clean(self, keep) -> int:
+        removed = 0
+        for directory, _, names in os.walk(self.dist_dir):
+            for filename in names:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.dist_dir).replace(os.sep, '/')
+                for suffix in ('.br', '.gz'):
+                    if name.endswith(suffix):
+                        name = name[:-len(suffix)]
+                if name != MANIFEST_NAME and name not in keep:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+    def send(self, filename: str):
+        """发送资源：发布文件按 Accept-Encoding 选择预压缩版本并永久缓存，源文件每次确认"""
+        mimetype = MIMETYPES.get(os.path.splitext(filename)[1])
+        if mimetype is None:
+            abort(404)
+        if filename not in self._published:
+            response = send_from_directory(self.source_dir, filename, mimetype=mimetype, max_age=0)
+            response.headers['Cache-Control'] = SOURCE_CACHE_CONTROL
+            return response
+
+        encoding = None
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] and os.path.exists(os.path.join(self.dist_dir, filename + suffix)):
+                encoding, filename = name, filename + suffix
+                break
+        response = send_from_directory(self.dist_dir, filename, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    def init_app(self, app):
+        """
+        注册资源路由与模板函数 asset_url
+
+        Args:
+            app: Flask应用
+        """
+        app.add_url_rule(f"{self.url_prefix}/<path:filename>", 'assets', self.send)
+        app.add_template_global(self.url, 'asset_url')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='构建页面样式与脚本：压缩、内容哈希命名与预压缩')
+    parser.add_argument('command', choices=['build'], help='build：构建并写入清单')
+    parser.add_argument('--clean', action='store_true', help='删除不在新清单中的旧发布文件')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    totals = StaticAssets().build(clean=args.clean)
+    print(json.dumps(totals, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+let sessionId = 'session_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
+let isWaiting = false;
+
+const chatMessages = document.getElementById('chatMessages');
+const chatForm = document.getElementById('chatForm');
+const messageInput = document.getElementById('messageInput');
+const sendButton = document.getElementById('sendButton');
+
+// 自动调整输入框高度
+messageInput.addEventListener('input', function() {
+    this.style.height = 'auto';
+    this.style.height = Math.min(this.scrollHeight, 120) + 'px';
+});
+
+// 回车发送消息
+messageInput.addEventListener('keydown', function(e) {
+    if (e.key === 'Enter' && !e.shiftKey) {
+        e.preventDefault();
+        if (!isWaiting && this.value.trim()) {
+            sendMessage();
+        }
+    }
+});
+
+// 表单提交
+chatForm.addEventListener('submit', function(e) {
+    e.preventDefault();
+    if (!isWaiting && messageInput.value.trim()) {
+        sendMessage();
+    }
+});
+
+function askQuestion(question) {
+    messageInput.value = question;
+    sendMessage();
+}
+
+function sendMessage() {
+    const message = messageInput.value.trim();
+    if (!message || isWaiting) return;
+
+    // 隐藏欢迎消息
+    const welcomeMessage = document.querySelector('.welcome-message');
+    if (welcomeMessage) {
+        welcomeMessage.style.display = 'none';
+    }
+
+    // 添加用户消息
+    addMessage(message, 'user');
+
+    // 清空输入框
+    messageInput.value = '';
+    messageInput.style.height = 'auto';
+
+    // 显示输入状态
+    setWaitingState(true);
+    showTypingIndicator();
+
+    // 发送请求，以流式方式逐段渲染回答
+    fetch('/api/ai/chat/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            question: message,
+            session_id: sessionId
+        })
+    })
+    .then(response => {
+        if (!response.ok || !response.body) {
+            return response.json().then(data => {
+                hideTypingIndicator();
+                addMessage(`抱歉，${data.error || '服务暂时不可用'}`, 'ai', true);
+            });
+        }
+        return readAnswerStream(response.body.getReader());
+    })
+    .catch(error => {
+        hideTypingIndicator();
+        addMessage('抱歉，网络连接出现问题，请稍后重试。', 'ai', true);
+        console.error('Error:', error);
+    })
+    .finally(() => {
+        setWaitingState(false);
+    });
+}
+
+function readAnswerStream(reader) {
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    let messageContent = null;
+
+    function handleEvent(raw) {
+        let event = 'message';
+        let data = '';
+        raw.split('\n').forEach(line => {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (!data) return;
+        const payload = JSON.parse(data);
+
+        if (event === 'error') {
+            hideTypingIndicator();
+            addMessage(`抱歉，${payload.error}`, 'ai', true);
+        } else if (payload.delta) {
+            // 收到首个片段时以回答气泡替换思索提示
+            if (!messageContent) {
+                hideTypingIndicator();
+                messageContent = addMessage('', 'ai');
+            }
+            answer += payload.delta;
+            messageContent.querySelector('.message-text').innerHTML = answer.replace(/\n/g, '<br>');
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        }
+    }
+
+    function pump() {
+        return reader.read().then(({ done, value }) => {
+            if (done) {
+                if (buffer.trim()) handleEvent(buffer);
+                hideTypingIndicator();
+                return;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            events.forEach(handleEvent);
+            return pump();
+        });
+    }
+
+    return pump();
+}
+
+function addMessage(content, sender, isError = false) {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${sender}`;
+
+    const avatar = document.createElement('div');
+    avatar.className = 'message-avatar';
+    avatar.textContent = sender === 'user' ? '问' : '答';
+
+    const messageContent = document.createElement('div');
+    messageContent.className = 'message-content';
+    if (isError) {
+        messageContent.classList.add('error-message');
+    }
+
+    // 处理换行
+    const messageText = document.createElement('span');
+    messageText.className = 'message-text';
+    messageText.innerHTML = content.replace(/\n/g, '<br>');
+    messageContent.appendChild(messageText);
+
+    const messageTime = document.createElement('div');
+    messageTime.className = 'message-time';
+    messageTime.textContent = new Date().toLocaleTimeString();
+
+    messageContent.appendChild(messageTime);
+    messageDiv.appendChild(avatar);
+    messageDiv.appendChild(messageContent);
+
+    chatMessages.appendChild(messageDiv);
+
+    // 滚动到底部
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+
+    // 添加动画效果
+    messageDiv.style.opacity = '0';
+    messageDiv.style.transform = 'translateY(20px)';
+    setTimeout(() => {
+        messageDiv.style.transition = 'opacity 0.3s ease, transform 0.3s ease';
+        messageDiv.style.opacity = '1';
+        messageDiv.style.transform = 'translateY(0)';
+    }, 10);
+
+    return messageContent;
+}
+
+function showTypingIndicator() {
+    const typingDiv = document.createElement('div');
+    typingDiv.className = 'message ai';
+    typingDiv.id = 'typingIndicator';
+
+    const avatar = document.createElement('div');
+    avatar.className = 'message-avatar';
+    avatar.textContent = '答';
+
+    const typingContent = document.createElement('div');
+    typingContent.className = 'typing-indicator';
+    typingContent.style.display = 'flex';
+    typingContent.innerHTML = `
+        <span>思索中</span>
+        <div class="typing-dots">
+            <div class="typing-dot"></div>
+            <div class="typing-dot"></div>
+            <div class="typing-dot"></div>
+        </div>
+    `;
+
+    typingDiv.appendChild(avatar);
+    typingDiv.appendChild(typingContent);
+    chatMessages.appendChild(typingDiv);
+
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
+function hideTypingIndicator() {
+    const typingIndicator = document.getElementById('typingIndicator');
+    if (typingIndicator) {
+        typingIndicator.remove();
+    }
+}
+
+function setWaitingState(waiting) {
+    isWaiting = waiting;
+    sendButton.disabled = waiting;
+    sendButton.textContent = waiting ? '发送中...' : '发送';
+    messageInput.disabled = waiting;
+}
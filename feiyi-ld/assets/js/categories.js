@@ -0,0 +1,161 @@
+// 页面加载时获取各分类的项目数量
+document.addEventListener('DOMContentLoaded', function() {
+    loadCategoryStats();
+    addScrollAnimation();
+});
+
+function loadCategoryStats() {
+    // 一次请求获取全部分类的统计
+    fetch('/api/categories?stats=1')
+        .then(response => response.json())
+        .then(categories => {
+            categories.forEach(category => {
+                const countElement = document.getElementById(`count-${category.id}`);
+                if (countElement) {
+                    countElement.textContent = category.stats ? category.stats.item_count : 0;
+                }
+            });
+        })
+        .catch(error => {
+            console.error('Error loading category stats:', error);
+            document.querySelectorAll('[id^="count-"]').forEach(countElement => {
+                countElement.textContent = '0';
+            });
+        });
+}
+
+function searchItems(event) {
+    event.preventDefault();
+    const keyword = document.getElementById('searchInput').value.trim();
+
+    if (!keyword) {
+        alert('请输入搜索关键词');
+        return;
+    }
+
+    const searchResults = document.getElementById('searchResults');
+    const searchContent = document.getElementById('searchContent');
+
+    // 显示加载状态
+    searchContent.innerHTML = `
+        <div class="loading">
+            <div class="loading-spinner"></div>
+            <p>正在搜索...</p>
+        </div>
+    `;
+    searchResults.style.display = 'block';
+
+    // 滚动到搜索结果
+    searchResults.scrollIntoView({ behavior: 'smooth' });
+
+    fetch(`/api/search?keyword=${encodeURIComponent(keyword)}&view=summary`)
+        .then(response => response.json())
+        .then(data => {
+            displaySearchResults(data);
+        })
+        .catch(error => {
+            console.error('Search error:', error);
+            searchContent.innerHTML = `
+                <div class="error-message">
+                    搜索出现错误，请稍后重试。
+                </div>
+            `;
+        });
+}
+
+function displaySearchResults(data) {
+    const searchContent = document.getElementById('searchContent');
+
+    if (data.items.length === 0 && data.knowledge.length === 0) {
+        searchContent.innerHTML = `
+            <div class="card" style="text-align: center; padding: 40px;">
+                <h3>未找到相关结果</h3>
+                <p>请尝试其他关键词或浏览分类页面</p>
+            </div>
+        `;
+        return;
+    }
+
+    let html = '';
+
+    if (data.items.length > 0) {
+        html += '<h3 style="margin: 30px 0 20px 0; color: #2c3e50;">相关项目</h3>';
+        html += '<div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px;">';
+
+        data.items.forEach(item => {
+            html += `
+                <div class="card" style="cursor: pointer;" onclick="location.href='/item/${item.id}'">
+                    <h4 style="color: #d4af37; margin-bottom: 10px;">${item.name}</h4>
+                    <p style="color: #666; margin-bottom: 15px;">${item.snippet || item.description}</p>
+                    <div style="display: flex; justify-content: space-between; align-items: center;">
+                        <span style="background: #f8f6f0; padding: 5px 10px; border-radius: 0; font-size: 0.9rem;">
+                            ${getCategoryName(item.category_id)}
+                        </span>
+                        <span style="color: #d4af37; font-weight: 600;">查看详情 →</span>
+                    </div>
+                </div>
+            `;
+        });
+
+        html += '</div>';
+    }
+
+    if (data.knowledge.length > 0) {
+        html += '<h3 style="margin: 30px 0 20px 0; color: #2c3e50;">相关知识</h3>';
+
+        data.knowledge.forEach(knowledge => {
+            html += `
+                <div class="card" style="margin-bottom: 20px;">
+                    <h4 style="color: #d4af37; margin-bottom: 10px;">${knowledge.title}</h4>
+                    <p style="color: #666; line-height: 1.6;">${knowledge.snippet || knowledge.title}</p>
+                    <div style="margin-top: 15px;">
+                        <span style="background: #f8f6f0; padding: 5px 10px; border-radius: 0; font-size: 0.9rem;">
+                            知识库
+                        </span>
+                    </div>
+                </div>
+            `;
+        });
+    }
+
+    searchContent.innerHTML = html;
+}
+
+function getCategoryName(categoryId) {
+    const categories = {
+        1: '民间文学',
+        2: '传统音乐',
+        3: '传统舞蹈',
+        4: '传统戏剧',
+        5: '曲艺',
+        6: '传统体育、游艺与杂技',
+        7: '传统美术',
+        8: '传统技艺',
+        9: '传统医药',
+        10: '民俗'
+    };
+    return categories[categoryId] || '未知分类';
+}
+
+function addScrollAnimation() {
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.style.opacity = '1';
+                entry.target.style.transform = 'translateY(0)';
+            }
+        });
+    }, observerOptions);
+
+    document.querySelectorAll('.category-card').forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(30px)';
+        card.style.transition = `opacity 0.6s ease ${index * 0.1}s, transform 0.6s ease ${index * 0.1}s`;
+        observer.observe(card);
+    });
+}
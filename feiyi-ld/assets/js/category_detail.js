@@ -0,0 +1,222 @@
+let nextCursor = null;
+let loadingItems = false;
+let requestSeq = 0;
+let currentFilters = {};
+
+document.addEventListener('DOMContentLoaded', function() {
+    loadItems();
+
+    // 添加回车键搜索功能
+    document.getElementById('keywordFilter').addEventListener('keypress', function(e) {
+        if (e.key === 'Enter') {
+            applyFilters();
+        }
+    });
+
+    document.getElementById('locationFilter').addEventListener('keypress', function(e) {
+        if (e.key === 'Enter') {
+            applyFilters();
+        }
+    });
+});
+
+function loadItems(reset = true) {
+    if (loadingItems && !reset) return;
+    loadingItems = true;
+    const seq = ++requestSeq;
+
+    // 构建查询参数（游标分页，首页同时获取总数）
+    const params = new URLSearchParams({
+        category_id: document.querySelector('.category-header').dataset.categoryId,
+        per_page: 12,
+        view: 'summary',
+        after: reset ? '' : nextCursor
+    });
+    if (reset) {
+        params.append('with_total', 1);
+    }
+
+    // 添加筛选条件
+    Object.keys(currentFilters).forEach(key => {
+        if (currentFilters[key]) {
+            params.append(key, currentFilters[key]);
+        }
+    });
+
+    // 显示加载状态
+    if (reset) {
+        document.getElementById('itemsContainer').innerHTML = `
+            <div class="loading">
+                <div class="loading-spinner"></div>
+                <p>正在加载项目...</p>
+            </div>
+        `;
+    }
+
+    fetch(`/api/items?${params.toString()}`)
+        .then(response => response.json())
+        .then(data => {
+            // 筛选条件已变化时丢弃旧请求的结果
+            if (seq !== requestSeq) return;
+            displayItems(data.items, !reset);
+            nextCursor = data.next_cursor;
+            updatePagination(data.has_more);
+            if (reset) {
+                updateStats(data.total);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading items:', error);
+            document.getElementById('itemsContainer').innerHTML = `
+                <div class="empty-state">
+                    <div class="empty-icon">❌</div>
+                    <h3 class="empty-title">加载失败</h3>
+                    <p class="empty-description">无法加载项目数据，请稍后重试。</p>
+                </div>
+            `;
+        })
+        .finally(() => {
+            if (seq === requestSeq) {
+                loadingItems = false;
+            }
+        });
+}
+
+function displayItems(items, append = false) {
+    const container = document.getElementById('itemsContainer');
+
+    if (items.length === 0 && !append) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <div class="empty-icon">🔍</div>
+                <h3 class="empty-title">暂无相关项目</h3>
+                <p class="empty-description">当前筛选条件下没有找到相关的非遗项目，请尝试调整筛选条件。</p>
+            </div>
+        `;
+        return;
+    }
+
+    const itemsHtml = items.map(item => `
+        <div class="item-card" onclick="location.href='/item/${item.id}'">
+            ${item.media && item.media.length ? pictureHtml(item.media[0], item.name) : ''}
+            <h3 class="item-title">${item.name}</h3>
+            <p class="item-description">${item.description}</p>
+
+            <div class="item-meta">
+                <div class="item-location">
+                    <span>📍</span>
+                    <span>${item.origin_location || '未知地区'}</span>
+                </div>
+                <div class="item-level ${getLevelClass(item.protection_level)}">
+                    ${item.protection_level || '未分级'}
+                </div>
+            </div>
+
+            <div class="item-actions">
+                <a href="/item/${item.id}" class="action-button primary" onclick="event.stopPropagation()">
+                    查看详情
+                </a>
+                <button class="action-button" onclick="event.stopPropagation(); askAI('${item.name}')">
+                    AI解读
+                </button>
+            </div>
+        </div>
+    `).join('');
+
+    const grid = container.querySelector('.items-container');
+    if (append && grid) {
+        grid.insertAdjacentHTML('beforeend', itemsHtml);
+    } else {
+        container.innerHTML = `<div class="items-container">${itemsHtml}</div>`;
+    }
+
+    // 添加滚动动画
+    addScrollAnimation();
+}
+
+// 卡片封面：浏览器按支持的格式与卡片宽度选择衍生图，滚动到附近时才加载
+function pictureHtml(media, alt) {
+    const sizes = '(max-width: 768px) 100vw, 400px';
+    const sources = media.sources.map(source =>
+        `<source type="${source.type}" srcset="${source.srcset}" sizes="${sizes}">`
+    ).join('');
+    return `<picture class="item-cover">${sources}<img src="${media.src}" srcset="${media.srcset}" sizes="${sizes}" width="${media.width}" height="${media.height}" alt="${alt}" loading="lazy" decoding="async"></picture>`;
+}
+
+function getLevelClass(level) {
+    if (level && level.includes('国家')) return 'level-national';
+    if (level && level.includes('省')) return 'level-provincial';
+    if (level && level.includes('市')) return 'level-municipal';
+    return 'level-municipal';
+}
+
+// 滚动到“加载更多”按钮附近时自动加载下一页
+const loadMoreObserver = new IntersectionObserver((entries) => {
+    if (entries.some(entry => entry.isIntersecting) && nextCursor) {
+        loadItems(false);
+    }
+}, { rootMargin: '200px' });
+
+function updatePagination(hasMore) {
+    const pagination = document.getElementById('pagination');
+    loadMoreObserver.disconnect();
+
+    if (!hasMore) {
+        pagination.style.display = 'none';
+        return;
+    }
+
+    pagination.style.display = 'flex';
+    pagination.innerHTML = `
+        <button class="pagination-button" id="loadMoreButton" onclick="loadItems(false)">
+            加载更多
+        </button>
+    `;
+    loadMoreObserver.observe(document.getElementById('loadMoreButton'));
+}
+
+function updateStats(total) {
+    document.getElementById('totalItems').textContent = total ?? '-';
+}
+
+function applyFilters() {
+    currentFilters = {
+        keyword: document.getElementById('keywordFilter').value.trim(),
+        protection_level: document.getElementById('levelFilter').value,
+        location: document.getElementById('locationFilter').value.trim()
+    };
+
+    loadItems(true); // 重新从第一页加载
+}
+
+function askAI(itemName) {
+    // 打开AI聊天页面并预填问题
+    const question = `请介绍一下${itemName}这个非物质文化遗产项目`;
+    const encodedQuestion = encodeURIComponent(question);
+    window.open(`/ai-chat?question=${encodedQuestion}`, '_blank');
+}
+
+function addScrollAnimation() {
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.style.opacity = '1';
+                entry.target.style.transform = 'translateY(0)';
+            }
+        });
+    }, observerOptions);
+
+    // 只为新加入的卡片设置动画
+    document.querySelectorAll('.item-card:not([data-animated])').forEach((card, index) => {
+        card.dataset.animated = '1';
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(30px)';
+        card.style.transition = `opacity 0.6s ease ${index * 0.1}s, transform 0.6s ease ${index * 0.1}s`;
+        observer.observe(card);
+    });
+}
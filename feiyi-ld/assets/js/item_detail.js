@@ -0,0 +1,101 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // 监听滚动事件，显示/隐藏回到顶部按钮
+    window.addEventListener('scroll', function() {
+        const backToTop = document.querySelector('.back-to-top');
+        if (window.pageYOffset > 300) {
+            backToTop.classList.add('visible');
+        } else {
+            backToTop.classList.remove('visible');
+        }
+    });
+
+    // 添加滚动动画
+    addScrollAnimation();
+});
+
+function askAI(itemName) {
+    const question = `请详细介绍一下${itemName}这个非物质文化遗产项目，包括它的历史背景、文化价值、传承现状等方面。`;
+    const encodedQuestion = encodeURIComponent(question);
+    window.open(`/ai-chat?question=${encodedQuestion}`, '_blank');
+}
+
+function shareItem() {
+    if (navigator.share) {
+        const header = document.querySelector('.item-header');
+        navigator.share({
+            title: header.dataset.itemName + ' - 中华非物质文化遗产',
+            text: header.dataset.itemDescription,
+            url: window.location.href
+        }).catch(console.error);
+    } else {
+        // 复制链接到剪贴板
+        navigator.clipboard.writeText(window.location.href).then(function() {
+            alert('链接已复制到剪贴板！');
+        }).catch(function() {
+            // 降级方案
+            const textArea = document.createElement('textarea');
+            textArea.value = window.location.href;
+            document.body.appendChild(textArea);
+            textArea.select();
+            document.execCommand('copy');
+            document.body.removeChild(textArea);
+            alert('链接已复制到剪贴板！');
+        });
+    }
+}
+
+function showKnowledgeDetail(title, content) {
+    document.getElementById('modalTitle').textContent = title;
+    document.getElementById('modalContent').innerHTML = content.replace(/\n/g, '<br>');
+    document.getElementById('knowledgeModal').style.display = 'block';
+    document.body.style.overflow = 'hidden';
+}
+
+function closeKnowledgeModal() {
+    document.getElementById('knowledgeModal').style.display = 'none';
+    document.body.style.overflow = 'auto';
+}
+
+function scrollToTop() {
+    window.scrollTo({
+        top: 0,
+        behavior: 'smooth'
+    });
+}
+
+function addScrollAnimation() {
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.style.opacity = '1';
+                entry.target.style.transform = 'translateY(0)';
+            }
+        });
+    }, observerOptions);
+
+    document.querySelectorAll('.content-section, .knowledge-card, .related-card').forEach((element, index) => {
+        element.style.opacity = '0';
+        element.style.transform = 'translateY(30px)';
+        element.style.transition = `opacity 0.6s ease ${index * 0.1}s, transform 0.6s ease ${index * 0.1}s`;
+        observer.observe(element);
+    });
+}
+
+// 点击模态框背景关闭
+document.getElementById('knowledgeModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeKnowledgeModal();
+    }
+});
+
+// ESC键关闭模态框
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') {
+        closeKnowledgeModal();
+    }
+});
@@ -0,0 +1,10 @@
+"""
+性能基准套件
+
+- datagen：按规模（1k / 100k / 1m）生成可复现的合成项目、知识与交互记录；
+- mock_ai：本地模拟的华为云聊天接口，可配置延迟与流式输出；
+- run：按指定并发逐一压测 app.py 的全部路由，输出各路由延迟分位数、吞吐与每请求SQL条数（JSON）；
+- compare：对比两次运行结果。
+
+在项目根目录以模块方式运行，如 python -m benchmarks.run，一键运行见 benchmarks/run.sh。
+"""
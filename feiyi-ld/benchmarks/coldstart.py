@@ -0,0 +1,190 @@
+"""
+冷启动测量
+
+测量部署或重启后首批请求的等待，结果输出JSON：
+- 进程（默认）：重复 --runs 次启动新的Python进程，测量创建应用（app.create_app）与预热（startup.warmup）的耗时，
+  以及热点路径的首个请求延迟；不预热与预热后各测一组，取中位数；
+- 服务（--server）：按 gunicorn.conf.py 启动站点，preload 开启与关闭各一次，测量从启动到首个请求成功的时间、
+  热点路径的首个请求延迟，以及各工作进程的内存（Rss、Pss 与私有内存 USS，读取 /proc/<pid>/smaps_rollup，仅Linux）。
+  preload 时工作进程共享主进程导入与预热的内存，Pss 与 USS 应明显小于 Rss。
+
+数据库等配置与站点相同，取自环境变量（DATABASE_URL 等）。
+
+用法：
+    python -m benchmarks.coldstart --runs 5 --output coldstart.json
+    python -m benchmarks.coldstart --server --workers 4 --port 5056
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 测量首个请求延迟的热点路径
+PATHS = ('/', '/categories', '/api/categories?stats=1', '/category/1', '/category/5')
+
+# 与浏览器一致的 Accept-Encoding
+HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+
+
+def probe(warm: bool) -> Dict[str, Any]:
+    """在本进程中创建应用（可选预热）并依次请求热点路径，返回各阶段耗时"""
+    started = time.perf_counter()
+    from app import create_app
+    app = create_app()
+    result: Dict[str, Any] = {'import_seconds': round(time.perf_counter() - started, 4)}
+    if warm:
+        from startup import warmup
+        result['warmup_seconds'] = warmup(app)['seconds']['total']
+    client = app.test_client()
+    first = {}
+    for path in PATHS:
+        request_started = time.perf_counter()
+        client.get(path, headers=HEADERS)
+        first[path] = round((time.perf_counter() - request_started) * 1000, 2)
+    result['first_request_ms'] = first
+    return result
+
+
+def _median(values: List[float]) -> float:
+    return round(statistics.median(values), 4)
+
+
+def measure_processes(runs: int) -> Dict[str, Any]:
+    """分别以不预热与预热启动 runs 个新进程，汇总各阶段耗时的中位数"""
+    report = {}
+    for mode in ('cold', 'warm'):
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            completed = subprocess.run([sys.executable, '-m', 'benchmarks.coldstart', '--probe', mode],
+                                       cwd=ROOT, capture_output=True, text=True, check=True)
+            sample = json.loads(completed.stdout.strip().splitlines()[-1])
+            sample['process_seconds'] = time.perf_counter() - started
+            samples.append(sample)
+
+        summary = {
+            'process_seconds': _median([s['process_seconds'] for s in samples]),
+            'import_seconds': _median([s['import_seconds'] for s in samples]),
+            'first_request_ms': {path: _median([s['first_request_ms'][path] for s in samples]) for path in PATHS},
+        }
+        if mode == 'warm':
+            summary['warmup_seconds'] = _median([s['warmup_seconds'] for s in samples])
+        summary['first_request_total_ms'] = round(sum(summary['first_request_ms'].values()), 2)
+        report[mode] = summary
+        logger.info(f"{mode}: 导入 {summary['import_seconds']}s，热点路径首个请求共 {summary['first_request_total_ms']}ms")
+    return report
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def _memory_kb(pid: int) -> Optional[Dict[str, int]]:
+    """进程的 Rss、Pss 与私有内存（KiB）"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+    return {'rss': fields.get('Rss', 0), 'pss': fields.get('Pss', 0),
+            'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)}
+
+
+def measure_server(preload: bool, workers: int, port: int, timeout: float) -> Dict[str, Any]:
+    """按 gunicorn.conf.py 启动站点，测量就绪时间、首个请求延迟与工作进程内存"""
+    env = dict(os.environ, FEIYI_PRELOAD='1' if preload else '0', FEIYI_WORKERS=str(workers),
+               FEIYI_BIND=f"127.0.0.1:{port}")
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        session = requests.Session()
+        ready = None
+        while time.perf_counter() - started < timeout:
+            try:
+                if session.get(f"{base_url}/", headers=HEADERS, timeout=timeout).status_code == 200:
+                    ready = time.perf_counter() - started
+                    break
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.02)
+        if ready is None:
+            raise RuntimeError(f"站点 {timeout}s 内未就绪")
+
+        first = {}
+        for path in PATHS:
+            request_started = time.perf_counter()
+            session.get(f"{base_url}{path}", headers=HEADERS, timeout=timeout)
+            first[path] = round((time.perf_counter() - request_started) * 1000, 2)
+
+        # 首个请求成功时其余工作进程可能尚未启动
+        while len(_children(server.pid)) < workers and time.perf_counter() - started < timeout:
+            time.sleep(0.05)
+        memory = [m for m in (_memory_kb(pid) for pid in _children(server.pid)) if m is not None]
+        result = {
+            'ready_seconds': round(ready, 4),
+            'first_request_ms': first,
+            'workers': len(memory),
+            'worker_memory_kb': {key: sum(m[key] for m in memory) for key in ('rss', 'pss', 'uss')},
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout)
+    logger.info(f"preload={preload}: {result['ready_seconds']}s 就绪，工作进程内存 {result['worker_memory_kb']}")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='测量应用冷启动耗时并输出JSON结果')
+    parser.add_argument('--runs', type=int, default=5, help='每种方式启动的进程数（默认5）')
+    parser.add_argument('--server', action='store_true', help='以 gunicorn 启动站点，对比 preload 开启与关闭')
+    parser.add_argument('--workers', type=int, default=2, help='--server 的工作进程数（默认2）')
+    parser.add_argument('--port', type=int, default=5056, help='--server 的监听端口（默认5056）')
+    parser.add_argument('--timeout', type=float, default=60, help='等待站点就绪与单个请求的超时秒数（默认60）')
+    parser.add_argument('--output', help='结果JSON文件（默认输出到标准输出）')
+    parser.add_argument('--probe', choices=('cold', 'warm'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.probe == 'warm'), ensure_ascii=False))
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if args.server:
+        report = {
+            'preload': measure_server(True, args.workers, args.port, args.timeout),
+            'no_preload': measure_server(False, args.workers, args.port, args.timeout),
+        }
+    else:
+        report = measure_processes(args.runs)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
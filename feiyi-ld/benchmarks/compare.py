@@ -0,0 +1,80 @@
+"""
+对比两次基准结果
+
+逐路由列出吞吐、延迟分位数与每请求SQL条数的前后值及变化百分比，
+任一路由的 p95 变慢超过 --threshold 时以非零状态退出，可用于CI中的回归检查。
+
+用法：
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from typing import Optional
+
+# (显示名, 取值路径, 数值越大越好)
+COLUMNS = [
+    ('rps', ('throughput_rps',), True),
+    ('p50', ('latency_ms', 'p50'), False),
+    ('p95', ('latency_ms', 'p95'), False),
+    ('p99', ('latency_ms', 'p99'), False),
+    ('sql', ('queries_per_request',), False),
+]
+
+
+def _value(route: dict, path) -> Optional[float]:
+    for key in path:
+        if not isinstance(route, dict):
+            return None
+        route = route.get(key)
+    return route
+
+
+def _change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before * 100
+
+
+def _cell(before, after) -> str:
+    if before is None and after is None:
+        return '-'
+    change = _change(before, after)
+    suffix = f" ({change:+.0f}%)" if change is not None else ''
+    return f"{before if before is not None else '-'} → {after if after is not None else '-'}{suffix}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='对比两次基准结果')
+    parser.add_argument('before', help='基线结果JSON')
+    parser.add_argument('after', help='新结果JSON')
+    parser.add_argument('--threshold', type=float, help='p95 变慢超过该百分比时以非零状态退出')
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+
+    print(f"基线 {before['meta'].get('revision')} / 新 {after['meta'].get('revision')}，"
+          f"并发 {after['meta'].get('concurrency')}，项目 {after['meta'].get('items')} 个")
+    print('\t'.join(['route'] + [name for name, _, _ in COLUMNS]))
+
+    regressions = []
+    for name in sorted(set(before['routes']) | set(after['routes'])):
+        old, new = before['routes'].get(name, {}), after['routes'].get(name, {})
+        cells = [_cell(_value(old, path), _value(new, path)) for _, path, _ in COLUMNS]
+        print('\t'.join([name] + cells))
+        change = _change(_value(old, ('latency_ms', 'p95')), _value(new, ('latency_ms', 'p95')))
+        if args.threshold is not None and change is not None and change > args.threshold:
+            regressions.append(f"{name} p95 {change:+.0f}%")
+
+    if regressions:
+        print('回归: ' + '，'.join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+合成数据生成
+
+按固定随机种子生成非遗项目、知识条目与用户交互记录，同一规模与种子每次生成的数据相同。
+项目与知识经由 importer 的批量写入器写入（同步刷新全文索引与项目详情文档），
+按名称/标题匹配，重复运行不会产生重复数据；交互记录只补足到目标条数。
+
+写入 DATABASE_URL 指向的数据库，请为基准单独指定，例如：
+    DATABASE_URL=sqlite:///bench-100k.db python -m benchmarks.datagen --scale 100k
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator
+
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+# 规模预设：项目数，知识条目与交互记录与项目数相同
+SCALES = {'1k': 1000, '100k': 100_000, '1m': 1_000_000}
+
+# 生成数据的时间跨度
+TIME_SPAN = timedelta(days=3 * 365)
+EPOCH = datetime(2023, 1, 1)
+
+REGIONS = ['江南', '苏州', '杭州', '扬州', '徽州', '泉州', '潮汕', '岭南', '巴蜀', '湘西', '黔东南', '滇西',
+           '关中', '晋北', '齐鲁', '燕赵', '中原', '荆楚', '闽北', '赣南', '陇东', '河西', '塞北', '辽东']
+MOTIFS = ['竹编', '刺绣', '剪纸', '木雕', '石刻', '漆器', '陶瓷', '皮影', '年画', '蜡染', '扎染', '银饰',
+          '古琴', '琵琶', '唢呐', '花鼓', '秧歌', '龙舟', '舞狮', '灯彩', '茶艺', '酿造', '织锦', '篆刻']
+FORMS = {1: '传说', 2: '音乐', 3: '舞', 4: '戏', 5: '说唱', 6: '技艺表演', 7: '艺术', 8: '制作技艺', 9: '疗法', 10: '习俗'}
+LEVELS = ['世界非物质文化遗产', '国家级', '国家级', '省级', '省级', '省级', '市级', '市级', None]
+TOPICS = ['历史渊源', '制作工艺', '传承谱系', '代表作品', '艺术特色', '保护现状', '社会功能', '地域流变']
+PHRASES = ['始于明清之际', '流传于民间数百年', '以师徒口传心授', '工序繁复而精细', '讲究选材与火候',
+           '兼具实用与审美价值', '融合了多民族文化元素', '在节庆与祭祀中演出', '纹样寓意吉祥',
+           '曾一度濒临失传', '近年来得到系统整理', '进入中小学课堂', '形成了多个流派', '以家族作坊传承',
+           '与当地方言紧密相关', '被列入保护名录', '吸引了大量年轻学徒', '依托文化生态保护区发展']
+QUESTIONS = ['{name}有什么特色？', '{name}是怎么传承的？', '介绍一下{name}的历史', '{name}和{other}有什么区别？',
+             '哪里可以看到{name}？', '{name}的代表性传承人是谁？', '{name}属于哪一类非遗？']
+
+# 基准驱动检索时使用的关键词
+SEARCH_KEYWORDS = MOTIFS[:12] + REGIONS[:6] + ['传承', '技艺']
+
+
+def _text(rng: random.Random, sentences: int) -> str:
+    return '，'.join(rng.choice(PHRASES) for _ in range(sentences)) + '。'
+
+
+def _timestamp(rng: random.Random) -> str:
+    return (EPOCH + timedelta(seconds=rng.randrange(int(TIME_SPAN.total_seconds())))).isoformat()
+
+
+def item_name(index: int) -> str:
+    """第 index 个项目的名称（从0开始），同一序号总是得到同一名称"""
+    region = REGIONS[index % len(REGIONS)]
+    motif = MOTIFS[(index // len(REGIONS)) % len(MOTIFS)]
+    category_id = index % 10 + 1
+    return f"{region}{motif}{FORMS[category_id]}·{index + 1}"
+
+
+def iter_items(count: int, seed: int) -> Iterator[Dict[str, Any]]:
+    """合成项目记录"""
+    rng = random.Random(seed)
+    for index in range(count):
+        name = item_name(index)
+        created_at = _timestamp(rng)
+        yield {
+            'name': name,
+            'category_id': index % 10 + 1,
+            'description': f"{name}{_text(rng, 2)}",
+            'origin_location': REGIONS[index % len(REGIONS)],
+            'historical_background': _text(rng, 6),
+            'cultural_value': _text(rng, 5),
+            'inheritance_status': _text(rng, 3),
+            'protection_measures': _text(rng, 3),
+            'protection_level': rng.choice(LEVELS),
+            'representative_inheritor': f"传承人{rng.randrange(1, 5000)}",
+            'declaration_date': str(rng.randrange(2006, 2024)),
+            'images': [f"item{index + 1}_{n}.jpg" for n in range(rng.randrange(0, 4))],
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+
+
+def iter_knowledge(count: int, items: int, seed: int) -> Iterator[Dict[str, Any]]:
+    """合成知识条目，按项目名称关联，约五分之一不关联项目"""
+    rng = random.Random(seed + 1)
+    for index in range(count):
+        item_index = rng.randrange(items)
+        name = item_name(item_index)
+        created_at = _timestamp(rng)
+        yield {
+            'title': f"{name}的{TOPICS[index % len(TOPICS)]}·{index + 1}",
+            'content': _text(rng, 12),
+            'category_id': item_index % 10 + 1,
+            'item_name': name if rng.random() >= 0.2 else None,
+            'keywords': ','.join([MOTIFS[(item_index // len(REGIONS)) % len(MOTIFS)],
+                                  REGIONS[item_index % len(REGIONS)], TOPICS[index % len(TOPICS)]]),
+            'source': rng.choice(['地方志', '非遗名录', '田野调查', '传承人口述']),
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+
+
+def iter_interactions(count: int, items: int, seed: int, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """合成交互记录，约每会话十轮"""
+    rng = random.Random(seed + 2)
+    sessions = max(1, count // 10)
+    for index in range(count):
+        name = item_name(rng.randrange(items))
+        question = rng.choice(QUESTIONS).format(name=name, other=item_name(rng.randrange(items)))
+        created_at = datetime.fromisoformat(_timestamp(rng))
+        if index < start:
+            continue
+        yield {
+            'session_id': f"bench-{rng.randrange(sessions)}",
+            'question': question,
+            'answer': f"{name}{_text(rng, 8)}",
+            'category_id': None,
+            'item_id': None,
+            'created_at': created_at
+        }
+
+
+def insert_interactions(engine, table, records: Iterator[Dict[str, Any]], batch_size: int = 5000) -> int:
+    """按批插入交互记录"""
+    inserted = 0
+    batch = []
+    with engine.begin() as connection:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                connection.execute(table.insert(), batch)
+                inserted += len(batch)
+                batch.clear()
+        if batch:
+            connection.execute(table.insert(), batch)
+            inserted += len(batch)
+    return inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成基准用的合成非遗数据')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k', help='数据规模（默认1k）')
+    parser.add_argument('--items', type=int, help='项目数（覆盖规模预设）')
+    parser.add_argument('--knowledge', type=int, help='知识条目数（默认与项目数相同）')
+    parser.add_argument('--interactions', type=int, help='交互记录数（默认与项目数相同）')
+    parser.add_argument('--seed', type=int, default=20240601, help='随机种子')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每次批量写入的行数（默认1000）')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    items = args.items or SCALES[args.scale]
+    knowledge = args.knowledge if args.knowledge is not None else items
+    interactions = args.interactions if args.interactions is not None else items
+
+    from models import (create_db_app, db, FeiyiItem, FeiyiKnowledge, UserInteraction, ensure_indexes,
+                        build_search_indexes, build_item_documents)
+    from importer import RowValidator, run_import, build_upserters
+
+    totals = {'scale': args.scale, 'seed': args.seed}
+    started = time.monotonic()
+    app = create_db_app()
+    upserters = build_upserters(*build_search_indexes(app), build_item_documents(app))
+    with app.app_context():
+        db.create_all()
+        ensure_indexes()
+        engine = db.engine
+
+        for target, model, records in (
+                ('items', FeiyiItem, iter_items(items, args.seed)),
+                ('knowledge', FeiyiKnowledge, iter_knowledge(knowledge, items, args.seed))):
+            upserter = upserters[target]
+            validator = RowValidator(model, upserter.key, references=upserter.references)
+            logger.info(f"写入 {target}")
+            result = run_import(engine, upserter, validator, records,
+                                batch_size=args.batch_size, commit_size=args.batch_size * 10)
+            totals[target] = {k: result[k] for k in ('inserted', 'updated', 'unchanged', 'rejected')}
+
+        table = UserInteraction.__table__
+        with engine.connect() as connection:
+            existing = connection.execute(select(func.count()).select_from(table)).scalar()
+        logger.info("写入 interactions")
+        totals['interactions'] = {'inserted': insert_interactions(
+            engine, table, iter_interactions(interactions, items, args.seed, start=existing))}
+
+    totals['seconds'] = round(time.monotonic() - started, 2)
+    print(json.dumps(totals, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
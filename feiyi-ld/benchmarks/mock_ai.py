@@ -0,0 +1,133 @@
+"""
+本地模拟的华为云AI聊天接口
+
+接受任意路径的 POST 请求，按OpenAI兼容格式返回回答：
+- 普通请求：等待 --latency（加 --jitter 内的随机抖动）后返回完整回答与token用量；
+- 流式请求（stream=true）：等待 --latency 后以SSE逐段返回，每段间隔 --chunk-delay；
+- --error-rate 比例的请求返回503，用于观察重试与熔断。
+
+回答内容由问题与固定文本拼成，长度由 --answer-chars 控制，相同问题得到相同回答。
+
+用法：
+    python -m benchmarks.mock_ai --port 18080 --latency 0.8 --chunk-delay 0.02
+    HUAWEI_AI_ENDPOINT=http://127.0.0.1:18080/v1/chat/completions HUAWEI_AI_API_KEY=bench ...
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+FILLER = '此项非遗源远流长，历代匠人口传心授，技艺精湛，寓意吉祥，至今仍在民间广泛流传。'
+
+
+class MockAIHandler(BaseHTTPRequestHandler):
+    """模拟聊天完成接口的请求处理"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        logger.debug(fmt, *args)
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'error': 'invalid json'})
+        self.server.count()
+
+        time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+        if config.error_rate and random.random() < config.error_rate:
+            return self._send_json(503, {'error': 'mock upstream unavailable'})
+
+        messages = payload.get('messages') or [{}]
+        question = str(messages[-1].get('content', ''))
+        answer = (question[:40] + '——' + FILLER * (config.answer_chars // len(FILLER) + 1))[:config.answer_chars]
+        model = payload.get('model') or 'mock'
+        usage = {'prompt_tokens': sum(len(str(m.get('content', ''))) for m in messages),
+                 'completion_tokens': len(answer)}
+
+        if not payload.get('stream'):
+            return self._send_json(200, {
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': answer},
+                             'finish_reason': 'stop'}],
+                'usage': usage
+            })
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        size = config.chunk_chars
+        for start in range(0, len(answer), size):
+            chunk = {'model': model, 'choices': [{'index': 0, 'delta': {'content': answer[start:start + size]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            if config.chunk_delay:
+                time.sleep(config.chunk_delay)
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+
+class MockAIServer(ThreadingHTTPServer):
+    """每个请求一个线程的模拟服务，记录收到的请求数"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockAIHandler)
+        self.config = config
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='本地模拟的华为云AI聊天接口')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址（默认127.0.0.1）')
+    parser.add_argument('--port', type=int, default=18080, help='监听端口（默认18080）')
+    parser.add_argument('--latency', type=float, default=0.5, help='返回回答或首段内容前的延迟秒数（默认0.5）')
+    parser.add_argument('--jitter', type=float, default=0.1, help='延迟的随机抖动范围秒数（默认0.1）')
+    parser.add_argument('--chunk-delay', type=float, default=0.02, help='流式输出每段之间的间隔秒数（默认0.02）')
+    parser.add_argument('--chunk-chars', type=int, default=8, help='流式输出每段的字数（默认8）')
+    parser.add_argument('--answer-chars', type=int, default=400, help='回答字数（默认400）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的请求比例（默认0）')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    server = MockAIServer((args.host, args.port), args)
+    logger.info(f"模拟AI接口已启动: http://{args.host}:{args.port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"共收到 {server.requests} 个请求")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+"""
+路由基准驱动
+
+对运行中的站点逐一压测 app.py 的全部路由（页面、列表与详情接口、检索、AI问答及其流式接口、统计接口），
+每个路由在指定并发下发送固定数量（或固定时长）的请求，输出JSON：
+- 延迟分位数 p50/p95/p99（毫秒），流式接口另有首段延迟；
+- 吞吐（请求/秒）与状态码分布；
+- 每请求SQL条数与耗时：压测前后各抓取一次 /metrics，由 feiyi_db_queries_per_request 的增量求均值。
+
+路由参数（项目ID、分类、检索词、页码）由固定种子的随机数生成，同一数据集与种子的两次运行请求序列相同，
+结果可用 python -m benchmarks.compare 对比。
+
+用法：
+    python -m benchmarks.run --url http://127.0.0.1:5000 --concurrency 16 --requests 500 --output before.json
+    python -m benchmarks.run --only api_item,item_page --duration 30
+"""
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.datagen import QUESTIONS, SEARCH_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+# 启动时采样的项目ID数
+SAMPLE_IDS = 1000
+
+_METRIC_RE = re.compile(r'^(feiyi_db_(?:queries|query_seconds)_per_request)_(sum|count)\{route="(.*)"\} (\S+)$')
+
+
+@dataclass
+class Target:
+    """被测站点的数据概况，用于生成路由参数"""
+    item_ids: List[int]
+    item_total: int
+    knowledge_total: int
+    category_ids: List[int] = field(default_factory=lambda: list(range(1, 11)))
+    item_names: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Scenario:
+    """一个被测路由"""
+    name: str
+    rule: str
+    method: str
+    build: Callable[[random.Random, Target, int], Tuple[str, Optional[dict]]]
+    stream: bool = False
+
+
+def _page(rng: random.Random, total: int, per_page: int) -> int:
+    return rng.randint(1, max(1, math.ceil(total / per_page)))
+
+
+def _question(rng: random.Random, target: Target, number: int, distinct: int) -> str:
+    names = target.item_names or ['昆曲']
+    if distinct:
+        number %= distinct
+        rng = random.Random(number)
+    question = rng.choice(QUESTIONS).format(name=rng.choice(names), other=rng.choice(names))
+    # 不限定问题数时每个问题各不相同，每次都调用上游
+    return question if distinct else f"{question}（{number}）"
+
+
+def build_scenarios(ai_distinct: int) -> List[Scenario]:
+    """app.py 全部路由的压测场景"""
+    def get(path):
+        return lambda rng, t, n: (path, None)
+
+    def ask(path):
+        # 每个请求使用独立会话，不受单会话并发上限影响
+        return lambda rng, t, n: (path, {'question': _question(rng, t, n, ai_distinct),
+                                         'session_id': f"bench-{os.getpid()}-{n}"})
+
+    return [
+        Scenario('index', '/', 'GET', get('/')),
+        Scenario('categories_page', '/categories', 'GET', get('/categories')),
+        Scenario('ai_chat_page', '/ai-chat', 'GET', get('/ai-chat')),
+        Scenario('category_page', '/category/<int:category_id>', 'GET',
+                 lambda rng, t, n: (f"/category/{rng.choice(t.category_ids)}", None)),
+        Scenario('item_page', '/item/<int:item_id>', 'GET',
+                 lambda rng, t, n: (f"/item/{rng.choice(t.item_ids)}", None)),
+        Scenario('api_categories', '/api/categories', 'GET', get('/api/categories')),
+        Scenario('api_categories_stats', '/api/categories', 'GET', get('/api/categories?stats=1')),
+        Scenario('api_category', '/api/category/<int:category_id>', 'GET',
+                 lambda rng, t, n: (f"/api/category/{rng.choice(t.category_ids)}?view=summary", None)),
+        Scenario('api_items_page', '/api/items', 'GET',
+                 lambda rng, t, n: (f"/api/items?view=summary&page={_page(rng, t.item_total, 12)}", None)),
+        Scenario('api_items_cursor', '/api/items', 'GET',
+                 lambda rng, t, n: ("/api/items?view=summary&after=&with_total=1", None)),
+        Scenario('api_items_category', '/api/items', 'GET',
+                 lambda rng, t, n: (f"/api/items?view=summary&category_id={rng.choice(t.category_ids)}", None)),
+        Scenario('api_items_keyword', '/api/items', 'GET',
+                 lambda rng, t, n: (f"/api/items?view=summary&keyword={rng.choice(SEARCH_KEYWORDS)}", None)),
+        Scenario('api_item', '/api/item/<int:item_id>', 'GET',
+                 lambda rng, t, n: (f"/api/item/{rng.choice(t.item_ids)}", None)),
+        Scenario('api_knowledge', '/api/knowledge', 'GET',
+                 lambda rng, t, n: (f"/api/knowledge?view=summary&page={_page(rng, t.knowledge_total, 10)}", None)),
+        Scenario('api_knowledge_keyword', '/api/knowledge', 'GET',
+                 lambda rng, t, n: (f"/api/knowledge?view=summary&keyword={rng.choice(SEARCH_KEYWORDS)}", None)),
+        Scenario('api_search', '/api/search', 'GET',
+                 lambda rng, t, n: (f"/api/search?view=summary&keyword={rng.choice(SEARCH_KEYWORDS)}", None)),
+        Scenario('ai_chat', '/api/ai/chat', 'POST', ask('/api/ai/chat')),
+        Scenario('ai_chat_stream', '/api/ai/chat/stream', 'POST', ask('/api/ai/chat/stream'), stream=True),
+        Scenario('api_cache_stats', '/api/cache/stats', 'GET', get('/api/cache/stats')),
+        Scenario('api_ai_cache_stats', '/api/ai/cache/stats', 'GET', get('/api/ai/cache/stats')),
+        Scenario('api_ai_admission_stats', '/api/ai/admission/stats', 'GET', get('/api/ai/admission/stats')),
+        Scenario('api_ai_interactions_stats', '/api/ai/interactions/stats', 'GET',
+                 get('/api/ai/interactions/stats')),
+        Scenario('metrics', '/metrics', 'GET', get('/metrics')),
+    ]
+
+
+def discover(base_url: str) -> Target:
+    """由列表接口获取项目与知识总数，并按游标采样项目ID与名称"""
+    session = requests.Session()
+    ids, names = [], []
+    item_total = 0
+    after = ''
+    while len(ids) < SAMPLE_IDS:
+        response = session.get(f"{base_url}/api/items", params={
+            'fields': 'id,name', 'after': after, 'per_page': 100, 'with_total': int(not ids)}, timeout=60)
+        response.raise_for_status()
+        data = response.json()
+        item_total = data.get('total', item_total)
+        ids += [item['id'] for item in data['items']]
+        names += [item['name'] for item in data['items']]
+        if not data['has_more']:
+            break
+        after = data['next_cursor']
+    if not ids:
+        raise SystemExit('站点中没有项目数据，请先运行 python -m benchmarks.datagen')
+    knowledge = session.get(f"{base_url}/api/knowledge", params={
+        'fields': 'id', 'after': '', 'per_page': 1, 'with_total': 1}, timeout=60).json()
+    return Target(ids, item_total, knowledge.get('total', 0), item_names=names)
+
+
+def scrape_queries(session: requests.Session, base_url: str) -> Dict[str, Dict[str, float]]:
+    """抓取 /metrics 中各路由每请求SQL条数与耗时直方图的 sum/count"""
+    totals: Dict[str, Dict[str, float]] = {}
+    try:
+        text = session.get(f"{base_url}/metrics", timeout=30).text
+    except requests.RequestException as e:
+        logger.warning(f"读取 /metrics 失败: {e}")
+        return totals
+    for line in text.splitlines():
+        match = _METRIC_RE.match(line)
+        if match:
+            name, kind, route, value = match.groups()
+            key = f"{'queries' if 'queries_per' in name else 'seconds'}_{kind}"
+            totals.setdefault(route, {})[key] = float(value)
+    return totals
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """最近秩百分位数"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(values)
+    summary = {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+    summary['mean'] = sum(values) / len(values) if values else None
+    summary['max'] = values[-1] if values else None
+    return {k: round(v * 1000, 2) if v is not None else None for k, v in summary.items()}
+
+
+def run_scenario(base_url: str, scenario: Scenario, target: Target, concurrency: int,
+                 requests_count: int, duration: float, warmup: int, seed: int,
+                 timeout: float) -> Dict[str, Any]:
+    """在指定并发下压测一个路由"""
+    counter = itertools.count()
+    latencies: List[float] = []
+    first_bytes: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    lock = threading.Lock()
+    deadline = None
+
+    def send(session: requests.Session, rng: random.Random, number: int):
+        path, body = scenario.build(rng, target, number)
+        started = time.perf_counter()
+        first = None
+        with session.request(scenario.method, base_url + path, json=body,
+                             stream=scenario.stream, timeout=timeout) as response:
+            if scenario.stream:
+                for line in response.iter_lines():
+                    if first is None and line:
+                        first = time.perf_counter() - started
+            else:
+                _ = response.content
+        return response.status_code, time.perf_counter() - started, first
+
+    def worker(index: int, measure: bool, limit: int):
+        session = requests.Session()
+        rng = random.Random(seed * 1000 + index)
+        while True:
+            number = next(counter)
+            if (limit and number >= limit) or (deadline is not None and time.monotonic() >= deadline):
+                return
+            try:
+                status, elapsed, first = send(session, rng, number)
+            except requests.RequestException as e:
+                if measure:
+                    with lock:
+                        errors[type(e).__name__] += 1
+                continue
+            if measure:
+                with lock:
+                    statuses[str(status)] += 1
+                    latencies.append(elapsed)
+                    if first is not None:
+                        first_bytes.append(first)
+
+    def run_threads(measure: bool, limit: int):
+        threads = [threading.Thread(target=worker, args=(i, measure, limit), daemon=True)
+                   for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    if warmup:
+        run_threads(False, warmup)
+    # 序号接着预热继续，AI问答不会重复预热时的问题
+    counter = itertools.count(warmup)
+    if duration:
+        deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    run_threads(True, 0 if duration else warmup + requests_count)
+    elapsed = time.perf_counter() - started
+
+    completed = len(latencies)
+    failed = sum(errors.values()) + sum(n for s, n in statuses.items() if int(s) >= 400)
+    result = {
+        'method': scenario.method,
+        'rule': scenario.rule,
+        'requests': completed,
+        'failed': failed,
+        'statuses': dict(sorted(statuses.items())),
+        'errors': dict(errors),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(completed / elapsed, 2) if elapsed > 0 else None,
+        'latency_ms': _latency_summary(latencies),
+    }
+    if scenario.stream:
+        result['first_delta_ms'] = _latency_summary(first_bytes)
+    return result
+
+
+def _query_delta(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]],
+                 rule: str) -> Dict[str, Optional[float]]:
+    a, b = after.get(rule, {}), before.get(rule, {})
+    count = a.get('queries_count', 0) - b.get('queries_count', 0)
+    if count <= 0:
+        return {'queries_per_request': None, 'query_ms_per_request': None}
+    return {
+        'queries_per_request': round((a.get('queries_sum', 0) - b.get('queries_sum', 0)) / count, 2),
+        'query_ms_per_request': round((a.get('seconds_sum', 0) - b.get('seconds_sum', 0)) / count * 1000, 3)
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='逐一压测站点全部路由并输出JSON结果')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='站点地址（默认 http://127.0.0.1:5000）')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发请求数（默认8）')
+    parser.add_argument('--requests', type=int, default=200, help='每个路由的请求数（默认200）')
+    parser.add_argument('--duration', type=float, help='每个路由的压测时长秒数（指定时忽略 --requests）')
+    parser.add_argument('--warmup', type=int, default=20, help='每个路由正式计时前的预热请求数（默认20）')
+    parser.add_argument('--only', help='只压测这些场景，逗号分隔')
+    parser.add_argument('--skip', help='跳过这些场景，逗号分隔')
+    parser.add_argument('--ai-distinct', type=int, default=0,
+                        help='AI问答使用的不同问题数（默认0，每个问题各不相同，不命中回答缓存）')
+    parser.add_argument('--metrics-settle', type=float, default=0.0,
+                        help='读取 /metrics 前的等待秒数，多进程部署时应大于 FEIYI_METRICS_FLUSH_INTERVAL')
+    parser.add_argument('--timeout', type=float, default=60, help='单个请求的超时秒数（默认60）')
+    parser.add_argument('--seed', type=int, default=1, help='路由参数的随机种子')
+    parser.add_argument('--output', help='结果JSON文件（默认输出到标准输出）')
+    parser.add_argument('--list', action='store_true', help='列出全部场景后退出')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    scenarios = build_scenarios(args.ai_distinct)
+    if args.list:
+        for scenario in scenarios:
+            print(f"{scenario.name:28} {scenario.method:5} {scenario.rule}")
+        return 0
+    if args.only:
+        names = set(args.only.split(','))
+        scenarios = [s for s in scenarios if s.name in names]
+    if args.skip:
+        names = set(args.skip.split(','))
+        scenarios = [s for s in scenarios if s.name not in names]
+
+    base_url = args.url.rstrip('/')
+    target = discover(base_url)
+    logger.info(f"项目 {target.item_total} 个，知识 {target.knowledge_total} 条，采样项目ID {len(target.item_ids)} 个")
+
+    session = requests.Session()
+    results = {}
+    for scenario in scenarios:
+        before = scrape_queries(session, base_url)
+        result = run_scenario(base_url, scenario, target, args.concurrency, args.requests, args.duration,
+                              args.warmup, args.seed, args.timeout)
+        if args.metrics_settle:
+            time.sleep(args.metrics_settle)
+        result.update(_query_delta(before, scrape_queries(session, base_url), scenario.rule))
+        results[scenario.name] = result
+        latency = result['latency_ms']
+        logger.info(f"{scenario.name}: {result['throughput_rps']} 请求/秒，p50 {latency['p50']}ms，"
+                    f"p99 {latency['p99']}ms，SQL {result['queries_per_request']} 条/请求，失败 {result['failed']}")
+
+    report = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(),
+            'url': base_url,
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'concurrency': args.concurrency,
+            'requests': None if args.duration else args.requests,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'ai_distinct': args.ai_distinct,
+            'items': target.item_total,
+            'knowledge': target.knowledge_total,
+        },
+        'routes': results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0 if not any(r['failed'] for r in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
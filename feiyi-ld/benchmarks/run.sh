@@ -0,0 +1,47 @@
+#!/bin/bash
+# 一键基准：生成（或复用）合成数据集，启动模拟AI接口与站点，压测全部路由后停止。
+#
+# 用法：benchmarks/run.sh [规模 1k|100k|1m] [结果文件] [传给 benchmarks.run 的其他参数...]
+#   benchmarks/run.sh 1k before.json
+#   BENCH_WORKERS=4 BENCH_AI_LATENCY=1.0 benchmarks/run.sh 100k after.json --concurrency 32
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+
+SCALE="${1:-1k}"
+OUTPUT="${2:-bench-${SCALE}-$(date +%Y%m%d-%H%M%S).json}"
+shift $(( $# > 2 ? 2 : $# ))
+
+PORT="${BENCH_PORT:-5055}"
+AI_PORT="${BENCH_AI_PORT:-18080}"
+BENCH_DIR="${BENCH_DIR:-instance/bench}"
+mkdir -p "$BENCH_DIR"
+
+export DATABASE_URL="sqlite:///$(pwd)/$BENCH_DIR/bench-${SCALE}.db"
+export HUAWEI_AI_ENDPOINT="http://127.0.0.1:${AI_PORT}/v1/chat/completions"
+export HUAWEI_AI_API_KEY="bench"
+export FEIYI_ANSWER_CACHE_PATH="$(pwd)/$BENCH_DIR/answer_cache-${SCALE}.db"
+export FEIYI_METRICS_DIR="$(pwd)/$BENCH_DIR/metrics-${SCALE}"
+export FEIYI_METRICS_FLUSH_INTERVAL=1
+
+if [ ! -f "$BENCH_DIR/bench-${SCALE}.db" ]; then
+    echo "生成 ${SCALE} 数据集..."
+    python -m benchmarks.datagen --scale "$SCALE"
+fi
+rm -rf "$FEIYI_METRICS_DIR" "$FEIYI_ANSWER_CACHE_PATH"
+
+python -m benchmarks.mock_ai --port "$AI_PORT" \
+    --latency "${BENCH_AI_LATENCY:-0.5}" --chunk-delay "${BENCH_AI_CHUNK_DELAY:-0.02}" &
+AI_PID=$!
+FEIYI_BIND="127.0.0.1:${PORT}" FEIYI_WORKERS="${BENCH_WORKERS:-2}" \
+    gunicorn -c gunicorn.conf.py >"$BENCH_DIR/server-${SCALE}.log" 2>&1 &
+SERVER_PID=$!
+trap 'kill $SERVER_PID $AI_PID 2>/dev/null || true' EXIT
+
+for _ in $(seq 1 60); do
+    curl -sf "http://127.0.0.1:${PORT}/api/categories" >/dev/null && break
+    sleep 1
+done
+
+python -m benchmarks.run --url "http://127.0.0.1:${PORT}" --metrics-settle 1.5 --output "$OUTPUT" "$@"
+echo "结果已写入 $OUTPUT"
@@ -0,0 +1,124 @@
+"""
+分类统计模块
+
+用一条分组查询同时统计各分类的项目数、知识条目数与保护级别分布，
+结果缓存在进程内：本进程的写入立即使缓存失效，其他进程的写入在有效期到期后生效。
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import has_app_context
+from sqlalchemy import event, func, literal, null, select, union_all
+
+logger = logging.getLogger(__name__)
+
+# 未填写保护级别的项目在分布中的名称
+UNSPECIFIED_LEVEL = '未定级'
+
+
+class CategoryStats:
+    """按分类聚合的项目与知识统计"""
+
+    def __init__(self, app, db, item_model, knowledge_model, ttl: float = None):
+        """
+        初始化分类统计
+
+        Args:
+            app: Flask应用（在无应用上下文的线程中使用）
+            db: Flask-SQLAlchemy实例
+            item_model: 非遗项目模型
+            knowledge_model: 知识库模型
+            ttl: 缓存有效期（秒），用于感知其他进程的写入
+        """
+        self.app = app
+        self.db = db
+        self.item_model = item_model
+        self.knowledge_model = knowledge_model
+        self.ttl = ttl or float(os.getenv('FEIYI_CATEGORY_STATS_TTL', 60))
+
+        self._stats: Optional[Dict[int, Dict[str, Any]]] = None
+        self._computed_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        # 本进程内的写入立即使缓存失效
+        for model in (item_model, knowledge_model):
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, name, self._on_change)
+
+    def _on_change(self, mapper, connection, target):
+        self.invalidate()
+
+    def invalidate(self):
+        """丢弃缓存的统计，下次读取时重新计算"""
+        self._generation += 1
+        self._stats = None
+
+    def _query(self):
+        """项目按 (分类, 保护级别) 分组、知识按分类分组，合并为一条语句"""
+        item, knowledge = self.item_model, self.knowledge_model
+        items = select(
+            literal('item').label('kind'), item.category_id.label('category_id'),
+            item.protection_level.label('level'), func.count().label('total')
+        ).group_by(item.category_id, item.protection_level)
+        knowledge_rows = select(
+            literal('knowledge').label('kind'), knowledge.category_id.label('category_id'),
+            null().label('level'), func.count().label('total')
+        ).where(knowledge.category_id.isnot(None)).group_by(knowledge.category_id)
+        return union_all(items, knowledge_rows)
+
+    def _compute(self) -> Dict[int, Dict[str, Any]]:
+        started = time.perf_counter()
+        stats: Dict[int, Dict[str, Any]] = {}
+        for kind, category_id, level, total in self.db.session.execute(self._query()):
+            entry = stats.setdefault(category_id, {
+                'item_count': 0, 'knowledge_count': 0, 'protection_levels': {}
+            })
+            if kind == 'item':
+                entry['item_count'] += total
+                level = level or UNSPECIFIED_LEVEL
+                entry['protection_levels'][level] = entry['protection_levels'].get(level, 0) + total
+            else:
+                entry['knowledge_count'] += total
+        logger.info(f"分类统计已更新，耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+        return stats
+
+    def all(self) -> Dict[int, Dict[str, Any]]:
+        """
+        返回全部分类的统计
+
+        Returns:
+            {分类ID: {'item_count', 'knowledge_count', 'protection_levels'}}
+        """
+        stats = self._stats
+        if stats is not None and time.monotonic() - self._computed_at < self.ttl:
+            return stats
+
+        if not has_app_context():
+            with self.app.app_context():
+                return self.all()
+
+        with self._lock:
+            stats = self._stats
+            if stats is None or time.monotonic() - self._computed_at >= self.ttl:
+                generation = self._generation
+                computed_at = time.monotonic()
+                stats = self._compute()
+                # 计算期间发生写入时不缓存本次结果
+                if generation == self._generation:
+                    self._stats, self._computed_at = stats, computed_at
+            return stats
+
+    def get(self, category_id: int) -> Dict[str, Any]:
+        """返回单个分类的统计，没有数据的分类返回零值"""
+        entry = self.all().get(category_id)
+        if entry is None:
+            return {'item_count': 0, 'knowledge_count': 0, 'protection_levels': {}}
+        return {
+            'item_count': entry['item_count'],
+            'knowledge_count': entry['knowledge_count'],
+            'protection_levels': dict(entry['protection_levels'])
+        }
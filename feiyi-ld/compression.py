@@ -0,0 +1,124 @@
+"""
+响应压缩模块
+
+按请求的 Accept-Encoding 为较大的JSON、HTML与文本响应协商 brotli 或 gzip 压缩，无需反向代理：
+- 小于阈值、非200、已编码（如预压缩的静态资源）、流式（SSE）或文件响应不压缩；
+- 带 ETag 的响应（http_cache 缓存的接口与页面）按 (ETag, 编码) 记住压缩结果，
+  缓存命中时不再重复压缩；
+- 可压缩类型的响应都带 Vary: Accept-Encoding，共享缓存按编码分别存放。
+
+配置（环境变量）：
+- FEIYI_COMPRESS_ENABLED：设为 0 关闭压缩
+- FEIYI_COMPRESS_MIN_SIZE：压缩的最小响应字节数（1024）
+- FEIYI_COMPRESS_GZIP_LEVEL：gzip 压缩级别（6）
+- FEIYI_COMPRESS_BROTLI_QUALITY：brotli 压缩质量（5），需安装 Brotli，否则只提供 gzip
+- FEIYI_COMPRESS_CACHE_ENTRIES：记住的压缩结果数（256）
+"""
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json', 'text/html', 'text/plain', 'text/css', 'text/javascript', 'application/javascript',
+])
+
+
+class ResponseCompressor:
+    """按 Accept-Encoding 协商的响应压缩"""
+
+    def __init__(self, app=None, min_size: int = None, gzip_level: int = None, brotli_quality: int = None,
+                 cache_entries: int = None, enabled: bool = None):
+        """
+        初始化响应压缩
+
+        Args:
+            app: Flask应用，提供时立即注册
+            min_size: 压缩的最小响应字节数
+            gzip_level: gzip 压缩级别（1-9）
+            brotli_quality: brotli 压缩质量（0-11）
+            cache_entries: 按 (ETag, 编码) 记住的压缩结果数，0 为不记住
+            enabled: 为False时不压缩
+        """
+        self.min_size = min_size if min_size is not None else int(os.getenv('FEIYI_COMPRESS_MIN_SIZE', 1024))
+        self.gzip_level = gzip_level or int(os.getenv('FEIYI_COMPRESS_GZIP_LEVEL', 6))
+        self.brotli_quality = brotli_quality if brotli_quality is not None else int(
+            os.getenv('FEIYI_COMPRESS_BROTLI_QUALITY', 5))
+        self.cache_entries = cache_entries if cache_entries is not None else int(
+            os.getenv('FEIYI_COMPRESS_CACHE_ENTRIES', 256))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_COMPRESS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+        self._cache: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        """按编码压缩"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _compress_cached(self, data: bytes, encoding: str, etag) -> bytes:
+        if etag is None or not self.cache_entries:
+            return self.compress(data, encoding)
+        key = (etag, encoding)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+        body = self.compress(data, encoding)
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return body
+
+    def process(self, response):
+        """压缩符合条件的响应"""
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or response.cache_control.no_transform):
+            return response
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        etag, weak = response.get_etag()
+        body = self._compress_cached(data, encoding, etag and f"{etag}|{request.full_path}")
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag and not weak:
+            # 强校验值对应确定的字节，压缩后改为弱校验值
+            response.set_etag(etag, weak=True)
+        metrics.inc('feiyi_http_compression_bytes_total', (encoding, 'in'), len(data))
+        metrics.inc('feiyi_http_compression_bytes_total', (encoding, 'out'), len(body))
+        return response
+
+    def init_app(self, app):
+        """
+        注册响应压缩
+
+        Args:
+            app: Flask应用
+        """
+        if self.enabled:
+            app.after_request(self.process)
@@ -0,0 +1,229 @@
+"""
+多轮对话记忆模块
+
+按会话ID维护对话状态，供AI问答在提示词中携带上文：
+- 最近几轮问答原样保留，总量受token预算限制；
+- 超出预算的较早轮次压缩为每轮一行的滚动摘要（问题与回答首句），摘要同样受预算限制，
+  最旧的摘要行最先丢弃，因此提示词长度始终有上限；
+- 会话状态缓存在进程内（按最久未使用淘汰），未命中时由 UserInteraction 中该会话最近的记录重建；
+  命中时先查询该会话在缓存之后新写入的记录数，多于本进程追加的轮次（即其他工作进程也处理过该会话）时重建。
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from flask import has_app_context
+from sqlalchemy import func
+
+from retrieval import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# 注入摘要时的提示
+SUMMARY_PROMPT = """以下是与该用户此前对话的摘要，回答时请结合上文理解指代与省略：
+{summary}"""
+
+# 回答首句的切分位置
+_SENTENCE_END_RE = re.compile('[。！？!?\n]')
+
+
+def _clip(text: str, limit: int) -> str:
+    text = (text or '').strip()
+    return text if len(text) <= limit else text[:limit] + '…'
+
+
+@dataclass
+class Turn:
+    """一轮问答"""
+    question: str
+    answer: str
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.question) + estimate_tokens(self.answer)
+
+    def summarize(self) -> str:
+        """压缩为一行摘要：问题与回答首句"""
+        first_sentence = _SENTENCE_END_RE.split((self.answer or '').strip(), 1)[0]
+        return f"问：{_clip(self.question, 60)} 答：{_clip(first_sentence, 80)}"
+
+
+@dataclass
+class Conversation:
+    """单个会话的对话状态"""
+    turns: List[Turn] = field(default_factory=list)
+    summary: List[str] = field(default_factory=list)
+    touched_at: float = field(default_factory=time.monotonic)
+    # 已计入的最新交互记录ID，及其后本进程追加的轮次数（记录由后台线程稍后写入）
+    last_id: int = 0
+    pending: int = 0
+
+    def messages(self) -> list:
+        """转换为插入在当前问题之前的消息列表"""
+        messages = []
+        if self.summary:
+            messages.append({'role': 'system', 'content': SUMMARY_PROMPT.format(summary='\n'.join(self.summary))})
+        for turn in self.turns:
+            messages.append({'role': 'user', 'content': turn.question})
+            messages.append({'role': 'assistant', 'content': turn.answer})
+        return messages
+
+
+class ConversationStore:
+    """带进程内缓存的会话记忆"""
+
+    def __init__(self, app, db, model,
+                 window_tokens: int = None,
+                 summary_tokens: int = None,
+                 history_limit: int = None,
+                 max_sessions: int = None,
+                 ttl: float = None,
+                 enabled: bool = None):
+        """
+        初始化会话记忆
+
+        Args:
+            app: Flask应用（在无应用上下文的线程中加载历史时使用）
+            db: Flask-SQLAlchemy实例
+            model: 交互记录模型
+            window_tokens: 原样保留的最近轮次的token预算
+            summary_tokens: 滚动摘要的token预算
+            history_limit: 重建会话时最多读取的历史记录条数
+            max_sessions: 进程内最多缓存的会话数
+            ttl: 会话闲置多久后从缓存中移除（秒）
+            enabled: 为False时每次问答都不携带上文
+        """
+        self.app = app
+        self.db = db
+        self.model = model
+        self.window_tokens = window_tokens or int(os.getenv('FEIYI_CONVERSATION_WINDOW_TOKENS', 1200))
+        self.summary_tokens = summary_tokens or int(os.getenv('FEIYI_CONVERSATION_SUMMARY_TOKENS', 300))
+        self.history_limit = history_limit or int(os.getenv('FEIYI_CONVERSATION_HISTORY_LIMIT', 20))
+        self.max_sessions = max_sessions or int(os.getenv('FEIYI_CONVERSATION_MAX_SESSIONS', 2000))
+        self.ttl = ttl or float(os.getenv('FEIYI_CONVERSATION_TTL', 600))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_CONVERSATION_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+        self._sessions: 'OrderedDict[str, Conversation]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'loads': 0, 'stale': 0, 'compacted': 0}
+
+    def _compact(self, conversation: Conversation):
+        """将超出窗口预算的较早轮次移入摘要，并按预算丢弃最旧的摘要行"""
+        while len(conversation.turns) > 1 and sum(t.tokens for t in conversation.turns) > self.window_tokens:
+            conversation.summary.append(conversation.turns.pop(0).summarize())
+            self._stats['compacted'] += 1
+        while conversation.summary and sum(estimate_tokens(line) for line in conversation.summary) > self.summary_tokens:
+            conversation.summary.pop(0)
+        if conversation.turns and conversation.turns[0].tokens > self.window_tokens:
+            # 仅剩的一轮仍超出预算时截断其回答
+            turn = conversation.turns[0]
+            conversation.turns[0] = Turn(turn.question, _clip(turn.answer, self.window_tokens))
+
+    def _in_context(self, func, *args):
+        if has_app_context():
+            return func(*args)
+        with self.app.app_context():
+            return func(*args)
+
+    def _load(self, session_id: str) -> Conversation:
+        """由该会话最近的交互记录重建对话状态"""
+        conversation = Conversation()
+        rows = (self.model.query
+                .with_entities(self.model.id, self.model.question, self.model.answer)
+                .filter(self.model.session_id == session_id)
+                .order_by(self.model.created_at.desc(), self.model.id.desc())
+                .limit(self.history_limit)
+                .all())
+        if rows:
+            conversation.last_id = max(row_id for row_id, _, _ in rows)
+        for _, question, answer in reversed(rows):
+            conversation.turns.append(Turn(question, answer or ''))
+            self._compact(conversation)
+        return conversation
+
+    def _newer(self, session_id: str, last_id: int):
+        """该会话在 last_id 之后写入的记录数与最大ID"""
+        return (self.db.session.query(func.count(self.model.id), func.max(self.model.id))
+                .filter(self.model.session_id == session_id, self.model.id > last_id)
+                .one())
+
+    def _get(self, session_id: str) -> Conversation:
+        """取缓存中的会话，未命中、已过期或其他进程写入过该会话时从数据库重建"""
+        now = time.monotonic()
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is not None and now - conversation.touched_at >= self.ttl:
+                conversation = None
+
+        if conversation is not None:
+            count, max_id = self._in_context(self._newer, session_id, conversation.last_id)
+            with self._lock:
+                if count <= conversation.pending:
+                    if count == conversation.pending and max_id is not None:
+                        # 本进程追加的轮次均已写入
+                        conversation.last_id = max_id
+                        conversation.pending = 0
+                    self._sessions.move_to_end(session_id)
+                    conversation.touched_at = now
+                    self._stats['hits'] += 1
+                    return conversation
+                self._stats['stale'] += 1
+
+        conversation = self._in_context(self._load, session_id)
+
+        with self._lock:
+            self._stats['loads'] += 1
+            self._sessions[session_id] = conversation
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return conversation
+
+    def history(self, session_id: str) -> list:
+        """
+        获取会话上文
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            插入在系统提示与当前问题之间的消息列表；无会话ID或无历史时为空列表
+        """
+        if not self.enabled or not session_id:
+            return []
+        conversation = self._get(session_id)
+        with self._lock:
+            return conversation.messages()
+
+    def append(self, session_id: str, question: str, answer: str):
+        """
+        记录一轮问答，须在交互记录写入数据库之前调用，以免重建时重复计入
+
+        Args:
+            session_id: 会话ID
+            question: 用户问题
+            answer: AI回答
+        """
+        if not self.enabled or not session_id:
+            return
+        try:
+            conversation = self._get(session_id)
+        except Exception as e:
+            logger.error(f"会话历史加载失败: {e}")
+            return
+        with self._lock:
+            conversation.turns.append(Turn(question, answer or ''))
+            conversation.pending += 1
+            self._compact(conversation)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存的会话数与命中、重建、因其他进程写入而重建、压缩计数"""
+        with self._lock:
+            return dict(self._stats, sessions=len(self._sessions))
@@ -0,0 +1,112 @@
+"""
+数据库连接配置模块
+
+通过环境变量选择数据库与连接参数，app.py 无需修改即可在SQLite与PostgreSQL之间切换：
+- SQLite：每个连接设置WAL日志、synchronous=NORMAL、内存映射与页缓存，
+  读操作不再被写操作（如问答记录写入）阻塞；
+- PostgreSQL等服务端数据库：配置连接池大小、溢出连接数与取用前探活。
+"""
+import logging
+import os
+import sqlite3
+from typing import Any, Dict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_URL = 'sqlite:///feiyi.db'
+
+# 每个SQLite连接上执行的PRAGMA（环境变量名, 默认值）
+SQLITE_PRAGMAS = {
+    'journal_mode': ('FEIYI_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': ('FEIYI_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': ('FEIYI_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    # 负数表示以KiB为单位，即64MB
+    'cache_size': ('FEIYI_SQLITE_CACHE_SIZE', str(-64 * 1024)),
+    'temp_store': ('FEIYI_SQLITE_TEMP_STORE', 'MEMORY'),
+    'busy_timeout': ('FEIYI_SQLITE_BUSY_TIMEOUT', '5000'),
+}
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() not in ('0', 'false', 'no')
+
+
+def database_url() -> str:
+    """读取 DATABASE_URL，兼容 postgres:// 写法"""
+    url = os.getenv('DATABASE_URL', DEFAULT_DATABASE_URL)
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def sqlite_pragmas() -> Dict[str, str]:
+    """当前生效的SQLite PRAGMA，取值为空的项不设置"""
+    pragmas = {}
+    for name, (env, default) in SQLITE_PRAGMAS.items():
+        value = os.getenv(env, default).strip()
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """按数据库类型生成 SQLALCHEMY_ENGINE_OPTIONS"""
+    if make_url(url).get_backend_name() == 'sqlite':
+        # 连接级的锁等待由 busy_timeout 控制
+        return {}
+    return {
+        'pool_size': int(os.getenv('FEIYI_DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('FEIYI_DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.getenv('FEIYI_DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('FEIYI_DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _env_flag('FEIYI_DB_POOL_PRE_PING', '1'),
+    }
+
+
+def configure_database(app):
+    """
+    将数据库配置写入Flask应用，须在创建 SQLAlchemy 实例之前调用
+
+    Args:
+        app: Flask应用
+    """
+    url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+    logger.info(f"数据库: {make_url(url).render_as_string(hide_password=True)}")
+
+
+def owned_by(app) -> bool:
+    """
+    当前应用上下文是否属于 app
+
+    模型事件对进程内全部应用的组件都会触发（如测试中先后创建的多个应用），
+    在事件中写入数据的组件据此只处理所属应用的写入。
+    """
+    return has_app_context() and current_app._get_current_object() is app
+
+
+def include_in_migrations(obj, name, type_, reflected, compare_to) -> bool:
+    """迁移时忽略由 search_index 在运行时维护的FTS5虚表及其影子表"""
+    if type_ == 'table' and name and (name.endswith('_fts') or '_fts_' in name):
+        return False
+    return True
+
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """为每个SQLite连接设置PRAGMA"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    except sqlite3.DatabaseError as e:
+        logger.warning(f"SQLite PRAGMA设置失败: {e}")
+    finally:
+        cursor.close()
@@ -22,6 +22,10 @@ pip install gunicorn
 echo "🗄️ 初始化数据库..."
 python init_data.py
 
+# 构建页面样式与脚本
+echo "🎨 构建静态资源..."
+python assets.py build
+
 echo ""
 echo "✅ 部署完成！"
 echo "🚀 启动命令: ./start.sh"
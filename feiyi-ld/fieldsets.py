@@ -0,0 +1,89 @@
+"""
+字段投影模块
+
+列表接口通过 fields=（逗号分隔的字段名）或 view=（预定义视图名）选择返回的字段，
+查询时只加载所选列（其余列延迟加载且不会被访问），序列化时只输出所选字段。
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import load_only
+
+
+class InvalidFields(ValueError):
+    """请求了不存在的字段或视图"""
+
+
+class FieldSet:
+    """模型的可选字段与命名视图"""
+
+    def __init__(self, model, views: Dict[str, Sequence[str]], default_view: str = 'detail'):
+        """
+        初始化字段集合
+
+        Args:
+            model: 模型类
+            views: 视图名到字段列表的映射；'detail' 视图默认为全部列
+            default_view: 未指定字段与视图时使用的视图
+        """
+        self.model = model
+        self.columns = [column.key for column in model.__table__.columns]
+        self.views = {'detail': list(self.columns)}
+        for name, fields in views.items():
+            self.views[name] = self._validate(fields)
+        self.default_view = default_view
+
+    def _validate(self, fields: Iterable[str]) -> List[str]:
+        """校验字段名并保证包含主键，保持请求中的顺序"""
+        fields = [f for f in dict.fromkeys(fields) if f]
+        unknown = [f for f in fields if f not in self.columns]
+        if unknown:
+            raise InvalidFields(f"未知字段: {', '.join(unknown)}")
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        return fields
+
+    def parse(self, fields: Optional[str] = None, view: Optional[str] = None) -> List[str]:
+        """
+        解析请求参数中的字段选择
+
+        Args:
+            fields: 逗号分隔的字段名，优先于视图
+            view: 视图名
+
+        Returns:
+            字段名列表
+
+        Raises:
+            InvalidFields: 字段或视图不存在
+        """
+        if fields:
+            return self._validate(f.strip() for f in fields.split(','))
+        view = view or self.default_view
+        if view not in self.views:
+            raise InvalidFields(f"未知视图: {view}，可选: {', '.join(self.views)}")
+        return self.views[view]
+
+    def from_request(self, args, default_view: Optional[str] = None) -> List[str]:
+        """从请求参数（fields / view）解析字段选择"""
+        return self.parse(args.get('fields'), args.get('view') or default_view)
+
+    def options(self, fields: Sequence[str], extra: Sequence[str] = ()):
+        """
+        只加载所需列的查询选项
+
+        Args:
+            fields: 需要输出的字段
+            extra: 额外需要加载但不输出的字段（如分页与摘要所需的列）
+        """
+        names = dict.fromkeys(list(fields) + list(extra))
+        return load_only(*[getattr(self.model, name) for name in names])
+
+    @staticmethod
+    def serialize(obj, fields: Sequence[str]) -> dict:
+        """按字段列表序列化对象，日期时间转为ISO格式"""
+        data = {}
+        for name in fields:
+            value = getattr(obj, name)
+            data[name] = value.isoformat() if isinstance(value, datetime) else value
+        return data
@@ -0,0 +1,40 @@
+"""
+gunicorn 配置
+
+    gunicorn -c gunicorn.conf.py
+
+默认 preload：主进程导入 asgi.py，创建应用并预热一次（startup.load_app），再 fork 出工作进程。
+库与应用代码、编译好的模板、关键词自动机、分类统计及预热填充的响应缓存由各工作进程写时复制共享，
+新启动或重启的工作进程无需重新导入与预热即可直接服务；修改代码后需重启主进程（而非 HUP）才会生效。
+
+配置（环境变量）：
+- FEIYI_BIND：监听地址（0.0.0.0:5000）
+- FEIYI_WORKERS：工作进程数（2）
+- FEIYI_PRELOAD：设为 0 时每个工作进程各自导入与预热
+"""
+import gc
+import os
+import time
+
+wsgi_app = 'asgi:application'
+worker_class = 'uvicorn.workers.UvicornWorker'
+bind = os.getenv('FEIYI_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('FEIYI_WORKERS', 2))
+preload_app = os.getenv('FEIYI_PRELOAD', '1').lower() not in ('0', 'false', 'no')
+
+_started = time.perf_counter()
+
+
+def when_ready(server):
+    server.log.info(f"主进程就绪，用时 {time.perf_counter() - _started:.3f}s（preload={preload_app}）")
+    if preload_app:
+        # 已加载的对象移入永久代，工作进程的垃圾回收不再改写其所在的内存页
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # preload 时主进程已导入 asgi.py
+        import asgi
+        from startup import after_fork
+        after_fork(asgi.app)
@@ -0,0 +1,177 @@
+"""
+HTTP缓存模块
+
+为只读接口与页面提供条件请求与响应缓存：
+- 每个响应的 ETag / Last-Modified 由其所依赖数据的行数与最大 updated_at 计算；
+- 客户端携带的校验值未变化时直接返回 304，不再序列化或渲染模板；
+- 校验值与响应体缓存在进程内，本进程写入模型后立即清空，其他进程的写入在有效期到期后生效；
+- 各路由单独设置 Cache-Control。
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import make_response, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# 页面默认每次都向服务器确认，数据未变时得到304
+DEFAULT_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+def _release_token(root: str) -> str:
+    """由代码与模板文件的修改时间及静态资源清单生成版本标识，部署新版本或重新构建资源后ETag随之变化"""
+    digest = hashlib.sha1()
+    for directory in (root, os.path.join(root, 'templates')):
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(('.py', '.html')):
+                digest.update(f"{name}:{os.path.getmtime(os.path.join(directory, name))}".encode())
+    try:
+        with open(os.path.join(root, 'static', 'dist', 'manifest.json'), 'rb') as f:
+            digest.update(f.read())
+    except OSError:
+        pass
+    return digest.hexdigest()[:8]
+
+
+class ResponseCache:
+    """基于数据版本的条件请求与进程内响应缓存"""
+
+    def __init__(self, app, models, ttl: float = None, max_entries: int = None, enabled: bool = None):
+        """
+        初始化响应缓存
+
+        Args:
+            app: Flask应用
+            models: 写入时需清空缓存的模型
+            ttl: 校验值与响应体的缓存有效期（秒），决定其他进程的写入多久后可见
+            max_entries: 最多缓存的响应数，超出按最久未使用淘汰
+            enabled: 为False时每次都计算校验值且不缓存响应体（仍支持304）
+        """
+        self.app = app
+        self.ttl = ttl or float(os.getenv('FEIYI_RESPONSE_CACHE_TTL', 30))
+        self.max_entries = max_entries or int(os.getenv('FEIYI_RESPONSE_CACHE_MAX_ENTRIES', 512))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_RESPONSE_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+        self.release = _release_token(app.root_path)
+
+        self._entries: 'OrderedDict[str, dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+        for model in models:
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, name, self._on_change)
+
+    def _on_change(self, mapper, connection, target):
+        self.clear()
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry['checked_at'] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _validate(self, key: str, validator: Callable, view_args: dict) -> dict:
+        """取缓存的校验值，过期或缺失时查询数据版本重新计算"""
+        entry = self._get(key) if self.enabled else None
+        if entry is not None:
+            return entry
+
+        last_modified, version = validator(**view_args)
+        if isinstance(last_modified, str):
+            last_modified = datetime.fromisoformat(last_modified)
+        if last_modified is not None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        etag = hashlib.sha1(f"{self.release}|{key}|{version}".encode('utf-8')).hexdigest()[:20]
+        entry = {'etag': etag, 'last_modified': last_modified, 'checked_at': time.monotonic(), 'body': None}
+        if self.enabled:
+            self._put(key, entry)
+        return entry
+
+    @staticmethod
+    def _not_modified(entry: dict) -> bool:
+        """判断客户端缓存是否仍然有效（If-None-Match 优先于 If-Modified-Since）"""
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(entry['etag'])
+        since = request.if_modified_since
+        return since is not None and entry['last_modified'] is not None and entry['last_modified'] <= since
+
+    def cached(self, validator: Callable[..., Tuple[Optional[datetime], str]],
+               cache_control: str = DEFAULT_CACHE_CONTROL):
+        """
+        为GET路由启用条件请求与响应缓存
+
+        Args:
+            validator: 接收路由参数，返回 (最后修改时间, 数据版本字符串)
+            cache_control: 该路由的 Cache-Control 取值
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                if request.method != 'GET':
+                    return view(**view_args)
+
+                key = request.full_path
+                entry = self._validate(key, validator, view_args)
+
+                if self._not_modified(entry):
+                    self._incr('not_modified')
+                    response = make_response('', 304)
+                elif entry['body'] is not None:
+                    self._incr('hits')
+                    response = make_response(entry['body'], 200, {'Content-Type': entry['content_type']})
+                else:
+                    self._incr('misses')
+                    response = make_response(view(**view_args))
+                    if response.status_code != 200:
+                        return response
+                    if self.enabled and not response.is_streamed:
+                        entry['body'] = response.get_data()
+                        entry['content_type'] = response.content_type
+
+                response.set_etag(entry['etag'], weak=True)
+                if entry['last_modified'] is not None:
+                    response.last_modified = entry['last_modified']
+                response.headers['Cache-Control'] = cache_control
+                return response
+            return wrapper
+        return decorator
+
+    def _incr(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        """返回缓存条目数与命中统计"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), enabled=self.enabled)
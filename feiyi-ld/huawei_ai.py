@@ -2,162 +2,588 @@
 华为云AI接口集成模块
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
-from typing import Dict, Any, Optional
+import random
+import threading
+import time
+from typing import Callable, Dict, Any, Iterator, Optional
 import logging
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+from answer_cache import AnswerCache
+from keyword_router import AhoCorasick, normalize_text
+from metrics import metrics
+from single_flight import SingleFlight
+from admission import AdmissionController, AdmissionRejected, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
 logger = logging.getLogger(__name__)
 
+# 非遗专业的系统提示
+FEIYI_SYSTEM_PROMPT = """你是一位博学的中华非物质文化遗产文化助手，深谙传统文化之精髓。
+
+请以古雅而不失亲切的语调回答问题，遵循以下原则：
+1. 提供准确、专业的非遗知识，引经据典
+2. 语言典雅，体现传统文化底蕴
+3. 适当运用古典文学表达，但保持现代人易懂
+4. 体现对传统文化的敬重和传承精神
+5. 如遇不确定信息，坦诚相告
+6. 激发用户对非遗文化的兴趣和传承意识
+
+你的回答应如春风化雨，既有学者之严谨，又有师者之温度。"""
+
+# 注入本站知识库资料时的提示
+FEIYI_CONTEXT_PROMPT = """以下是本站非遗知识库中与问题相关的资料，请优先依据这些资料作答，资料未涉及的内容可结合你的知识补充：
+{context}"""
+
+def build_introduction_prompt(category: str, item_name: str = "") -> str:
+    """构建非遗分类或项目介绍的提示词"""
+    if item_name:
+        return f"请详细介绍非物质文化遗产项目：{item_name}（属于{category}类别）。包括其历史渊源、特色特点、传承现状等方面。"
+    return f"请详细介绍非物质文化遗产的{category}类别，包括其定义、主要特征、代表性项目等。"
+
+# 流式响应结束标记
+STREAM_DONE = object()
+
+def parse_stream_line(line: str):
+    """
+    解析上游SSE响应中的一行
+    
+    Returns:
+        内容增量；非数据行返回None，结束行返回STREAM_DONE
+    """
+    if not line or not line.startswith('data:'):
+        return None
+    data = line[5:].strip()
+    if data == '[DONE]':
+        return STREAM_DONE
+    chunk = json.loads(data)
+    return (chunk.get('choices') or [{}])[0].get('delta', {}).get('content')
+
+# 可重试的上游状态码（限流与网关类错误）
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，拒绝调用上游"""
+
+class CircuitBreaker:
+    """
+    熔断器
+    
+    连续失败达到阈值后打开，在恢复等待期内直接拒绝请求；
+    等待期结束后放行一个探测请求（半开），成功则关闭，失败则重新打开。
+    """
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        初始化熔断器
+        
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            recovery_timeout: 熔断后的恢复等待时间（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        """是否处于熔断期（不改变状态）"""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            return self._probing or time.monotonic() - self._opened_at < self.recovery_timeout
+    
+    def allow_request(self) -> bool:
+        """判断是否放行本次请求，恢复期结束后仅放行一个探测请求"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._probing and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._probing = True
+                return True
+            return False
+    
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("华为云AI熔断器已关闭")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+    
+    def record_failure(self):
+        """记录一次失败调用"""
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    logger.warning(f"华为云AI熔断器已打开，{self.recovery_timeout}秒内直接回退")
+                self._opened_at = time.monotonic()
+                self._probing = False
+
 class HuaweiAIClient:
     """华为云AI客户端"""
     
-    def __init__(self, api_key: str = None, endpoint: str = None):
+    def __init__(self, api_key: str = None, endpoint: str = None,
+                 pool_size: int = None,
+                 connect_timeout: float = None,
+                 read_timeout: float = None,
+                 max_retries: int = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 answer_cache: Optional[AnswerCache] = None,
+                 single_flight: SingleFlight = None,
+                 admission: AdmissionController = None,
+                 knowledge_retriever=None,
+                 conversation_store=None,
+                 keyword_router=None):
         """
         初始化华为云AI客户端
         
         Args:
             api_key: API密钥
             endpoint: API端点
+            pool_size: 连接池大小
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 读取响应超时（秒）
+            max_retries: 瞬时错误的最大重试次数
+            circuit_breaker: 共享的熔断器（默认新建）
+            answer_cache: 回答缓存（默认不缓存）
+            single_flight: 共享的请求合并器（默认基于answer_cache新建，不缓存时不合并）
+            admission: 共享的上游并发准入控制（默认新建）
+            knowledge_retriever: 本地知识检索器（可选），需提供 retrieve(question) 方法，
+                返回带 passages、direct_answer 与 context() 的结果
+            conversation_store: 多轮对话记忆（可选），需提供 history(session_id) 方法，
+                返回插入在当前问题之前的消息列表
+            keyword_router: 本地回退的关键词路由（可选），需提供 answer(question) 方法，未命中时返回None
         """
         # 使用您提供的API配置
         self.api_key = api_key or os.getenv('HUAWEI_AI_API_KEY') 
         self.endpoint = endpoint or os.getenv('HUAWEI_AI_ENDPOINT') 
         self.model = "deepseek-v3.2-exp"  # 使用您指定的模型
         
+        # 传输配置
+        self.pool_size = pool_size or int(os.getenv('HUAWEI_AI_POOL_SIZE', 10))
+        self.timeout = (
+            connect_timeout or float(os.getenv('HUAWEI_AI_CONNECT_TIMEOUT', 5)),
+            read_timeout or float(os.getenv('HUAWEI_AI_READ_TIMEOUT', 30))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('HUAWEI_AI_MAX_RETRIES', 2))
+        self.backoff_base = float(os.getenv('HUAWEI_AI_BACKOFF_BASE', 0.5))
+        self.backoff_max = float(os.getenv('HUAWEI_AI_BACKOFF_MAX', 8))
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=int(os.getenv('HUAWEI_AI_BREAKER_THRESHOLD', 5)),
+            recovery_timeout=float(os.getenv('HUAWEI_AI_BREAKER_RECOVERY', 30))
+        )
+        
+        self.answer_cache = answer_cache
+        if single_flight is None and answer_cache is not None:
+            single_flight = SingleFlight(answer_cache)
+        self.single_flight = single_flight
+        self.admission = admission or AdmissionController()
+        self.knowledge_retriever = knowledge_retriever
+        self.conversation_store = conversation_store
+        self.keyword_router = keyword_router
+        self._create_transport()
+        
         if not self.api_key or not self.endpoint:
             logger.warning("华为云AI配置不完整，请检查环境变量")
         else:
             logger.info("华为云AI配置已加载")
     
+    @property
+    def configured(self) -> bool:
+        """API密钥与端点是否均已配置"""
+        return bool(self.api_key and self.endpoint)
+    
+    def _create_transport(self):
+        """创建复用长连接的会话，避免每次请求重新握手"""
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.verify = False
+    
+    def _request_headers(self, stream: bool = False) -> Dict[str, str]:
+        """构建上游请求头"""
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
+        if stream:
+            headers['Accept'] = 'text/event-stream'
+        return headers
+    
+    def _request_payload(self, messages: list, model: str = None, stream: bool = False,
+                         max_tokens: int = None, temperature: float = None) -> Dict[str, Any]:
+        """构建上游请求体，max_tokens 与 temperature 为None时使用上游默认值"""
+        # 使用您提供的API格式
+        payload = {
+            'model': model or self.model,
+            'messages': messages,
+            'chat_template_kwargs': {
+                'thinking': True
+            }
+        }
+        if max_tokens is not None:
+            payload['max_tokens'] = max_tokens
+        if temperature is not None:
+            payload['temperature'] = temperature
+        if stream:
+            payload['stream'] = True
+        return payload
+    
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        """计算第attempt次重试前的等待时间（指数退避+全抖动，优先遵循Retry-After）"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _post(self, payload: Dict[str, Any], headers: Dict[str, str], stream: bool = False) -> requests.Response:
+        """
+        经由连接池向上游发送请求
+        
+        连接失败、连接超时及429/502/503/504响应按抖动指数退避重试；
+        读取超时不重试，以免成倍拉长等待。最终结果计入熔断器。
+        
+        Raises:
+            CircuitOpenError: 熔断器打开时
+            requests.exceptions.RequestException: 重试耗尽后的最后一个错误
+        """
+        if not self.circuit_breaker.allow_request():
+            metrics.inc('feiyi_ai_circuit_open_total')
+            raise CircuitOpenError()
+        
+        data = json.dumps(payload)
+        mode = 'stream' if stream else 'chat'
+        for attempt in range(self.max_retries + 1):
+            response = None
+            status = 'error'
+            started = time.perf_counter()
+            try:
+                response = self.session.post(
+                    self.endpoint,
+                    headers=headers,
+                    data=data,
+                    timeout=self.timeout,
+                    stream=stream
+                )
+                status = str(response.status_code)
+                logger.info(f"API响应状态码: {response.status_code}")
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                    response.close()
+                else:
+                    response.raise_for_status()
+                    self.circuit_breaker.record_success()
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout) as e:
+                status = type(e).__name__
+                if attempt >= self.max_retries:
+                    self.circuit_breaker.record_failure()
+                    raise
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code in RETRYABLE_STATUS_CODES or e.response.status_code >= 500:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+                raise
+            except requests.exceptions.RequestException as e:
+                status = type(e).__name__
+                self.circuit_breaker.record_failure()
+                raise
+            finally:
+                metrics.record_ai_request(mode, status, time.perf_counter() - started)
+            
+            delay = self._backoff_delay(attempt, response)
+            logger.warning(f"华为云AI接口第{attempt + 1}次调用失败，{delay:.2f}秒后重试")
+            time.sleep(delay)
+    
     def chat_completion(self, 
                        messages: list, 
                        model: str = None,
-                       max_tokens: int = 1000,
-                       temperature: float = 0.7) -> Dict[str, Any]:
+                       max_tokens: int = None,
+                       temperature: float = None,
+                       session_id: str = None,
+                       priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
         """
         调用华为云AI聊天完成接口
         
         Args:
             messages: 消息列表
             model: 模型名称
-            max_tokens: 最大token数
-            temperature: 温度参数
+            max_tokens: 最大生成token数，None时使用上游默认值
+            temperature: 温度参数，None时使用上游默认值
+            session_id: 会话ID（用于准入控制的公平调度）
+            priority: 准入优先级，后台任务为 PRIORITY_BACKGROUND
             
         Returns:
             API响应结果
+            
+        Raises:
+            AdmissionRejected: 并发已满且排队未获准入时
         """
-        if not self.api_key or not self.endpoint:
+        if not self.configured:
             return {
                 'error': 'AI服务配置不完整',
                 'content': '抱歉，AI服务暂时不可用，请联系管理员配置华为云AI接口。'
             }
         
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {self.api_key}'
-        }
+        payload = self._request_payload(messages, model, max_tokens=max_tokens, temperature=temperature)
         
-        # 使用您提供的API格式
-        payload = {
-            'model': model or self.model,
-            'messages': messages,
-            'chat_template_kwargs': {
-                'thinking': True
-            }
-        }
+        # 超出并发上限时排队，未获准入时抛出 AdmissionRejected
+        with self.admission.slot(session_id, priority):
+            try:
+                logger.info(f"调用华为云AI接口: {self.endpoint}")
+                response = self._post(payload, self._request_headers())
+                result = response.json()
+            
+                logger.info("华为云AI接口调用成功")
+                metrics.record_ai_usage(result.get('model', model or self.model), result.get('usage'))
+                return {
+                    'success': True,
+                    'content': result.get('choices', [{}])[0].get('message', {}).get('content', ''),
+                    'usage': result.get('usage', {}),
+                    'model': result.get('model', model or self.model)
+                }
+            
+            except CircuitOpenError:
+                logger.warning("华为云AI熔断中，跳过上游调用")
+                return {
+                    'error': 'circuit_open',
+                    'content': '抱歉，AI服务暂时繁忙，请稍后重试。'
+                }
+            except requests.exceptions.Timeout:
+                logger.error("华为云AI接口调用超时")
+                return {
+                    'error': 'timeout',
+                    'content': '抱歉，AI服务响应超时，请稍后重试。'
+                }
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"华为云AI接口HTTP错误: {e}")
+                return {
+                    'error': 'http_error',
+                    'content': f'AI服务暂时不可用，HTTP错误: {e.response.status_code}'
+                }
+            except requests.exceptions.RequestException as e:
+                logger.error(f"华为云AI接口请求错误: {e}")
+                return {
+                    'error': 'request_error',
+                    'content': '网络连接错误，请检查网络设置。'
+                }
+            except json.JSONDecodeError as e:
+                logger.error(f"华为云AI接口响应解析错误: {e}")
+                return {
+                    'error': 'json_error',
+                    'content': 'AI服务响应格式错误。'
+                }
+            except Exception as e:
+                logger.error(f"华为云AI接口未知错误: {e}")
+                return {
+                    'error': 'unknown_error',
+                    'content': f'AI服务发生未知错误: {str(e)}'
+                }
+    
+    def stream_chat_completion(self,
+                               messages: list,
+                               model: str = None,
+                               on_complete: Callable[[str], None] = None,
+                               session_id: str = None,
+                               max_tokens: int = None,
+                               temperature: float = None) -> Iterator[str]:
+        """
+        以流式方式调用华为云AI聊天完成接口
         
-        try:
-            logger.info(f"调用华为云AI接口: {self.endpoint}")
-            response = requests.post(
-                self.endpoint,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=30,
-                verify=False  # 添加verify=False参数
-            )
+        请求上游时携带 stream: true，逐条解析SSE数据行并产出内容增量。
+        出错时产出一条与 chat_completion 一致的提示文本后结束。
+        
+        Args:
+            messages: 消息列表
+            model: 模型名称
+            on_complete: 流正常结束时以完整回答调用的回调
+            session_id: 会话ID（用于准入控制的公平调度）
+            max_tokens: 最大生成token数，None时使用上游默认值
+            temperature: 温度参数，None时使用上游默认值
             
-            logger.info(f"API响应状态码: {response.status_code}")
-            response.raise_for_status()
-            result = response.json()
+        Yields:
+            回答内容增量
             
-            logger.info("华为云AI接口调用成功")
-            return {
-                'success': True,
-                'content': result.get('choices', [{}])[0].get('message', {}).get('content', ''),
-                'usage': result.get('usage', {}),
-                'model': result.get('model', model or self.model)
-            }
+        Raises:
+            AdmissionRejected: 并发已满且排队未获准入时（在产出任何内容之前）
+        """
+        if not self.configured:
+            yield '抱歉，AI服务暂时不可用，请联系管理员配置华为云AI接口。'
+            return
+        
+        payload = self._request_payload(messages, model, stream=True, max_tokens=max_tokens,
+                                        temperature=temperature)
+        
+        with self.admission.slot(session_id):
+            try:
+                logger.info(f"流式调用华为云AI接口: {self.endpoint}")
+                parts = []
+                started = time.perf_counter()
+                with self._post(payload, self._request_headers(stream=True), stream=True) as response:
+                    for line in response.iter_lines(decode_unicode=True):
+                        delta = parse_stream_line(line)
+                        if delta is STREAM_DONE:
+                            break
+                        if delta:
+                            if not parts:
+                                metrics.observe('feiyi_ai_stream_first_delta_seconds', (), time.perf_counter() - started)
+                            parts.append(delta)
+                            yield delta
+                logger.info("华为云AI流式接口调用完成")
+                if on_complete:
+                    on_complete(''.join(parts))
             
-        except requests.exceptions.Timeout:
-            logger.error("华为云AI接口调用超时")
-            return {
-                'error': 'timeout',
-                'content': '抱歉，AI服务响应超时，请稍后重试。'
-            }
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"华为云AI接口HTTP错误: {e}")
-            return {
-                'error': 'http_error',
-                'content': f'AI服务暂时不可用，HTTP错误: {e.response.status_code}'
-            }
-        except requests.exceptions.RequestException as e:
-            logger.error(f"华为云AI接口请求错误: {e}")
-            return {
-                'error': 'request_error',
-                'content': '网络连接错误，请检查网络设置。'
-            }
-        except json.JSONDecodeError as e:
-            logger.error(f"华为云AI接口响应解析错误: {e}")
-            return {
-                'error': 'json_error',
-                'content': 'AI服务响应格式错误。'
-            }
+            except CircuitOpenError:
+                logger.warning("华为云AI熔断中，跳过上游调用")
+                yield '抱歉，AI服务暂时繁忙，请稍后重试。'
+            except requests.exceptions.Timeout:
+                logger.error("华为云AI流式接口调用超时")
+                yield '抱歉，AI服务响应超时，请稍后重试。'
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"华为云AI流式接口HTTP错误: {e}")
+                yield f'AI服务暂时不可用，HTTP错误: {e.response.status_code}'
+            except requests.exceptions.RequestException as e:
+                logger.error(f"华为云AI流式接口请求错误: {e}")
+                yield '网络连接错误，请检查网络设置。'
+            except json.JSONDecodeError as e:
+                logger.error(f"华为云AI流式接口响应解析错误: {e}")
+                yield 'AI服务响应格式错误。'
+    
+    def cached_answer(self, question: str) -> Optional[str]:
+        """查询问题在当前模型与系统提示下的缓存回答"""
+        if self.answer_cache is None:
+            return None
+        return self.answer_cache.get(question, self.model, FEIYI_SYSTEM_PROMPT)
+    
+    def cache_answer(self, question: str, answer: str):
+        """缓存一次成功的回答"""
+        if self.answer_cache is not None:
+            self.answer_cache.set(question, self.model, FEIYI_SYSTEM_PROMPT, answer)
+    
+    def retrieve(self, question: str):
+        """检索本地知识，未注册检索器或检索失败时返回None"""
+        if self.knowledge_retriever is None:
+            return None
+        try:
+            return self.knowledge_retriever.retrieve(question)
         except Exception as e:
-            logger.error(f"华为云AI接口未知错误: {e}")
-            return {
-                'error': 'unknown_error',
-                'content': f'AI服务发生未知错误: {str(e)}'
-            }
+            logger.error(f"本地知识检索失败: {e}")
+            return None
+    
+    def history(self, session_id: str) -> list:
+        """获取会话上文消息，未注册对话记忆或加载失败时返回空列表"""
+        if self.conversation_store is None or not session_id:
+            return []
+        try:
+            return self.conversation_store.history(session_id)
+        except Exception as e:
+            logger.error(f"会话历史加载失败: {e}")
+            return []
+    
+    def local_answer(self, question: str) -> str:
+        """上游不可用时的本地回退回答"""
+        return get_local_knowledge_response(question, self.keyword_router)
+    
+    def build_feiyi_messages(self, question: str, context: str = None, history: list = None) -> list:
+        """
+        构建非遗问答的消息列表
+        
+        Args:
+            question: 用户问题
+            context: 本地知识库检索到的参考资料（可选）
+            history: 会话上文消息（可选）
+            
+        Returns:
+            包含系统提示、会话上文与用户问题的消息列表
+        """
+        messages = [{"role": "system", "content": FEIYI_SYSTEM_PROMPT}]
+        if context:
+            messages.append({"role": "system", "content": FEIYI_CONTEXT_PROMPT.format(context=context)})
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": question})
+        return messages
     
-    def ask_about_feiyi(self, question: str, session_id: str = None) -> str:
+    def ask_about_feiyi(self, question: str, session_id: str = None,
+                        priority: int = PRIORITY_INTERACTIVE) -> str:
         """
         询问非遗相关问题
         
         Args:
             question: 用户问题
             session_id: 会话ID（可选）
+            priority: 上游调用的准入优先级
             
         Returns:
             AI回答
+            
+        Raises:
+            AdmissionRejected: 上游并发已满且排队未获准入时
         """
-        # 构建非遗专业的系统提示
-        system_prompt = """你是一位博学的中华非物质文化遗产文化助手，深谙传统文化之精髓。
-
-请以古雅而不失亲切的语调回答问题，遵循以下原则：
-1. 提供准确、专业的非遗知识，引经据典
-2. 语言典雅，体现传统文化底蕴
-3. 适当运用古典文学表达，但保持现代人易懂
-4. 体现对传统文化的敬重和传承精神
-5. 如遇不确定信息，坦诚相告
-6. 激发用户对非遗文化的兴趣和传承意识
-
-你的回答应如春风化雨，既有学者之严谨，又有师者之温度。"""
+        # 有上文的追问依赖语境，不读写按问题共享的回答缓存
+        history = self.history(session_id)
+        if not history:
+            cached = self.cached_answer(question)
+            if cached is not None:
+                return cached
+        
+        # 知识库高置信度命中时直接作答，否则仅注入相关段落
+        retrieval = self.retrieve(question)
+        if retrieval is not None and retrieval.direct_answer:
+            return retrieval.direct_answer
         
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": question}
-        ]
+        messages = self.build_feiyi_messages(question, retrieval.context() if retrieval else None, history)
         
-        result = self.chat_completion(messages)
+        # 相同问题同时只调用一次上游，成功的回答写入缓存
+        if history or self.single_flight is None:
+            result = self.chat_completion(messages, session_id=session_id, priority=priority)
+        else:
+            result = self.single_flight.run(
+                question, self.model, FEIYI_SYSTEM_PROMPT,
+                lambda: self.chat_completion(messages, session_id=session_id, priority=priority))
         
         if result.get('success'):
             return result['content']
         else:
             return result.get('content', '抱歉，在下暂时无法为您解答，请稍候再试。')
     
+    def ask_about_feiyi_stream(self, question: str, session_id: str = None) -> Iterator[str]:
+        """
+        以流式方式询问非遗相关问题
+        
+        Args:
+            question: 用户问题
+            session_id: 会话ID（可选）
+            
+        Yields:
+            AI回答内容增量
+        """
+        history = self.history(session_id)
+        if not history:
+            cached = self.cached_answer(question)
+            if cached is not None:
+                return iter([cached])
+        
+        retrieval = self.retrieve(question)
+        if retrieval is not None and retrieval.direct_answer:
+            return iter([retrieval.direct_answer])
+        
+        messages = self.build_feiyi_messages(question, retrieval.context() if retrieval else None, history)
+        if history or self.single_flight is None:
+            return self.stream_chat_completion(messages, session_id=session_id)
+        return self.single_flight.stream(
+            question, self.model, FEIYI_SYSTEM_PROMPT,
+            lambda on_complete: self.stream_chat_completion(messages, on_complete=on_complete, session_id=session_id)
+        )
+    
     def generate_feiyi_introduction(self, category: str, item_name: str = "") -> str:
         """
         生成非遗项目介绍
@@ -169,97 +595,113 @@ class HuaweiAIClient:
         Returns:
             生成的介绍文本
         """
-        if item_name:
-            prompt = f"请详细介绍非物质文化遗产项目：{item_name}（属于{category}类别）。包括其历史渊源、特色特点、传承现状等方面。"
-        else:
-            prompt = f"请详细介绍非物质文化遗产的{category}类别，包括其定义、主要特征、代表性项目等。"
-        
-        return self.ask_about_feiyi(prompt)
-
-# 创建全局客户端实例
-huawei_ai_client = HuaweiAIClient()
+        # 后台任务，让位于交互问答
+        return self.ask_about_feiyi(build_introduction_prompt(category, item_name), priority=PRIORITY_BACKGROUND)
 
-def get_ai_response(question: str, session_id: str = None) -> str:
+def get_ai_response(client: HuaweiAIClient, question: str, session_id: str = None) -> str:
     """
     获取AI回答的便捷函数
     
     Args:
+        client: AI客户端
         question: 用户问题
         session_id: 会话ID
         
     Returns:
         AI回答
+        
+    Raises:
+        AdmissionRejected: 上游并发已满且排队未获准入时，由接口返回429
     """
+    # 上游熔断期间优先使用缓存，其次本地知识库，不占用工作进程
+    if client.circuit_breaker.is_open:
+        return client.cached_answer(question) or client.local_answer(question)
+    
     try:
-        return huawei_ai_client.ask_about_feiyi(question, session_id)
+        return client.ask_about_feiyi(question, session_id)
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"AI响应失败: {e}")
         # 如果华为云AI不可用，使用本地知识库回退
-        return get_local_knowledge_response(question)
+        return client.local_answer(question)
 
-def get_local_knowledge_response(question):
+def get_ai_response_stream(client: HuaweiAIClient, question: str, session_id: str = None) -> Iterator[str]:
     """
-    基于本地知识库的简单问答回退机制
+    以流式方式获取AI回答的便捷函数
+    
+    Args:
+        client: AI客户端
+        question: 用户问题
+        session_id: 会话ID
+        
+    Yields:
+        AI回答内容增量
+        
+    Raises:
+        AdmissionRejected: 上游并发已满且排队未获准入时（在产出任何内容之前）
     """
-    question_lower = question.lower()
+    if client.circuit_breaker.is_open:
+        yield client.cached_answer(question) or client.local_answer(question)
+        return
     
-    # 非遗类别相关问答
-    if any(keyword in question_lower for keyword in ['昆曲', 'kunqu']):
-        return """昆曲是中国最古老的戏曲剧种之一，被誉为"百戏之祖"。它起源于明代，以其精美的唱腔、优雅的表演和深厚的文学底蕴而闻名。昆曲的表演特点包括：
+    started = False
+    try:
+        for delta in client.ask_about_feiyi_stream(question, session_id):
+            started = True
+            yield delta
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"AI流式响应失败: {e}")
+        # 尚未输出任何内容时回退到本地知识库
+        if not started:
+            yield client.local_answer(question)
+
+# 本地回退的内置主题：(关键词列表, 回答)，按优先级排列
+LOCAL_TOPIC_RESPONSES = [
+    (['昆曲', 'kunqu'], """昆曲是中国最古老的戏曲剧种之一，被誉为"百戏之祖"。它起源于明代，以其精美的唱腔、优雅的表演和深厚的文学底蕴而闻名。昆曲的表演特点包括：
 1. 唱腔优美，注重字正腔圆
 2. 表演细腻，身段优雅
 3. 文学性强，多取材于古典名著
 4. 音乐伴奏以笛子为主
-昆曲于2001年被联合国教科文组织列为"人类口述和非物质遗产代表作"。"""
-    
-    elif any(keyword in question_lower for keyword in ['京剧', 'peking opera', '国粹']):
-        return """京剧是中国的国粹艺术，形成于19世纪中期，具有以下特点：
+昆曲于2001年被联合国教科文组织列为"人类口述和非物质遗产代表作"。"""),
+    (['京剧', 'peking opera', '国粹'], """京剧是中国的国粹艺术，形成于19世纪中期，具有以下特点：
 1. 行当分明：生、旦、净、丑四大行当
 2. 唱念做打：综合性表演艺术
 3. 脸谱艺术：不同颜色代表不同性格
 4. 服装华美：传统戏曲服饰精美
 5. 音乐伴奏：以京胡为主要乐器
-京剧融合了音乐、舞蹈、文学、美术等多种艺术形式，是中华文化的重要载体。"""
-    
-    elif any(keyword in question_lower for keyword in ['针灸', 'acupuncture', '中医']):
-        return """中医针灸是中国传统医学的重要组成部分，有着数千年的历史：
+京剧融合了音乐、舞蹈、文学、美术等多种艺术形式，是中华文化的重要载体。"""),
+    (['针灸', 'acupuncture', '中医'], """中医针灸是中国传统医学的重要组成部分，有着数千年的历史：
 1. 历史悠久：起源可追溯到石器时代
 2. 理论基础：基于经络学说和阴阳五行理论
 3. 治疗方法：通过针刺和艾灸调节人体气血
 4. 适应症广：可治疗多种疾病
 5. 安全有效：副作用小，疗效显著
-针灸于2010年被联合国教科文组织列入人类非物质文化遗产代表作名录。"""
-    
-    elif any(keyword in question_lower for keyword in ['太极', 'taichi', '太极拳']):
-        return """太极拳是中国传统武术的代表，具有深厚的文化价值：
+针灸于2010年被联合国教科文组织列入人类非物质文化遗产代表作名录。"""),
+    (['太极', 'taichi', '太极拳'], """太极拳是中国传统武术的代表，具有深厚的文化价值：
 1. 哲学内涵：体现了中国古代的阴阳哲学
 2. 健身功效：强身健体，延年益寿
 3. 文化传承：承载着中华武术文化
 4. 国际影响：在世界各地广泛传播
 5. 精神修养：注重内外兼修，身心并重
-太极拳不仅是一种武术，更是一种生活哲学和文化符号。"""
-    
-    elif any(keyword in question_lower for keyword in ['蜀锦', 'shu brocade']):
-        return """蜀锦是中国四大名锦之一，产于四川成都，有着悠久的历史：
+太极拳不仅是一种武术，更是一种生活哲学和文化符号。"""),
+    (['蜀锦', 'shu brocade'], """蜀锦是中国四大名锦之一，产于四川成都，有着悠久的历史：
 1. 历史传承：始于春秋战国时期
 2. 工艺精湛：采用传统手工织造技术
 3. 图案精美：多以花鸟、山水为题材
 4. 色彩丰富：使用天然染料，色泽持久
 5. 文化价值：体现了古代丝绸文化的精髓
-蜀锦制作技艺于2006年被列入国家级非物质文化遗产名录。"""
-    
-    elif any(keyword in question_lower for keyword in ['二十四节气', '节气', 'solar terms']):
-        return """二十四节气是中国古代农业文明的智慧结晶：
+蜀锦制作技艺于2006年被列入国家级非物质文化遗产名录。"""),
+    (['二十四节气', '节气', 'solar terms'], """二十四节气是中国古代农业文明的智慧结晶：
 1. 科学价值：准确反映季节变化和气候规律
 2. 农业指导：指导农事活动的重要依据
 3. 文化内涵：承载着丰富的民俗文化
 4. 生活智慧：影响着人们的日常生活
 5. 国际认可：2016年被列入联合国教科文组织人类非物质文化遗产代表作名录
-二十四节气体现了中华民族对自然规律的深刻认识。"""
-    
-    # 通用非遗问答
-    elif any(keyword in question_lower for keyword in ['非遗', '非物质文化遗产', 'intangible heritage']):
-        return """非物质文化遗产是指各种以非物质形态存在的与群众生活密切相关、世代相承的传统文化表现形式。包括：
+二十四节气体现了中华民族对自然规律的深刻认识。"""),
+    (['非遗', '非物质文化遗产', 'intangible heritage'], """非物质文化遗产是指各种以非物质形态存在的与群众生活密切相关、世代相承的传统文化表现形式。包括：
 1. 民间文学：神话、传说、民间故事等
 2. 传统音乐：民歌、器乐等
 3. 传统舞蹈：民族舞蹈、宗教舞蹈等
@@ -270,10 +712,36 @@ def get_local_knowledge_response(question):
 8. 传统技艺：手工艺制作技艺
 9. 传统医药：中医药等
 10. 民俗：节庆、礼仪等
-保护非遗对于传承中华文化具有重要意义。"""
+保护非遗对于传承中华文化具有重要意义。"""),
+]
+
+# 内置主题关键词的自动机，载荷为主题序号
+_local_topic_automaton = AhoCorasick(
+    (normalize_text(keyword), index)
+    for index, (keywords, _) in enumerate(LOCAL_TOPIC_RESPONSES)
+    for keyword in keywords
+)
+
+def get_local_knowledge_response(question, keyword_router=None):
+    """
+    基于本地知识库的问答回退机制
+    
+    先由数据库关键词自动机（keyword_router，可选）匹配知识条目作答，再匹配内置主题，
+    均未命中时返回通用引导。每一级都只对问题扫描一遍。
+    """
+    if keyword_router is not None:
+        try:
+            answer = keyword_router.answer(question)
+            if answer:
+                return answer
+        except Exception as e:
+            logger.error(f"关键词路由失败: {e}")
+    
+    hits = _local_topic_automaton.match(normalize_text(question))
+    if hits:
+        return LOCAL_TOPIC_RESPONSES[min(index for _, index in hits)][1]
     
-    else:
-        return f"""感谢您对非物质文化遗产的关注！您的问题"{question}"很有意思。
+    return f"""感谢您对非物质文化遗产的关注！您的问题"{question}"很有意思。
 
 我是"非遗之光"网站的AI助手，专门为您介绍中国丰富的非物质文化遗产。虽然目前AI服务配置尚未完善，但我可以为您提供以下帮助：
 
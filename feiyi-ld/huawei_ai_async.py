@@ -0,0 +1,367 @@
+"""
+华为云AI异步客户端模块
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, Any, AsyncIterator, Optional
+
+import httpx
+
+from admission import AdmissionRejected, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from huawei_ai import (
+    FEIYI_SYSTEM_PROMPT, HuaweiAIClient, CircuitOpenError, RETRYABLE_STATUS_CODES, STREAM_DONE,
+    build_introduction_prompt, parse_stream_line
+)
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class AsyncHuaweiAIClient(HuaweiAIClient):
+    """
+    华为云AI异步客户端
+
+    与 HuaweiAIClient 共享配置、重试与熔断策略，
+    传输层改为 httpx.AsyncClient，公开方法均为协程。
+    """
+
+    def _create_transport(self):
+        """异步连接池在首次使用时按事件循环创建"""
+        self._client = None
+        self._client_loop = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取绑定当前事件循环的连接池客户端"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=self.pool_size),
+                verify=False
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def cached_answer_async(self, question: str) -> Optional[str]:
+        """cached_answer 的协程版本，SQLite查询在线程中执行，不阻塞事件循环"""
+        if self.answer_cache is None:
+            return None
+        return await asyncio.to_thread(self.cached_answer, question)
+
+    async def aclose(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+
+    async def _send(self, payload: Dict[str, Any], headers: Dict[str, str], stream: bool = False) -> httpx.Response:
+        """
+        经由连接池向上游发送请求，重试与熔断规则同 HuaweiAIClient._post
+
+        stream为True时返回尚未读取响应体的响应，调用方负责关闭。
+
+        Raises:
+            CircuitOpenError: 熔断器打开时
+            httpx.HTTPError: 重试耗尽后的最后一个错误
+        """
+        if not self.circuit_breaker.allow_request():
+            metrics.inc('feiyi_ai_circuit_open_total')
+            raise CircuitOpenError()
+
+        client = self._get_client()
+        data = json.dumps(payload)
+        mode = 'stream' if stream else 'chat'
+        for attempt in range(self.max_retries + 1):
+            response = None
+            status = 'error'
+            started = time.perf_counter()
+            try:
+                request = client.build_request('POST', self.endpoint, headers=headers, content=data)
+                response = await client.send(request, stream=stream)
+                status = str(response.status_code)
+                logger.info(f"API响应状态码: {response.status_code}")
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                    await response.aclose()
+                else:
+                    response.raise_for_status()
+                    self.circuit_breaker.record_success()
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                status = type(e).__name__
+                if attempt >= self.max_retries:
+                    self.circuit_breaker.record_failure()
+                    raise
+            except httpx.HTTPStatusError as e:
+                await e.response.aclose()
+                if e.response.status_code >= 500 or e.response.status_code in RETRYABLE_STATUS_CODES:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+                raise
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+                self.circuit_breaker.record_failure()
+                raise
+            finally:
+                metrics.record_ai_request(mode, status, time.perf_counter() - started)
+
+            delay = self._backoff_delay(attempt, response)
+            logger.warning(f"华为云AI接口第{attempt + 1}次调用失败，{delay:.2f}秒后重试")
+            await asyncio.sleep(delay)
+
+    async def chat_completion(self,
+                              messages: list,
+                              model: str = None,
+                              max_tokens: int = None,
+                              temperature: float = None,
+                              session_id: str = None,
+                              priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        异步调用华为云AI聊天完成接口，返回结构与准入规则同 HuaweiAIClient.chat_completion
+        """
+        if not self.configured:
+            return {
+                'error': 'AI服务配置不完整',
+                'content': '抱歉，AI服务暂时不可用，请联系管理员配置华为云AI接口。'
+            }
+
+        payload = self._request_payload(messages, model, max_tokens=max_tokens, temperature=temperature)
+
+        async with self.admission.slot_async(session_id, priority):
+            try:
+                logger.info(f"异步调用华为云AI接口: {self.endpoint}")
+                response = await self._send(payload, self._request_headers())
+                result = response.json()
+
+                logger.info("华为云AI接口调用成功")
+                metrics.record_ai_usage(result.get('model', model or self.model), result.get('usage'))
+                return {
+                    'success': True,
+                    'content': result.get('choices', [{}])[0].get('message', {}).get('content', ''),
+                    'usage': result.get('usage', {}),
+                    'model': result.get('model', model or self.model)
+                }
+
+            except CircuitOpenError:
+                logger.warning("华为云AI熔断中，跳过上游调用")
+                return {
+                    'error': 'circuit_open',
+                    'content': '抱歉，AI服务暂时繁忙，请稍后重试。'
+                }
+            except httpx.TimeoutException:
+                logger.error("华为云AI接口调用超时")
+                return {
+                    'error': 'timeout',
+                    'content': '抱歉，AI服务响应超时，请稍后重试。'
+                }
+            except httpx.HTTPStatusError as e:
+                logger.error(f"华为云AI接口HTTP错误: {e}")
+                return {
+                    'error': 'http_error',
+                    'content': f'AI服务暂时不可用，HTTP错误: {e.response.status_code}'
+                }
+            except httpx.HTTPError as e:
+                logger.error(f"华为云AI接口请求错误: {e}")
+                return {
+                    'error': 'request_error',
+                    'content': '网络连接错误，请检查网络设置。'
+                }
+            except json.JSONDecodeError as e:
+                logger.error(f"华为云AI接口响应解析错误: {e}")
+                return {
+                    'error': 'json_error',
+                    'content': 'AI服务响应格式错误。'
+                }
+
+    async def stream_chat_completion(self,
+                                     messages: list,
+                                     model: str = None,
+                                     on_complete: Callable[[str], None] = None,
+                                     session_id: str = None,
+                                     max_tokens: int = None,
+                                     temperature: float = None) -> AsyncIterator[str]:
+        """
+        以流式方式异步调用华为云AI聊天完成接口，其余参数含义同同步版本
+
+        Yields:
+            回答内容增量
+        """
+        if not self.configured:
+            yield '抱歉，AI服务暂时不可用，请联系管理员配置华为云AI接口。'
+            return
+
+        payload = self._request_payload(messages, model, stream=True, max_tokens=max_tokens,
+                                        temperature=temperature)
+
+        async with self.admission.slot_async(session_id):
+            try:
+                logger.info(f"异步流式调用华为云AI接口: {self.endpoint}")
+                started = time.perf_counter()
+                response = await self._send(payload, self._request_headers(stream=True), stream=True)
+                parts = []
+                try:
+                    async for line in response.aiter_lines():
+                        delta = parse_stream_line(line)
+                        if delta is STREAM_DONE:
+                            break
+                        if delta:
+                            if not parts:
+                                metrics.observe('feiyi_ai_stream_first_delta_seconds', (), time.perf_counter() - started)
+                            parts.append(delta)
+                            yield delta
+                finally:
+                    await response.aclose()
+                logger.info("华为云AI流式接口调用完成")
+                if on_complete:
+                    on_complete(''.join(parts))
+
+            except CircuitOpenError:
+                logger.warning("华为云AI熔断中，跳过上游调用")
+                yield '抱歉，AI服务暂时繁忙，请稍后重试。'
+            except httpx.TimeoutException:
+                logger.error("华为云AI流式接口调用超时")
+                yield '抱歉，AI服务响应超时，请稍后重试。'
+            except httpx.HTTPStatusError as e:
+                logger.error(f"华为云AI流式接口HTTP错误: {e}")
+                yield f'AI服务暂时不可用，HTTP错误: {e.response.status_code}'
+            except httpx.HTTPError as e:
+                logger.error(f"华为云AI流式接口请求错误: {e}")
+                yield '网络连接错误，请检查网络设置。'
+            except json.JSONDecodeError as e:
+                logger.error(f"华为云AI流式接口响应解析错误: {e}")
+                yield 'AI服务响应格式错误。'
+
+    async def ask_about_feiyi(self, question: str, session_id: str = None,
+                              priority: int = PRIORITY_INTERACTIVE) -> str:
+        """
+        异步询问非遗相关问题
+
+        Args:
+            question: 用户问题
+            session_id: 会话ID（可选）
+            priority: 上游调用的准入优先级
+
+        Returns:
+            AI回答
+        """
+        # 会话历史与检索涉及同步数据库查询，放到线程中执行
+        history = await asyncio.to_thread(self.history, session_id)
+        if not history:
+            cached = await self.cached_answer_async(question)
+            if cached is not None:
+                return cached
+
+        retrieval = await asyncio.to_thread(self.retrieve, question)
+        if retrieval is not None and retrieval.direct_answer:
+            return retrieval.direct_answer
+
+        messages = self.build_feiyi_messages(question, retrieval.context() if retrieval else None, history)
+        if history or self.single_flight is None:
+            result = await self.chat_completion(messages, session_id=session_id, priority=priority)
+        else:
+            result = await self.single_flight.run_async(
+                question, self.model, FEIYI_SYSTEM_PROMPT,
+                lambda: self.chat_completion(messages, session_id=session_id, priority=priority))
+
+        if result.get('success'):
+            return result['content']
+        else:
+            return result.get('content', '抱歉，在下暂时无法为您解答，请稍候再试。')
+
+    async def ask_about_feiyi_stream(self, question: str, session_id: str = None) -> AsyncIterator[str]:
+        """
+        以流式方式异步询问非遗相关问题
+
+        Yields:
+            AI回答内容增量
+        """
+        history = await asyncio.to_thread(self.history, session_id)
+        if not history:
+            cached = await self.cached_answer_async(question)
+            if cached is not None:
+                yield cached
+                return
+
+        retrieval = await asyncio.to_thread(self.retrieve, question)
+        if retrieval is not None and retrieval.direct_answer:
+            yield retrieval.direct_answer
+            return
+
+        messages = self.build_feiyi_messages(question, retrieval.context() if retrieval else None, history)
+        if history or self.single_flight is None:
+            stream = self.stream_chat_completion(messages, session_id=session_id)
+        else:
+            stream = self.single_flight.stream_async(
+                question, self.model, FEIYI_SYSTEM_PROMPT,
+                lambda on_complete: self.stream_chat_completion(messages, on_complete=on_complete,
+                                                                session_id=session_id))
+        async for delta in stream:
+            yield delta
+
+    async def generate_feiyi_introduction(self, category: str, item_name: str = "") -> str:
+        """
+        异步生成非遗项目介绍
+
+        Args:
+            category: 非遗分类
+            item_name: 具体项目名称
+
+        Returns:
+            生成的介绍文本
+        """
+        return await self.ask_about_feiyi(build_introduction_prompt(category, item_name), priority=PRIORITY_BACKGROUND)
+
+def create_async_client(client: HuaweiAIClient) -> AsyncHuaweiAIClient:
+    """
+    创建与同步客户端共享熔断状态、回答缓存、请求合并器、并发名额与本地知识的异步客户端
+
+    Args:
+        client: 应用的同步客户端（create_app 创建）
+    """
+    return AsyncHuaweiAIClient(api_key=client.api_key, endpoint=client.endpoint,
+                               circuit_breaker=client.circuit_breaker,
+                               answer_cache=client.answer_cache,
+                               single_flight=client.single_flight,
+                               admission=client.admission,
+                               knowledge_retriever=client.knowledge_retriever,
+                               conversation_store=client.conversation_store,
+                               keyword_router=client.keyword_router)
+
+async def get_ai_response_async(client: AsyncHuaweiAIClient, question: str, session_id: str = None) -> str:
+    """
+    异步获取AI回答的便捷函数，回退规则同 get_ai_response
+    """
+    if client.circuit_breaker.is_open:
+        return await client.cached_answer_async(question) or await asyncio.to_thread(client.local_answer, question)
+
+    try:
+        return await client.ask_about_feiyi(question, session_id)
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"AI响应失败: {e}")
+        return await asyncio.to_thread(client.local_answer, question)
+
+async def get_ai_response_stream_async(client: AsyncHuaweiAIClient, question: str,
+                                       session_id: str = None) -> AsyncIterator[str]:
+    """
+    以流式方式异步获取AI回答的便捷函数，回退规则同 get_ai_response_stream
+    """
+    if client.circuit_breaker.is_open:
+        yield await client.cached_answer_async(question) or await asyncio.to_thread(client.local_answer, question)
+        return
+
+    started = False
+    try:
+        async for delta in client.ask_about_feiyi_stream(question, session_id):
+            started = True
+            yield delta
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"AI流式响应失败: {e}")
+        if not started:
+            yield await asyncio.to_thread(client.local_answer, question)
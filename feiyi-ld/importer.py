@@ -0,0 +1,450 @@
+"""
+非遗数据批量导入工具
+
+流式读取 JSONL / CSV 文件，按模型列校验后分批写入（insert / update 均为 executemany），
+以业务键（默认项目为 name、知识为 title）匹配已有数据：新行插入、变化的行更新、相同的行跳过，
+因此重复导入同一文件不会产生重复数据。每次提交后记录进度，中断后再次运行从断点继续。
+写入绕过ORM事件，全文索引与项目详情文档在同一事务中刷新；只创建数据库与这些组件，不创建Web应用。
+导入项目时，后台线程池同时为其原图生成衍生图（见 media.py），完成后刷新相应的详情文档。
+
+用法：
+    python importer.py items items.jsonl
+    python importer.py knowledge knowledge.csv --batch-size 1000 --commit-size 10000
+    python importer.py items items.jsonl --media-workers 4
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import Integer, DateTime, String, bindparam, select
+
+from media import MediaPipeline
+
+logger = logging.getLogger(__name__)
+
+
+class RowError(ValueError):
+    """行数据不符合模型定义"""
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取JSONL文件，空行跳过"""
+    with open(path, encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield RowError(f"JSON解析失败: {e}")
+                continue
+            yield record if isinstance(record, dict) else RowError("每行须为JSON对象")
+
+
+def iter_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取带表头的CSV文件，空单元格视为空值"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for record in csv.DictReader(f):
+            yield {key: (value if value != '' else None) for key, value in record.items() if key}
+
+
+READERS = {'jsonl': iter_jsonl, 'csv': iter_csv}
+
+
+class RowValidator:
+    """按模型列校验并转换一行数据"""
+
+    def __init__(self, model, key: str, references: Optional[Dict[str, Any]] = None):
+        """
+        初始化校验器
+
+        Args:
+            model: 目标模型
+            key: 用于匹配已有数据的业务键列
+            references: 额外允许的引用字段，如 {'item_name': 项目模型}，导入时解析为外键
+        """
+        self.table = model.__table__
+        self.columns = {column.key: column for column in self.table.columns}
+        if key not in self.columns:
+            raise ValueError(f"业务键 {key} 不是 {self.table.name} 的列")
+        self.key = key
+        self.references = references or {}
+        # 非空且无默认值的列为必填
+        self.required = [c.key for c in self.table.columns
+                         if not c.nullable and not c.primary_key and c.default is None]
+
+    def _convert(self, column, value):
+        if value is None:
+            return None
+        if isinstance(column.type, Integer):
+            if isinstance(value, bool):
+                raise RowError(f"{column.key} 须为整数")
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise RowError(f"{column.key} 须为整数: {value!r}")
+        if isinstance(column.type, DateTime):
+            try:
+                return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+            except ValueError:
+                raise RowError(f"{column.key} 须为ISO格式时间: {value!r}")
+        if isinstance(value, (list, dict)):
+            # 图片、视频等JSON字段允许直接给出数组
+            value = json.dumps(value, ensure_ascii=False)
+        value = str(value)
+        if isinstance(column.type, String) and column.type.length and len(value) > column.type.length:
+            raise RowError(f"{column.key} 超出长度限制 {column.type.length}")
+        return value
+
+    def validate(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        校验一行数据
+
+        Returns:
+            只含模型列（及引用字段）的数据
+
+        Raises:
+            RowError: 含未知字段、类型错误、必填字段缺失或缺少业务键
+        """
+        unknown = [k for k in record if k not in self.columns and k not in self.references]
+        if unknown:
+            raise RowError(f"未知字段: {', '.join(unknown)}")
+        row = {}
+        for name, value in record.items():
+            row[name] = value if name in self.references else self._convert(self.columns[name], value)
+        if row.get(self.key) is None:
+            raise RowError(f"缺少业务键 {self.key}")
+        missing = [c for c in self.required if row.get(c) is None]
+        if missing:
+            raise RowError(f"缺少必填字段: {', '.join(missing)}")
+        return row
+
+
+class BulkUpserter:
+    """以业务键分批插入或更新一张表"""
+
+    def __init__(self, model, key: str, after_write=None, references: Optional[Dict[str, Any]] = None):
+        """
+        初始化写入器
+
+        Args:
+            model: 目标模型
+            key: 业务键列
+            after_write: 每批写入后在同一事务中调用，参数为 (连接, 写入的行ID, 受影响的旧值)
+            references: 引用字段到 (被引用模型, 被引用业务键, 外键列) 的映射
+        """
+        self.table = model.__table__
+        self.key = key
+        self.after_write = after_write
+        self.references = references or {}
+
+    def _resolve_references(self, connection, rows: List[Dict[str, Any]]):
+        """将 item_name 等引用字段解析为外键ID，找不到的引用置空"""
+        for field, (target, target_key, column) in self.references.items():
+            names = {row[field] for row in rows if row.get(field) is not None}
+            if not names:
+                for row in rows:
+                    row.pop(field, None)
+                continue
+            table = target.__table__
+            mapping = dict(connection.execute(
+                select(table.c[target_key], table.c.id).where(table.c[target_key].in_(names))).all())
+            for row in rows:
+                if field in row:
+                    row[column] = mapping.get(row.pop(field))
+
+    def upsert(self, connection, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        写入一批数据
+
+        Returns:
+            {'inserted', 'updated', 'unchanged'}
+        """
+        self._resolve_references(connection, rows)
+        # 同一批内业务键重复时以最后一行为准
+        batch = {row[self.key]: row for row in rows}
+        key_column = self.table.c[self.key]
+        compare = sorted({name for row in batch.values() for name in row} - {'id'})
+        existing = {
+            row[self.key]: row for row in (r._asdict() for r in connection.execute(
+                select(self.table.c.id, *[self.table.c[name] for name in compare if name != self.key], key_column)
+                .where(key_column.in_(list(batch)))))
+        }
+
+        now = datetime.utcnow()
+        inserts, updates, previous = [], {}, []
+        unchanged = 0
+        for key, row in batch.items():
+            current = existing.get(key)
+            if current is None:
+                inserts.append(row)
+                continue
+            changed = {name: value for name, value in row.items()
+                       if name != 'id' and current.get(name) != value}
+            if not changed:
+                unchanged += 1
+                continue
+            previous.append(current)
+            changed['updated_at'] = now
+            changed['_id'] = current['id']
+            updates.setdefault(tuple(sorted(changed)), []).append(changed)
+
+        if inserts:
+            # executemany要求各行字段一致，缺失的列使用默认值或空值
+            columns = [c.key for c in self.table.columns if c.key != 'id' or all('id' in r for r in inserts)]
+            filled = []
+            for row in inserts:
+                values = {name: row.get(name) for name in columns}
+                values['created_at'] = row.get('created_at') or now
+                values['updated_at'] = row.get('updated_at') or now
+                filled.append(values)
+            connection.execute(self.table.insert(), filled)
+        for names, group in updates.items():
+            # 绑定参数名不能与列名相同，统一加前缀
+            values = {name: bindparam(f'_{name}') for name in names if name != '_id'}
+            params = [{f'_{name}' if name != '_id' else name: value for name, value in row.items()}
+                      for row in group]
+            connection.execute(
+                self.table.update().where(self.table.c.id == bindparam('_id')).values(values), params)
+
+        written = list(inserts) + [u for group in updates.values() for u in group]
+        if written and self.after_write:
+            ids = dict(connection.execute(
+                select(key_column, self.table.c.id).where(
+                    key_column.in_([row[self.key] for row in inserts]))).all()) if inserts else {}
+            written_ids = list(ids.values()) + [u['_id'] for group in updates.values() for u in group]
+            self.after_write(connection, written_ids, previous)
+
+        return {'inserted': len(inserts), 'updated': len(written) - len(inserts), 'unchanged': unchanged}
+
+
+class Checkpoint:
+    """导入进度文件：记录源文件指纹与已提交的记录数"""
+
+    def __init__(self, path: str, source: str, target: str):
+        self.path = path
+        stat = os.stat(source)
+        self.fingerprint = {'source': os.path.abspath(source), 'target': target,
+                            'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def load(self) -> int:
+        """返回可跳过的记录数；源文件变化后进度作废"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if any(state.get(k) != v for k, v in self.fingerprint.items()):
+            logger.info("源文件已变化，忽略旧的导入进度")
+            return 0
+        return int(state.get('records', 0))
+
+    def save(self, records: int, done: bool = False):
+        """原子写入进度"""
+        state = dict(self.fingerprint, records=records, done=done, saved_at=datetime.utcnow().isoformat())
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def run_import(engine, upserter: BulkUpserter, validator: RowValidator, records: Iterable,
+               batch_size: int = 1000, commit_size: int = 10000,
+               checkpoint: Optional[Checkpoint] = None, rejects=None,
+               report_interval: float = 5.0) -> Dict[str, Any]:
+    """
+    流式导入
+
+    Args:
+        engine: 数据库引擎
+        upserter: 批量写入器
+        validator: 行校验器
+        records: 逐条产生的原始记录（读取错误以 RowError 表示）
+        batch_size: 每次executemany的行数
+        commit_size: 每个事务的行数（向上取整到 batch_size 的倍数）
+        checkpoint: 进度文件，提供时跳过已提交的记录并在每次提交后更新
+        rejects: 可写文件对象，写入未通过校验的记录与原因
+        report_interval: 输出进度的间隔秒数
+
+    Returns:
+        导入统计
+    """
+    skip = checkpoint.load() if checkpoint else 0
+    if skip:
+        logger.info(f"从第 {skip + 1} 条记录继续导入")
+
+    totals = {'records': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0, 'skipped': skip}
+    started = last_report = time.monotonic()
+    batch: List[Dict[str, Any]] = []
+    pending_rows = 0
+    connection = engine.connect()
+    transaction = connection.begin()
+
+    def write_batch():
+        nonlocal pending_rows
+        if batch:
+            for name, value in upserter.upsert(connection, batch).items():
+                totals[name] += value
+            pending_rows += len(batch)
+            batch.clear()
+
+    def commit():
+        nonlocal transaction, pending_rows
+        write_batch()
+        transaction.commit()
+        if checkpoint:
+            checkpoint.save(totals['records'])
+        pending_rows = 0
+        transaction = connection.begin()
+
+    try:
+        for number, record in enumerate(records, 1):
+            totals['records'] = number
+            if number <= skip:
+                continue
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                batch.append(validator.validate(record))
+            except RowError as e:
+                totals['rejected'] += 1
+                if rejects is not None:
+                    rejects.write(json.dumps({'record': number, 'error': str(e),
+                                              'data': None if isinstance(record, RowError) else record},
+                                             ensure_ascii=False, default=str) + '\n')
+
+            if len(batch) >= batch_size:
+                write_batch()
+                if pending_rows >= commit_size:
+                    commit()
+
+            now = time.monotonic()
+            if now - last_report >= report_interval:
+                last_report = now
+                rate = (number - skip) / (now - started)
+                logger.info(f"已处理 {number} 条，{rate:.0f} 行/秒")
+        commit()
+        if checkpoint:
+            checkpoint.save(totals['records'], done=True)
+    except BaseException:
+        transaction.rollback()
+        raise
+    finally:
+        connection.close()
+
+    elapsed = time.monotonic() - started
+    totals['seconds'] = round(elapsed, 2)
+    totals['rows_per_second'] = round((totals['records'] - skip) / elapsed, 1) if elapsed > 0 else None
+    return totals
+
+
+def build_upserters(item_index, knowledge_index, documents, media=None) -> Dict[str, BulkUpserter]:
+    """
+    为项目与知识表创建写入器，写入后刷新全文索引与详情文档
+
+    Args:
+        item_index: 项目全文索引
+        knowledge_index: 知识全文索引
+        documents: 项目详情读模型
+        media: 衍生图生成管线（可选），写入的项目的原图提交给它，已完成的项目随后刷新详情文档
+    """
+    FeiyiItem, FeiyiKnowledge = item_index.model, knowledge_index.model
+
+    def after_items(connection, ids, previous):
+        item_index.reindex(ids, connection)
+        rows = connection.execute(
+            select(FeiyiItem.id, FeiyiItem.category_id, FeiyiItem.images).where(FeiyiItem.id.in_(ids))).all()
+        categories = {row.id: row.category_id for row in rows}
+        touched = {(categories[i], i) for i in ids if i in categories}
+        touched |= {(p['category_id'], p['id']) for p in previous if p.get('category_id') is not None}
+        documents.items_changed(connection, ids, touched)
+        if media is not None:
+            media.submit(connection, [{'id': row.id, 'images': row.images} for row in rows])
+            # 生成慢于读取时在此等待，不把整个文件的原图都排进线程池
+            media.throttle(media.workers * 4)
+            documents.refresh(media.collect(connection), connection)
+
+    def after_knowledge(connection, ids, previous):
+        knowledge_index.reindex(ids, connection)
+        item_ids = set(connection.execute(
+            select(FeiyiKnowledge.item_id).where(FeiyiKnowledge.id.in_(ids))).scalars())
+        item_ids |= {p['item_id'] for p in previous if p.get('item_id') is not None}
+        item_ids.discard(None)
+        documents.refresh(item_ids, connection)
+
+    references = {'item_name': (FeiyiItem, 'name', 'item_id')}
+    return {
+        'items': BulkUpserter(FeiyiItem, 'name', after_items),
+        'knowledge': BulkUpserter(FeiyiKnowledge, 'title', after_knowledge, references),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量导入非遗项目或知识库数据（JSONL / CSV）')
+    parser.add_argument('target', choices=['items', 'knowledge'], help='导入的数据表')
+    parser.add_argument('path', help='数据文件路径')
+    parser.add_argument('--format', choices=sorted(READERS), help='文件格式，默认按扩展名判断')
+    parser.add_argument('--key', help='匹配已有数据的业务键列（项目默认name，知识默认title）')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每次批量写入的行数（默认1000）')
+    parser.add_argument('--commit-size', type=int, default=10000, help='每个事务的行数（默认10000）')
+    parser.add_argument('--checkpoint', help='进度文件路径（默认为数据文件路径加 .progress）')
+    parser.add_argument('--restart', action='store_true', help='忽略已有进度，从头导入')
+    parser.add_argument('--rejects', help='记录未通过校验的行的JSONL文件')
+    parser.add_argument('--media-workers', type=int, default=2,
+                        help='导入项目时生成图片衍生图的线程数（默认2，0为不生成）')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'jsonl')
+
+    from models import (create_db_app, db, FeiyiItem, FeiyiKnowledge, ensure_indexes,
+                        build_search_indexes, build_item_documents)
+    app = create_db_app()
+    item_index, knowledge_index = build_search_indexes(app)
+    documents = build_item_documents(app)
+    with app.app_context():
+        db.create_all()
+        ensure_indexes()
+        media = None
+        if args.target == 'items' and args.media_workers > 0:
+            media = MediaPipeline(documents.media, workers=args.media_workers)
+        upserter = build_upserters(item_index, knowledge_index, documents,
+                                   media if media and media.enabled else None)[args.target]
+        if args.key:
+            upserter.key = args.key
+        model = FeiyiItem if args.target == 'items' else FeiyiKnowledge
+        validator = RowValidator(model, upserter.key, references=upserter.references)
+
+        checkpoint = Checkpoint(args.checkpoint or args.path + '.progress', args.path, args.target)
+        if args.restart and os.path.exists(checkpoint.path):
+            os.remove(checkpoint.path)
+
+        rejects = open(args.rejects, 'a', encoding='utf-8') if args.rejects else None
+        try:
+            totals = run_import(db.engine, upserter, validator, READERS[fmt](args.path),
+                                batch_size=args.batch_size, commit_size=args.commit_size,
+                                checkpoint=checkpoint, rejects=rejects)
+            if media is not None and media.enabled:
+                logger.info("等待图片衍生图生成完成...")
+                with db.engine.begin() as connection:
+                    documents.refresh(media.collect(connection, wait=True), connection)
+                totals['media'] = media.totals
+        finally:
+            if rejects is not None:
+                rejects.close()
+            if media is not None:
+                media.close()
+
+    print(json.dumps(totals, ensure_ascii=False))
+    return 0 if not totals['rejected'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
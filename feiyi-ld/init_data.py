@@ -1,20 +1,26 @@
 """
 初始化非遗数据
+
+示例数据按名称/标题写入或更新，可重复执行。
 """
-from app import app, db, FeiyiItem, FeiyiKnowledge
+from models import (create_db_app, db, FeiyiItem, FeiyiKnowledge, ensure_indexes,
+                    build_search_indexes, build_item_documents)
+from importer import RowValidator, build_upserters
+from media import MediaPipeline
 import json
 
 def init_sample_data():
     """初始化示例数据"""
     
+    # 只创建数据库、全文索引与详情读模型，不创建Web应用
+    app = create_db_app()
+    item_index, knowledge_index = build_search_indexes(app)
+    documents = build_item_documents(app)
+    
     # 创建数据库表
     with app.app_context():
         db.create_all()
-        
-        # 检查是否已有数据
-        if FeiyiItem.query.first():
-            print("数据库已有数据，跳过初始化")
-            return
+        ensure_indexes()
         
         # 示例非遗项目数据
         sample_items = [
@@ -22,9 +28,9 @@ def init_sample_data():
                 'name': '昆曲',
                 'category_id': 4,
                 'description': '昆曲是中国最古老的剧种之一，被誉为"百戏之祖"',
-                'origin_place': '江苏昆山',
-                'history': '昆曲起源于14世纪中国的昆山，至今已有600多年历史。明代魏良辅对昆山腔进行改革，奠定了昆曲的基础。',
-                'characteristics': '昆曲以工尺谱记谱，曲调优美，表演细腻，被称为"水磨调"。其表演融合了唱、念、做、打等多种艺术形式。',
+                'origin_location': '江苏昆山',
+                'historical_background': '昆曲起源于14世纪中国的昆山，至今已有600多年历史。明代魏良辅对昆山腔进行改革，奠定了昆曲的基础。',
+                'cultural_value': '昆曲以工尺谱记谱，曲调优美，表演细腻，被称为"水磨调"。其表演融合了唱、念、做、打等多种艺术形式。',
                 'inheritance_status': '活跃传承',
                 'protection_level': '世界非物质文化遗产',
                 'representative_inheritor': '汪世瑜、蔡正仁、梁谷音等',
@@ -35,9 +41,9 @@ def init_sample_data():
                 'name': '京剧',
                 'category_id': 4,
                 'description': '京剧是中国五大戏曲剧种之一，被誉为中国国粹',
-                'origin_place': '北京',
-                'history': '京剧形成于19世纪中期，由徽剧、汉剧、昆曲、秦腔等剧种融合发展而成。',
-                'characteristics': '京剧以西皮、二黄为主要声腔，表演程式化，脸谱艺术独特，有生、旦、净、丑四大行当。',
+                'origin_location': '北京',
+                'historical_background': '京剧形成于19世纪中期，由徽剧、汉剧、昆曲、秦腔等剧种融合发展而成。',
+                'cultural_value': '京剧以西皮、二黄为主要声腔，表演程式化，脸谱艺术独特，有生、旦、净、丑四大行当。',
                 'inheritance_status': '活跃传承',
                 'protection_level': '世界非物质文化遗产',
                 'representative_inheritor': '梅兰芳、程砚秋、尚小云、荀慧生等',
@@ -48,9 +54,9 @@ def init_sample_data():
                 'name': '中医针灸',
                 'category_id': 9,
                 'description': '中医针灸是中国传统医学的重要组成部分',
-                'origin_place': '中国',
-                'history': '针灸疗法起源于新石器时代，距今已有数千年历史。《黄帝内经》奠定了针灸理论基础。',
-                'characteristics': '通过针刺和艾灸刺激人体穴位，调节气血，治疗疾病。具有简便易行、疗效显著的特点。',
+                'origin_location': '中国',
+                'historical_background': '针灸疗法起源于新石器时代，距今已有数千年历史。《黄帝内经》奠定了针灸理论基础。',
+                'cultural_value': '通过针刺和艾灸刺激人体穴位，调节气血，治疗疾病。具有简便易行、疗效显著的特点。',
                 'inheritance_status': '活跃传承',
                 'protection_level': '世界非物质文化遗产',
                 'representative_inheritor': '石学敏、王雪苔、贺普仁等',
@@ -61,9 +67,9 @@ def init_sample_data():
                 'name': '蜀锦织造技艺',
                 'category_id': 8,
                 'description': '蜀锦是中国四大名锦之一，有"寸锦寸金"之誉',
-                'origin_place': '四川成都',
-                'history': '蜀锦起源于春秋战国时期，至今已有2000多年历史。汉代时蜀锦已远销海外。',
-                'characteristics': '蜀锦色彩绚丽，图案精美，质地坚韧。传统工艺复杂，需要高超的技艺。',
+                'origin_location': '四川成都',
+                'historical_background': '蜀锦起源于春秋战国时期，至今已有2000多年历史。汉代时蜀锦已远销海外。',
+                'cultural_value': '蜀锦色彩绚丽，图案精美，质地坚韧。传统工艺复杂，需要高超的技艺。',
                 'inheritance_status': '濒危',
                 'protection_level': '国家级非物质文化遗产',
                 'representative_inheritor': '钟秉章、贺斌等',
@@ -74,9 +80,9 @@ def init_sample_data():
                 'name': '太极拳',
                 'category_id': 6,
                 'description': '太极拳是中国传统武术的代表，融合了哲学、医学、美学',
-                'origin_place': '河南温县陈家沟',
-                'history': '太极拳起源于明末清初，由陈王廷创编。后发展出陈、杨、武、吴、孙五大流派。',
-                'characteristics': '动作缓慢柔和，刚柔相济，以意导气，以气运身，具有健身养生和技击功能。',
+                'origin_location': '河南温县陈家沟',
+                'historical_background': '太极拳起源于明末清初，由陈王廷创编。后发展出陈、杨、武、吴、孙五大流派。',
+                'cultural_value': '动作缓慢柔和，刚柔相济，以意导气，以气运身，具有健身养生和技击功能。',
                 'inheritance_status': '活跃传承',
                 'protection_level': '世界非物质文化遗产',
                 'representative_inheritor': '陈小旺、杨振铎、吴阿敏等',
@@ -87,9 +93,9 @@ def init_sample_data():
                 'name': '二十四节气',
                 'category_id': 10,
                 'description': '二十四节气是中国古代农业文明的智慧结晶',
-                'origin_place': '中国',
-                'history': '二十四节气形成于春秋战国时期，完善于汉代，是中国古代用来指导农事的补充历法。',
-                'characteristics': '根据太阳在黄道上的位置变化，将一年分为24个节气，反映了季节、气候、物候的变化规律。',
+                'origin_location': '中国',
+                'historical_background': '二十四节气形成于春秋战国时期，完善于汉代，是中国古代用来指导农事的补充历法。',
+                'cultural_value': '根据太阳在黄道上的位置变化，将一年分为24个节气，反映了季节、气候、物候的变化规律。',
                 'inheritance_status': '活跃传承',
                 'protection_level': '世界非物质文化遗产',
                 'representative_inheritor': '刘晓峰、萧放等民俗学者',
@@ -98,11 +104,6 @@ def init_sample_data():
             }
         ]
         
-        # 添加项目数据
-        for item_data in sample_items:
-            item = FeiyiItem(**item_data)
-            db.session.add(item)
-        
         # 示例知识库数据
         sample_knowledge = [
             {
@@ -123,22 +124,30 @@ def init_sample_data():
                 'title': '昆曲的艺术特色',
                 'content': '昆曲被称为"百戏之祖"，其艺术特色主要体现在：1.音乐优美，被誉为"水磨调"；2.表演细腻，程式严谨；3.文学性强，多为文人创作；4.服饰华美，舞台效果精致。昆曲对后来的京剧、越剧等剧种都产生了深远影响。',
                 'category_id': 4,
-                'item_id': 1,
+                'item_name': '昆曲',
                 'keywords': '昆曲,艺术特色,水磨调,百戏之祖',
                 'source': '中国戏曲学院'
             }
         ]
         
-        # 添加知识库数据
-        for knowledge_data in sample_knowledge:
-            knowledge = FeiyiKnowledge(**knowledge_data)
-            db.session.add(knowledge)
+        # 按名称/标题写入或更新（已存在且内容相同的记录保持不变）；原图存在时同时生成衍生图
+        media = MediaPipeline(documents.media)
+        upserters = build_upserters(item_index, knowledge_index, documents, media if media.enabled else None)
+        try:
+            with db.engine.begin() as connection:
+                items_result = upserters['items'].upsert(
+                    connection, [RowValidator(FeiyiItem, 'name').validate(data) for data in sample_items])
+                knowledge_validator = RowValidator(FeiyiKnowledge, 'title', references=upserters['knowledge'].references)
+                knowledge_result = upserters['knowledge'].upsert(
+                    connection, [knowledge_validator.validate(data) for data in sample_knowledge])
+                if media.enabled:
+                    documents.refresh(media.collect(connection, wait=True), connection)
+        finally:
+            media.close()
         
-        # 提交数据
-        db.session.commit()
         print("示例数据初始化完成！")
-        print(f"添加了 {len(sample_items)} 个非遗项目")
-        print(f"添加了 {len(sample_knowledge)} 条知识库记录")
+        print(f"非遗项目：新增 {items_result['inserted']} 个，更新 {items_result['updated']} 个")
+        print(f"知识库记录：新增 {knowledge_result['inserted']} 条，更新 {knowledge_result['updated']} 条")
 
 if __name__ == '__main__':
     init_sample_data()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+用户交互记录的异步批量写入模块
+
+问答接口只把记录放入进程内的有界队列即返回，由后台线程按条数或时间批量插入数据库，
+进程退出时写完剩余记录。队列满时丢弃新记录并计数，不阻塞请求。
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionWriter:
+    """UserInteraction的写后（write-behind）批量写入器"""
+
+    def __init__(self, app, db, model,
+                 max_queue: int = None,
+                 batch_size: int = None,
+                 flush_interval: float = None,
+                 enabled: bool = None):
+        """
+        初始化写入器
+
+        Args:
+            app: Flask应用（后台线程中推入应用上下文）
+            db: Flask-SQLAlchemy实例
+            model: 交互记录模型
+            max_queue: 队列容量
+            batch_size: 每批写入的最大条数，达到即触发写入
+            flush_interval: 距上次写入的最长间隔（秒），到期即触发写入
+            enabled: 为False时在请求线程中同步写入
+        """
+        self.app = app
+        self.db = db
+        self.model = model
+        self.max_queue = max_queue or int(os.getenv('FEIYI_INTERACTION_QUEUE_SIZE', 10000))
+        self.batch_size = batch_size or int(os.getenv('FEIYI_INTERACTION_BATCH_SIZE', 100))
+        self.flush_interval = flush_interval or float(os.getenv('FEIYI_INTERACTION_FLUSH_INTERVAL', 1.0))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_INTERACTION_WRITE_BEHIND', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        self._counter_lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def _ensure_worker(self):
+        """按需启动后台线程；fork出的子进程会重新创建自己的队列与线程"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='interaction-writer', daemon=True)
+            self._thread.start()
+
+    def _incr(self, name: str, value: int = 1):
+        with self._counter_lock:
+            self._counters[name] += value
+
+    def submit(self, session_id, question, answer) -> datetime:
+        """
+        提交一条交互记录
+
+        Returns:
+            记录时间（入队时刻）
+        """
+        row = {
+            'session_id': session_id,
+            'question': question,
+            'answer': answer,
+            'created_at': datetime.utcnow()
+        }
+        if not self.enabled:
+            self._write([row])
+            return row['created_at']
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(row)
+            self._incr('enqueued')
+        except queue.Full:
+            self._incr('dropped')
+            logger.warning("交互记录队列已满，丢弃一条记录")
+        return row['created_at']
+
+    def _run(self):
+        """后台线程：攒批后写入，直至收到停止信号且队列清空"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if batch and (len(batch) >= self.batch_size or now >= deadline or self._stopping.is_set()):
+                self._write(batch)
+                batch = []
+            if now >= deadline:
+                deadline = now + self.flush_interval
+            if self._stopping.is_set() and not batch and self._queue.empty():
+                return
+
+    def _write(self, rows):
+        """批量插入一组记录"""
+        try:
+            with self.app.app_context():
+                self.db.session.execute(self.model.__table__.insert(), rows)
+                self.db.session.commit()
+            self._incr('written', len(rows))
+            self._incr('batches')
+        except Exception as e:
+            self._incr('failed', len(rows))
+            logger.error(f"交互记录批量写入失败（{len(rows)}条）: {e}")
+
+    def flush(self, timeout: float = 5.0):
+        """等待当前队列中的记录写完（用于测试与运维）"""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        target = self._counters['enqueued']
+        while time.monotonic() < deadline:
+            if self._queue.empty() and self._counters['written'] + self._counters['failed'] >= target:
+                return
+            time.sleep(0.01)
+
+    def shutdown(self, timeout: float = 10.0):
+        """停止后台线程并写完剩余记录"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        """返回队列深度与写入计数"""
+        result = dict(self._counters)
+        result['queue_depth'] = self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0
+        result['queue_capacity'] = self.max_queue
+        result['write_behind'] = self.enabled
+        return result
@@ -0,0 +1,407 @@
+"""
+非遗介绍离线生成模块
+
+为每个分类与项目预先生成AI介绍，保存在 feiyi_introductions 表中，页面直接读取，请求中不调用上游：
+- 批量任务以有界线程池并发调用上游，按速率上限发起请求，并以后台优先级占用准入名额，不挤占在线问答；
+- 每条介绍记录生成所用的模型、提示词版本与输入摘要（完整提示词的哈希，含项目资料），
+  再次运行时输入未变的跳过，只为新增或资料变化的项目重新生成；
+- 结果按批写入，项目介绍在同一事务中刷新项目详情文档；中断后再次运行即从未完成的部分继续。
+
+用法：
+    python introductions.py
+    python introductions.py --kind items --workers 4 --rate 2
+    python introductions.py --force
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import has_app_context
+from sqlalchemy import select
+
+from admission import AdmissionRejected, PRIORITY_BACKGROUND
+from huawei_ai import build_introduction_prompt
+
+logger = logging.getLogger(__name__)
+
+# 提示词版本：修改介绍提示词或资料格式时递增，记录在每条介绍中
+PROMPT_VERSION = 'v1'
+
+KIND_ITEM = 'item'
+KIND_CATEGORY = 'category'
+
+# 作为资料注入提示词的项目字段
+ITEM_CONTEXT_FIELDS = (
+    ('origin_location', '发源地'),
+    ('protection_level', '保护级别'),
+    ('representative_inheritor', '代表性传承人'),
+    ('declaration_date', '申报时间'),
+    ('description', '项目描述'),
+    ('historical_background', '历史背景'),
+    ('cultural_value', '文化价值'),
+    ('inheritance_status', '传承状况'),
+    ('protection_measures', '保护措施'),
+)
+
+# 每个资料字段注入的最大字数
+CONTEXT_FIELD_LIMIT = 500
+
+# 每批读取的项目数
+ITEM_CHUNK = 500
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class IntroductionStore:
+    """预生成介绍的存储"""
+
+    def __init__(self, app, db):
+        """
+        初始化介绍存储
+
+        Args:
+            app: Flask应用（在无应用上下文的线程中使用）
+            db: Flask-SQLAlchemy实例
+        """
+        self.app = app
+        self.db = db
+        # 表定义在 db.metadata 中只有一份，再次创建应用时沿用
+        self.table = db.metadata.tables.get('feiyi_introductions')
+        if self.table is None:
+            self.table = db.Table(
+                'feiyi_introductions',
+                db.Column('kind', db.String(20), primary_key=True, comment='介绍对象：item / category'),
+                db.Column('target_id', db.Integer, primary_key=True, comment='项目或分类ID'),
+                db.Column('content', db.Text, nullable=False, comment='介绍正文'),
+                db.Column('model', db.String(100), nullable=False, comment='生成所用模型'),
+                db.Column('prompt_version', db.String(20), nullable=False, comment='生成所用提示词版本'),
+                db.Column('input_digest', db.String(40), nullable=False, comment='提示词与资料的摘要，未变时不重新生成'),
+                db.Column('digest', db.String(40), nullable=False, comment='正文摘要，用作缓存校验值'),
+                db.Column('generated_at', db.DateTime, default=datetime.utcnow, comment='生成时间'),
+            )
+
+    def input_digests(self, connection, kind: str, target_ids: Iterable[int]) -> Dict[int, str]:
+        """已有介绍的输入摘要"""
+        target_ids = list(target_ids)
+        if not target_ids:
+            return {}
+        return dict(connection.execute(
+            select(self.table.c.target_id, self.table.c.input_digest)
+            .where(self.table.c.kind == kind, self.table.c.target_id.in_(target_ids))).all())
+
+    def load(self, connection, kind: str, target_ids: Iterable[int]) -> Dict[int, str]:
+        """批量读取介绍正文"""
+        target_ids = list(target_ids)
+        if not target_ids:
+            return {}
+        return dict(connection.execute(
+            select(self.table.c.target_id, self.table.c.content)
+            .where(self.table.c.kind == kind, self.table.c.target_id.in_(target_ids))).all())
+
+    def save(self, connection, rows: List[Dict[str, Any]]):
+        """写入介绍，已有的同一对象的介绍被替换"""
+        for kind in {row['kind'] for row in rows}:
+            target_ids = [row['target_id'] for row in rows if row['kind'] == kind]
+            # 先删后插，兼容各数据库
+            connection.execute(self.table.delete().where(
+                self.table.c.kind == kind, self.table.c.target_id.in_(target_ids)))
+        if rows:
+            connection.execute(self.table.insert(), rows)
+
+    def prune(self, connection, kind: str, existing) -> int:
+        """
+        删除已不存在的对象的介绍
+
+        Args:
+            connection: 所在事务的连接
+            kind: 介绍对象类型
+            existing: 仍存在的对象ID（列表或子查询）
+
+        Returns:
+            删除的条数
+        """
+        result = connection.execute(self.table.delete().where(
+            self.table.c.kind == kind, self.table.c.target_id.not_in(existing)))
+        return result.rowcount or 0
+
+    def get(self, kind: str, target_id: int) -> Optional[Dict[str, Any]]:
+        """
+        读取一条介绍
+
+        Returns:
+            {'content', 'model', 'prompt_version', 'digest', 'generated_at'}，尚未生成时返回None
+        """
+        if not has_app_context():
+            with self.app.app_context():
+                return self.get(kind, target_id)
+        table = self.table
+        row = self.db.session.execute(
+            select(table.c.content, table.c.model, table.c.prompt_version, table.c.digest, table.c.generated_at)
+            .where(table.c.kind == kind, table.c.target_id == target_id)).first()
+        return dict(row._mapping) if row is not None else None
+
+
+# ---- 批量生成 ----
+
+@dataclass
+class Job:
+    """一条待生成的介绍"""
+    kind: str
+    target_id: int
+    messages: list
+    input_digest: str
+
+
+class RateLimiter:
+    """按固定间隔放行的线程安全限速器"""
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: 每秒放行的次数，不大于0时不限速
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """阻塞到下一个放行时刻"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def item_context(item: Dict[str, Any]) -> str:
+    """将项目字段整理为注入提示词的资料"""
+    lines = []
+    for field, label in ITEM_CONTEXT_FIELDS:
+        value = (item.get(field) or '').strip()
+        if value:
+            if len(value) > CONTEXT_FIELD_LIMIT:
+                value = value[:CONTEXT_FIELD_LIMIT] + '…'
+            lines.append(f"{label}：{value}")
+    return '\n'.join(lines)
+
+
+def make_job(client, kind: str, target_id: int, prompt: str, context: str = None) -> Job:
+    """构建生成任务，输入摘要覆盖模型、提示词版本与完整消息"""
+    messages = client.build_feiyi_messages(prompt, context or None)
+    payload = json.dumps({'model': client.model, 'prompt_version': PROMPT_VERSION, 'messages': messages},
+                         ensure_ascii=False, sort_keys=True)
+    return Job(kind, target_id, messages, _digest(payload))
+
+
+def category_jobs(client, store: IntroductionStore, connection,
+                  categories: List[Dict[str, Any]]) -> Iterator[Tuple[Job, Optional[str]]]:
+    """各分类的生成任务及其已有介绍的输入摘要"""
+    existing = store.input_digests(connection, KIND_CATEGORY, [c['id'] for c in categories])
+    for category in categories:
+        prompt = build_introduction_prompt(category['name'])
+        yield make_job(client, KIND_CATEGORY, category['id'], prompt, category.get('description')), \
+            existing.get(category['id'])
+
+
+def item_jobs(client, store: IntroductionStore, connection, items,
+              categories: List[Dict[str, Any]]) -> Iterator[Tuple[Job, Optional[str]]]:
+    """
+    全部项目的生成任务及其已有介绍的输入摘要
+
+    按ID分批读取项目，每批只取提示词用到的字段，任意规模的数据都不会整表载入内存。
+    """
+    names = {category['id']: category['name'] for category in categories}
+    columns = [items.c.id, items.c.name, items.c.category_id] + [items.c[f] for f, _ in ITEM_CONTEXT_FIELDS]
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(*columns).where(items.c.id > last_id).order_by(items.c.id).limit(ITEM_CHUNK)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        existing = store.input_digests(connection, KIND_ITEM, [row.id for row in rows])
+        for row in rows:
+            item = dict(row._mapping)
+            prompt = build_introduction_prompt(names.get(item['category_id'], '非物质文化遗产'), item['name'])
+            yield make_job(client, KIND_ITEM, item['id'], prompt, item_context(item)), existing.get(item['id'])
+
+
+def run_generation(client, store: IntroductionStore, engine,
+                   jobs: Iterable[Tuple[Job, Optional[str]]],
+                   workers: int = 4, rate: float = 1.0, max_tokens: int = 1500,
+                   commit_size: int = 20, force: bool = False, limit: int = None,
+                   after_write: Callable[[Any, List[Dict[str, Any]]], None] = None,
+                   report_interval: float = 10.0) -> Dict[str, Any]:
+    """
+    以有界线程池生成介绍并分批写入
+
+    Args:
+        client: AI客户端
+        store: 介绍存储
+        engine: 数据库引擎
+        jobs: (任务, 已有介绍的输入摘要)，摘要与任务一致的跳过
+        workers: 并发调用上游的线程数
+        rate: 每秒最多发起的上游调用数
+        max_tokens: 每条介绍的最大生成token数
+        commit_size: 每个事务写入的介绍数
+        force: 为True时忽略输入摘要，全部重新生成
+        limit: 最多生成的条数
+        after_write: 每批写入后在同一事务中调用，参数为 (连接, 写入的行)
+        report_interval: 输出进度的间隔秒数
+
+    Returns:
+        生成统计
+    """
+    limiter = RateLimiter(rate)
+    totals = {'generated': 0, 'unchanged': 0, 'failed': 0}
+    pending: List[Dict[str, Any]] = []
+    started = last_report = time.monotonic()
+
+    def generate(job: Job) -> Tuple[Job, Optional[Dict[str, Any]]]:
+        limiter.wait()
+        try:
+            result = client.chat_completion(job.messages, max_tokens=max_tokens, priority=PRIORITY_BACKGROUND)
+        except AdmissionRejected as e:
+            result = {'error': 'admission', 'content': str(e)}
+        content = (result.get('content') or '').strip() if result.get('success') else ''
+        if not content:
+            # 失败的回答（错误提示文本）不写入，下次运行重试
+            logger.warning(f"{job.kind} {job.target_id} 介绍生成失败: {result.get('error', 'empty')}")
+            return job, None
+        return job, {
+            'kind': job.kind,
+            'target_id': job.target_id,
+            'content': content,
+            'model': result.get('model') or client.model,
+            'prompt_version': PROMPT_VERSION,
+            'input_digest': job.input_digest,
+            'digest': _digest(content),
+            'generated_at': datetime.utcnow()
+        }
+
+    def write():
+        if not pending:
+            return
+        with engine.begin() as connection:
+            store.save(connection, pending)
+            if after_write is not None:
+                after_write(connection, pending)
+        pending.clear()
+
+    def collect(done):
+        nonlocal last_report
+        for future in done:
+            job, row = future.result()
+            if row is None:
+                totals['failed'] += 1
+                continue
+            totals['generated'] += 1
+            pending.append(row)
+        if len(pending) >= commit_size:
+            write()
+        now = time.monotonic()
+        if now - last_report >= report_interval:
+            last_report = now
+            logger.info(f"已生成 {totals['generated']} 条，跳过 {totals['unchanged']} 条，失败 {totals['failed']} 条")
+
+    submitted = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='introduction') as executor:
+        in_flight = set()
+        try:
+            for job, existing_digest in jobs:
+                if not force and existing_digest == job.input_digest:
+                    totals['unchanged'] += 1
+                    continue
+                if limit is not None and submitted >= limit:
+                    break
+                # 进行中的任务数有上限，任务按需读取与提交
+                while len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(executor.submit(generate, job))
+                submitted += 1
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        finally:
+            # 中断时保留已完成的结果
+            for future in in_flight:
+                future.cancel()
+            write()
+
+    elapsed = time.monotonic() - started
+    totals['seconds'] = round(elapsed, 2)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量预生成非遗分类与项目的AI介绍')
+    parser.add_argument('--kind', choices=['all', 'categories', 'items'], default='all', help='生成的对象（默认全部）')
+    parser.add_argument('--workers', type=int, default=4, help='并发调用上游的线程数（默认4）')
+    parser.add_argument('--rate', type=float, default=1.0, help='每秒最多发起的上游调用数（默认1，0为不限）')
+    parser.add_argument('--max-tokens', type=int, default=1500, help='每条介绍的最大生成token数（默认1500）')
+    parser.add_argument('--commit-size', type=int, default=20, help='每个事务写入的介绍数（默认20）')
+    parser.add_argument('--limit', type=int, help='本次最多生成的条数')
+    parser.add_argument('--force', action='store_true', help='忽略输入摘要，全部重新生成')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    from answer_cache import AnswerCache
+    from huawei_ai import HuaweiAIClient
+    from models import create_db_app, db, FeiyiItem, FEIYI_CATEGORIES, build_search_indexes, build_item_documents
+    from retrieval import KnowledgeRetriever
+    app = create_db_app()
+    item_index, knowledge_index = build_search_indexes(app)
+    # 与网站相同：回答缓存与本地知识检索为提示补充资料
+    client = HuaweiAIClient(answer_cache=AnswerCache(),
+                            knowledge_retriever=KnowledgeRetriever(app, item_index, knowledge_index))
+    if not client.configured:
+        print('华为云AI配置不完整，请设置 HUAWEI_AI_API_KEY 与 HUAWEI_AI_ENDPOINT', file=sys.stderr)
+        return 2
+
+    documents = build_item_documents(app)
+    store = documents.introductions
+    categories = FEIYI_CATEGORIES
+    items = FeiyiItem.__table__
+
+    def after_write(connection, rows):
+        documents.refresh([row['target_id'] for row in rows if row['kind'] == KIND_ITEM], connection)
+
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+        with engine.connect() as connection:
+            jobs = []
+            if args.kind in ('all', 'categories'):
+                jobs.append(category_jobs(client, store, connection, categories))
+            if args.kind in ('all', 'items'):
+                jobs.append(item_jobs(client, store, connection, items, categories))
+            totals = run_generation(
+                client, store, engine, (job for source in jobs for job in source),
+                workers=args.workers, rate=args.rate, max_tokens=args.max_tokens,
+                commit_size=args.commit_size, force=args.force, limit=args.limit,
+                after_write=after_write)
+        with engine.begin() as connection:
+            totals['pruned'] = store.prune(connection, KIND_CATEGORY, [c['id'] for c in categories])
+            totals['pruned'] += store.prune(connection, KIND_ITEM, select(items.c.id))
+
+    print(json.dumps(totals, ensure_ascii=False))
+    return 0 if not totals['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
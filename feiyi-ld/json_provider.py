@@ -0,0 +1,87 @@
+"""
+JSON序列化模块
+
+替换Flask默认的JSON提供者：
+- 直接输出UTF-8中文，不再转义为 \\uXXXX（中文内容的响应体约缩小为三分之一）；
+- 日期时间序列化为ISO 8601字符串，与模型 to_dict() 的格式一致（Flask默认为HTTP日期格式）；
+- 不排序字典键，按构造顺序输出；
+- 安装 orjson 时由其完成序列化与解析，否则使用标准库。
+
+序列化引擎由 FEIYI_JSON_ENGINE 选择：auto（默认，有 orjson 时使用）、orjson 或 stdlib。
+"""
+import logging
+import os
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENGINES = ('auto', 'orjson', 'stdlib')
+
+
+def _default(o):
+    """标准库与 orjson 都不能直接序列化的对象"""
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """输出UTF-8、可选 orjson 加速的JSON提供者"""
+
+    ensure_ascii = False
+    sort_keys = False
+    default = staticmethod(_default)
+
+    def __init__(self, app, engine: str = None):
+        """
+        初始化JSON提供者
+
+        Args:
+            app: Flask应用
+            engine: 序列化引擎，auto/orjson/stdlib
+        """
+        super().__init__(app)
+        engine = (engine or os.getenv('FEIYI_JSON_ENGINE', 'auto')).lower()
+        if engine not in ENGINES:
+            raise ValueError(f"FEIYI_JSON_ENGINE 应为 {'/'.join(ENGINES)}，而不是 {engine}")
+        if engine == 'orjson' and orjson is None:
+            logger.warning("未安装orjson，使用标准库JSON")
+        self.engine = 'orjson' if engine != 'stdlib' and orjson is not None else 'stdlib'
+
+    def _orjson_dumps(self, obj, option: int = 0) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=option | orjson.OPT_NON_STR_KEYS)
+
+    def dumps(self, obj, **kwargs) -> str:
+        if self.engine == 'orjson' and not kwargs:
+            try:
+                return self._orjson_dumps(obj).decode('utf-8')
+            except orjson.JSONEncodeError:
+                # 超出64位的整数等 orjson 不支持的值交给标准库
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.engine == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if self.engine != 'orjson':
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        try:
+            body = self._orjson_dumps(obj, option)
+        except orjson.JSONEncodeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,234 @@
+"""
+关键词路由模块（Aho-Corasick多模式匹配）
+
+由 FeiyiKnowledge.keywords 与 FeiyiItem.name 生成自动机，一次扫描问题即可找出全部命中的关键词，
+用于AI服务不可用时的本地回退。数据表变化后在下次查询时惰性重建。
+"""
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import has_app_context
+from sqlalchemy import event, func
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(value: str) -> str:
+    """全半角折叠并转小写，用于模式与问题的统一匹配"""
+    return unicodedata.normalize('NFKC', value or '').lower()
+
+
+class AhoCorasick:
+    """Aho-Corasick自动机，模式与载荷一一对应"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        """
+        构建自动机
+
+        Args:
+            patterns: (模式串, 载荷) 序列，同一模式可对应多个载荷
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+        self.payloads: List[Any] = []
+
+        for pattern, payload in patterns:
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = nxt
+            self._output[node].append(len(self.patterns))
+            self.patterns.append(pattern)
+            self.payloads.append(payload)
+
+        # 广度优先计算失败指针，并合并后缀节点的输出
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def iter_matches(self, text: str):
+        """
+        单次扫描文本
+
+        Yields:
+            (结束位置, 模式序号)
+        """
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for index in self._output[node]:
+                yield pos, index
+
+    def match(self, text: str) -> List[Tuple[str, Any]]:
+        """返回文本中命中的全部 (模式串, 载荷)，同一模式只计一次"""
+        seen = set()
+        hits = []
+        for _, index in self.iter_matches(text):
+            if index not in seen:
+                seen.add(index)
+                hits.append((self.patterns[index], self.payloads[index]))
+        return hits
+
+
+class KeywordRouter:
+    """由数据库生成关键词自动机，将问题路由到匹配的知识条目"""
+
+    def __init__(self, app, db, item_model, knowledge_model, refresh_interval: float = None):
+        """
+        初始化关键词路由
+
+        Args:
+            app: Flask应用（在无应用上下文的线程中使用）
+            db: Flask-SQLAlchemy实例
+            item_model: 非遗项目模型
+            knowledge_model: 知识库模型
+            refresh_interval: 检查其他进程写入的最小间隔（秒）
+        """
+        self.app = app
+        self.db = db
+        self.item_model = item_model
+        self.knowledge_model = knowledge_model
+        self.refresh_interval = refresh_interval or float(os.getenv('FEIYI_ROUTER_REFRESH_INTERVAL', 10))
+
+        self._automaton: Optional[AhoCorasick] = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+
+        # 本进程内的写入立即标记失效
+        for model in (item_model, knowledge_model):
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, name, self._mark_dirty)
+
+    def _mark_dirty(self, mapper, connection, target):
+        self._dirty = True
+
+    def _table_signature(self):
+        """两张表的行数与最近更新时间，用于发现其他进程的写入"""
+        signature = []
+        for model in (self.item_model, self.knowledge_model):
+            signature.extend(self.db.session.query(func.count(model.id), func.max(model.updated_at)).one())
+        return tuple(signature)
+
+    def _patterns(self):
+        """生成 (模式, (类型, ID, 标题)) 序列"""
+        for item_id, name in self.db.session.query(self.item_model.id, self.item_model.name):
+            if name:
+                yield normalize_text(name), ('item', item_id, name)
+        for knowledge_id, title, keywords in self.db.session.query(
+                self.knowledge_model.id, self.knowledge_model.title, self.knowledge_model.keywords):
+            for keyword in (keywords or '').replace('，', ',').split(','):
+                keyword = normalize_text(keyword.strip())
+                if len(keyword) >= 2:
+                    yield keyword, ('knowledge', knowledge_id, title)
+
+    def automaton(self) -> AhoCorasick:
+        """返回最新的自动机，数据变化后惰性重建"""
+        now = time.monotonic()
+        if not self._dirty and self._automaton is not None and now - self._checked_at < self.refresh_interval:
+            return self._automaton
+
+        with self._lock:
+            signature = self._table_signature()
+            self._checked_at = now
+            if self._dirty or self._automaton is None or signature != self._signature:
+                self._dirty = False
+                self._signature = signature
+                started = time.perf_counter()
+                self._automaton = AhoCorasick(self._patterns())
+                logger.info(f"关键词自动机已重建: {len(self._automaton)} 个模式，"
+                            f"耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+        return self._automaton
+
+    def route(self, question: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        匹配问题中的关键词并对命中目标排序
+
+        每个目标的得分为其命中的不同关键词长度之和，长关键词更具体；
+        同分时知识条目优先于项目。
+
+        Returns:
+            [{'type', 'id', 'title', 'score', 'keywords'}]，按得分降序
+        """
+        if not has_app_context():
+            with self.app.app_context():
+                return self.route(question, limit)
+
+        targets: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        for pattern, (kind, target_id, title) in self.automaton().match(normalize_text(question)):
+            target = targets.setdefault((kind, target_id), {
+                'type': kind, 'id': target_id, 'title': title, 'score': 0, 'keywords': []
+            })
+            if pattern not in target['keywords']:
+                target['keywords'].append(pattern)
+                target['score'] += len(pattern)
+        ranked = sorted(targets.values(), key=lambda t: (t['score'], t['type'] == 'knowledge'), reverse=True)
+        return ranked[:limit]
+
+    def answer(self, question: str) -> Optional[str]:
+        """
+        以匹配的知识条目作答
+
+        命中项目时优先使用其关联的知识条目，没有关联知识则使用项目简介。
+
+        Returns:
+            回答文本，无命中时返回None
+        """
+        if not has_app_context():
+            with self.app.app_context():
+                return self.answer(question)
+
+        hits = self.route(question)
+        if not hits:
+            return None
+
+        best = hits[0]
+        if best['type'] == 'knowledge':
+            knowledge = self.db.session.get(self.knowledge_model, best['id'])
+            body = f"{knowledge.title}\n\n{knowledge.content}" if knowledge else None
+        else:
+            item = self.db.session.get(self.item_model, best['id'])
+            related = self.knowledge_model.query.filter_by(item_id=best['id']).first() if item else None
+            if related:
+                body = f"{related.title}\n\n{related.content}"
+            elif item:
+                parts = [item.description, item.historical_background, item.cultural_value]
+                body = f"{item.name}\n\n" + '\n'.join(p for p in parts if p)
+            else:
+                body = None
+        if not body:
+            return None
+
+        others = [h['title'] for h in hits[1:] if h['title'] != best['title']]
+        if others:
+            body += '\n\n您或许还想了解：' + '、'.join(others)
+        return body
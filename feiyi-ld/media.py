@@ -0,0 +1,489 @@
+"""
+项目图片衍生图模块
+
+FeiyiItem.images 中的原图文件名（位于 FEIYI_MEDIA_DIR，默认 instance/media/originals）
+在导入时由后台线程池生成衍生图，页面与接口只引用衍生图，请求中不处理图片：
+- 三种尺寸：thumb（缩略图）、card（卡片）、hero（详情页头图），不放大小于目标宽度的原图；
+- 每种尺寸输出 AVIF（Pillow 支持时）、WebP 与 JPEG（兜底），页面以 <picture> 与 srcset 按浏览器支持选择；
+- 衍生图按原图内容与处理参数的哈希存放（FEIYI_MEDIA_CACHE_DIR，默认 instance/media/derivatives），
+  内容相同的原图只处理一次，地址随内容变化，/media/ 以 immutable 长缓存发送；
+- 每个原图的哈希与各尺寸的实际宽高记录在 feiyi_media 表中，原图未变化时不重新生成，
+  项目详情文档与列表接口据此给出图片地址。
+
+生成需安装 Pillow；未安装时不生成衍生图，页面不显示图片。
+
+用法（为全部项目补生成衍生图，导入时 importer.py 会自动生成）：
+    python media.py
+    python media.py --workers 8 --force
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import abort, has_app_context, send_from_directory
+from sqlalchemy import func, select
+
+from assets import IMMUTABLE_CACHE_CONTROL
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+# 处理参数版本：修改尺寸、格式或压缩质量时递增，全部衍生图随之重新生成
+MEDIA_VERSION = 'v1'
+
+# 尺寸名 -> 最大宽度（像素），按从大到小排列，小尺寸由上一级缩放得到
+VARIANTS = (('hero', 1600), ('card', 640), ('thumb', 240))
+
+# 格式 -> (文件扩展名, MIME类型, Pillow保存参数)，按页面中的优先顺序排列
+FORMATS = {
+    'avif': ('avif', 'image/avif', {'quality': 50, 'speed': 6}),
+    'webp': ('webp', 'image/webp', {'quality': 78, 'method': 4}),
+    'jpeg': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+MIMETYPES = {extension: mimetype for extension, mimetype, _ in FORMATS.values()}
+
+# 透明原图在输出前铺上的底色（宣纸色）
+BACKGROUND = (245, 241, 232)
+
+# 每批读取的项目数
+ITEM_CHUNK = 500
+
+_DIGEST_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def available_formats() -> List[str]:
+    """当前 Pillow 可输出的格式，JPEG 总是可用"""
+    if Image is None:
+        return []
+    formats = []
+    for name in FORMATS:
+        try:
+            if name == 'jpeg' or features.check(name):
+                formats.append(name)
+        except ValueError:
+            # 旧版 Pillow 不认识 avif 特性
+            pass
+    return formats
+
+
+def image_names(images) -> List[str]:
+    """从 images 列（JSON列表或列表）中取出本地原图文件名，网址与越出原图目录的路径忽略"""
+    if isinstance(images, str):
+        try:
+            images = json.loads(images)
+        except ValueError:
+            return []
+    if not isinstance(images, list):
+        return []
+    names = []
+    for name in images:
+        if not isinstance(name, str) or '://' in name:
+            continue
+        name = name.replace('\\', '/').lstrip('/')
+        if name and '..' not in name.split('/') and name not in names:
+            names.append(name)
+    return names
+
+
+def _write(path: str, image, fmt: str, options: dict):
+    """先写临时文件再替换，服务中的进程不会读到半个文件"""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    image.save(temp_path, format=fmt.upper(), **options)
+    os.replace(temp_path, path)
+
+
+class MediaLibrary:
+    """原图衍生图的生成、记录与发送"""
+
+    def __init__(self, app, db, source_dir: str = None, cache_dir: str = None, url_prefix: str = '/media'):
+        """
+        初始化图片库
+
+        Args:
+            app: Flask应用（在无应用上下文的线程中使用）
+            db: Flask-SQLAlchemy实例
+            source_dir: 原图目录
+            cache_dir: 衍生图目录
+            url_prefix: 衍生图地址前缀
+        """
+        self.app = app
+        self.db = db
+        media_root = os.path.join(app.instance_path, 'media')
+        self.source_dir = source_dir or os.getenv('FEIYI_MEDIA_DIR', os.path.join(media_root, 'originals'))
+        self.cache_dir = cache_dir or os.getenv('FEIYI_MEDIA_CACHE_DIR', os.path.join(media_root, 'derivatives'))
+        self.url_prefix = url_prefix.rstrip('/')
+        self.formats = available_formats()
+        # 写入衍生图记录后调用（如清空响应缓存），记录经Core写入，不触发模型事件
+        self.after_save: List[Callable[[], None]] = []
+        self.table = db.metadata.tables.get('feiyi_media')
+        if self.table is None:
+            self.table = db.Table(
+                'feiyi_media',
+                db.Column('filename', db.String(255), primary_key=True, comment='原图文件名（与项目 images 中一致）'),
+                db.Column('digest', db.String(32), nullable=False, comment='原图内容与处理参数的哈希，即衍生图目录名'),
+                db.Column('variants', db.Text, nullable=False, comment='各尺寸的实际宽高，JSON格式'),
+                db.Column('formats', db.String(50), nullable=False, comment='已生成的格式，逗号分隔'),
+                db.Column('generated_at', db.DateTime, default=datetime.utcnow, comment='生成时间'),
+            )
+
+        app.add_url_rule(f"{self.url_prefix}/<digest>/<filename>", 'media', self.send)
+
+    # ---- 记录 ----
+
+    def load(self, connection, filenames: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """批量读取原图的衍生图记录"""
+        filenames = list(set(filenames))
+        if not filenames:
+            return {}
+        rows = connection.execute(select(self.table).where(self.table.c.filename.in_(filenames)))
+        return {row.filename: dict(row._mapping) for row in rows}
+
+    def save(self, connection, rows: List[Dict[str, Any]]):
+        """写入衍生图记录，已有的同一原图的记录被替换"""
+        if not rows:
+            return
+        # 先删后插，兼容各数据库
+        connection.execute(self.table.delete().where(
+            self.table.c.filename.in_([row['filename'] for row in rows])))
+        connection.execute(self.table.insert(), rows)
+        for callback in self.after_save:
+            callback()
+
+    def lookup(self, filenames: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """在请求中读取衍生图记录"""
+        if not has_app_context():
+            with self.app.app_context():
+                return self.lookup(filenames)
+        return self.load(self.db.session.connection(), filenames)
+
+    def version(self, filenames: Iterable[str]) -> Tuple[int, Optional[datetime]]:
+        """原图已有的衍生图记录数与最近生成时间，供引用这些图片的接口计算缓存校验值"""
+        filenames = list(set(filenames))
+        if not filenames:
+            return 0, None
+        if not has_app_context():
+            with self.app.app_context():
+                return self.version(filenames)
+        table = self.table
+        return tuple(self.db.session.execute(
+            select(func.count(), func.max(table.c.generated_at)).where(table.c.filename.in_(filenames))).one())
+
+    # ---- 页面与接口中的图片 ----
+
+    def url(self, digest: str, variant: str, fmt: str) -> str:
+        return f"{self.url_prefix}/{digest}/{variant}.{FORMATS[fmt][0]}"
+
+    def picture(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        由衍生图记录生成 <picture> 所需的地址
+
+        Returns:
+            {'src': JPEG卡片图地址, 'width', 'height': 卡片图宽高,
+             'srcset': JPEG各尺寸, 'sources': [{'type', 'srcset'}] 按优先顺序的其他格式}
+        """
+        variants = record['variants']
+        if isinstance(variants, str):
+            variants = json.loads(variants)
+        formats = record['formats'].split(',')
+
+        def srcset(fmt):
+            # 原图较窄时多个尺寸宽度相同，只保留最小的一个
+            widths = {}
+            for name, _ in reversed(VARIANTS):
+                widths.setdefault(variants[name][0], name)
+            return ', '.join(f"{self.url(record['digest'], name, fmt)} {width}w" for width, name in widths.items())
+
+        width, height = variants['card']
+        return {
+            'src': self.url(record['digest'], 'card', 'jpeg'),
+            'width': width,
+            'height': height,
+            'srcset': srcset('jpeg'),
+            'sources': [{'type': FORMATS[fmt][1], 'srcset': srcset(fmt)} for fmt in formats if fmt != 'jpeg'],
+        }
+
+    def pictures(self, images, records: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """项目 images 中已生成衍生图的图片，按原顺序"""
+        return [self.picture(records[name]) for name in image_names(images) if name in records]
+
+    def attach(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """为含 images 字段的序列化项目加上 media（一次查询取全部记录），返回原列表"""
+        with_images = [row for row in rows if 'images' in row]
+        if with_images:
+            records = self.lookup(name for row in with_images for name in image_names(row['images']))
+            for row in with_images:
+                row['media'] = self.pictures(row['images'], records)
+        return rows
+
+    # ---- 发送 ----
+
+    def send(self, digest: str, filename: str):
+        """发送衍生图，地址随内容变化，可永久缓存"""
+        variant, _, extension = filename.partition('.')
+        if not _DIGEST_RE.match(digest) or variant not in dict(VARIANTS) or extension not in MIMETYPES:
+            abort(404)
+        response = send_from_directory(os.path.join(self.cache_dir, digest[:2], digest), filename,
+                                       mimetype=MIMETYPES[extension])
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    # ---- 生成 ----
+
+    def source_path(self, filename: str) -> str:
+        return os.path.join(self.source_dir, *filename.split('/'))
+
+    def render(self, filename: str, known_digest: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        为一张原图生成全部衍生图
+
+        Args:
+            filename: 原图文件名
+            known_digest: 已记录的哈希，与当前原图一致且衍生图齐全时跳过
+
+        Returns:
+            新的衍生图记录；原图不存在、无法识别或未变化时返回None
+        """
+        try:
+            with open(self.source_path(filename), 'rb') as f:
+                data = f.read()
+        except OSError:
+            logger.debug(f"原图不存在: {filename}")
+            return None
+        digest = hashlib.sha256(data + MEDIA_VERSION.encode()).hexdigest()[:32]
+        directory = os.path.join(self.cache_dir, digest[:2], digest)
+        if digest == known_digest and os.path.isdir(directory):
+            return None
+
+        try:
+            with Image.open(io.BytesIO(data)) as original:
+                # JPEG 按目标尺寸降采样解码，大图可省去大部分解码时间
+                original.draft('RGB', (VARIANTS[0][1], VARIANTS[0][1]))
+                image = ImageOps.exif_transpose(original)
+                if image.mode in ('RGBA', 'LA', 'P'):
+                    image = image.convert('RGBA')
+                    background = Image.new('RGB', image.size, BACKGROUND)
+                    background.paste(image, mask=image.getchannel('A'))
+                    image = background
+                elif image.mode != 'RGB':
+                    image = image.convert('RGB')
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning(f"原图无法识别 {filename}: {e}")
+            return None
+
+        os.makedirs(directory, exist_ok=True)
+        variants = {}
+        for name, max_width in VARIANTS:
+            if image.width > max_width:
+                image = image.resize((max_width, max(1, round(image.height * max_width / image.width))),
+                                     Image.LANCZOS)
+            variants[name] = [image.width, image.height]
+            for fmt in self.formats:
+                extension, _, options = FORMATS[fmt]
+                path = os.path.join(directory, f"{name}.{extension}")
+                # 内容相同的原图共用同一目录，已生成的文件不再重复编码
+                if not os.path.exists(path):
+                    _write(path, image, fmt, options)
+
+        return {
+            'filename': filename,
+            'digest': digest,
+            'variants': json.dumps(variants),
+            'formats': ','.join(self.formats),
+            'generated_at': datetime.utcnow()
+        }
+
+
+class MediaPipeline:
+    """在后台线程池中为导入的项目生成衍生图"""
+
+    def __init__(self, library: MediaLibrary, workers: int = 2, force: bool = False):
+        """
+        初始化生成管线
+
+        Args:
+            library: 图片库
+            workers: 生成衍生图的线程数（Pillow 缩放与编码时释放GIL）
+            force: 忽略已有记录，全部重新生成
+        """
+        self.library = library
+        self.workers = workers
+        self.force = force
+        self.enabled = bool(library.formats) and os.path.isdir(library.source_dir)
+        if not library.formats:
+            logger.warning("未安装Pillow，不生成图片衍生图")
+        elif not self.enabled:
+            logger.info(f"原图目录不存在，不生成图片衍生图: {library.source_dir}")
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media') if self.enabled else None
+        self.totals = {'images': 0, 'generated': 0, 'skipped': 0, 'failed': 0}
+        self._seen = set()
+        self._generated = set()
+        self._ready = set()
+        self._in_flight = set()
+        self._done = queue.SimpleQueue()
+        # 原图 -> 等待它的项目ID；项目ID -> 未完成的原图数；其中已有原图生成了新衍生图的项目
+        self._waiting: Dict[str, set] = {}
+        self._remaining: Dict[int, int] = {}
+        self._changed = set()
+        self._condition = threading.Condition()
+
+    def _finished(self, name: str, future):
+        self._done.put((name, future))
+        with self._condition:
+            self._in_flight.discard(name)
+            self._condition.notify_all()
+
+    def submit(self, connection, items: Iterable[Dict[str, Any]]):
+        """
+        提交项目的原图，已提交过的原图不重复处理
+
+        Args:
+            connection: 用于读取已有记录的连接
+            items: 含 id 与 images 的项目
+        """
+        if not self.enabled:
+            return
+        names_by_item = {item['id']: image_names(item['images']) for item in items}
+        new_names = {name for names in names_by_item.values() for name in names} - self._seen
+        known = {} if self.force else {
+            name: record['digest'] for name, record in self.library.load(connection, new_names).items()}
+        for item_id, names in names_by_item.items():
+            for name in names:
+                if name in new_names or name in self._waiting:
+                    self._waiting.setdefault(name, set()).add(item_id)
+                    self._remaining[item_id] = self._remaining.get(item_id, 0) + 1
+                elif name in self._generated:
+                    # 与之前的项目共用、已生成新衍生图的原图
+                    self._changed.add(item_id)
+            if item_id in self._changed and item_id not in self._remaining:
+                self._changed.discard(item_id)
+                self._ready.add(item_id)
+        for name in sorted(new_names):
+            self._seen.add(name)
+            with self._condition:
+                self._in_flight.add(name)
+            future = self.executor.submit(self.library.render, name, known.get(name))
+            future.add_done_callback(lambda f, name=name: self._finished(name, f))
+            self.totals['images'] += 1
+
+    def throttle(self, limit: int):
+        """等待处理中的原图不多于 limit 张，避免读取远快于生成时积压"""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._in_flight) <= limit)
+
+    def collect(self, connection, wait: bool = False) -> List[int]:
+        """
+        写入已完成的衍生图记录
+
+        Args:
+            connection: 所在事务的连接
+            wait: 等待全部提交的原图处理完成
+
+        Returns:
+            图片全部处理完且有新衍生图的项目ID，需刷新其详情文档
+        """
+        if wait:
+            self.throttle(0)
+        rows, ready = [], list(self._ready)
+        self._ready.clear()
+        while True:
+            try:
+                name, future = self._done.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                row = future.result()
+            except Exception as e:
+                logger.warning(f"生成衍生图失败 {name}: {e}")
+                self.totals['failed'] += 1
+                row = None
+            if row is not None:
+                self.totals['generated'] += 1
+                self._generated.add(name)
+                rows.append(row)
+            elif not future.exception():
+                self.totals['skipped'] += 1
+
+            for item_id in self._waiting.pop(name, ()):
+                if row is not None:
+                    self._changed.add(item_id)
+                self._remaining[item_id] -= 1
+                if not self._remaining[item_id]:
+                    del self._remaining[item_id]
+                    if item_id in self._changed:
+                        self._changed.discard(item_id)
+                        ready.append(item_id)
+        self.library.save(connection, rows)
+        return ready
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='为全部非遗项目的原图补生成衍生图')
+    parser.add_argument('--workers', type=int, default=4, help='生成衍生图的线程数（默认4）')
+    parser.add_argument('--force', action='store_true', help='忽略已有记录，全部重新生成')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    from models import create_db_app, db, FeiyiItem, build_item_documents
+    app = create_db_app()
+    documents = build_item_documents(app)
+    library = documents.media
+    items = FeiyiItem.__table__
+    pipeline = MediaPipeline(library, workers=args.workers, force=args.force)
+    if not pipeline.enabled:
+        return 2
+
+    started = time.monotonic()
+    refreshed = 0
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+        last_id = 0
+        try:
+            while True:
+                with engine.begin() as connection:
+                    chunk = [dict(row._mapping) for row in connection.execute(
+                        select(items.c.id, items.c.images).where(items.c.id > last_id)
+                        .order_by(items.c.id).limit(ITEM_CHUNK))]
+                    if not chunk:
+                        break
+                    last_id = chunk[-1]['id']
+                    pipeline.submit(connection, chunk)
+                    pipeline.throttle(pipeline.workers * 4)
+                    ready = pipeline.collect(connection)
+                    documents.refresh(ready, connection)
+                    refreshed += len(ready)
+            with engine.begin() as connection:
+                ready = pipeline.collect(connection, wait=True)
+                documents.refresh(ready, connection)
+                refreshed += len(ready)
+        finally:
+            pipeline.close()
+
+    totals = dict(pipeline.totals, documents=refreshed, seconds=round(time.monotonic() - started, 2))
+    print(json.dumps(totals, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
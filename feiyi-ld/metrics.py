@@ -0,0 +1,377 @@
+"""
+运行指标模块
+
+在进程内以计数器与直方图累计以下指标，由 /metrics 以Prometheus文本格式导出：
+- 各路由的请求延迟；
+- 响应压缩前后的字节数；
+- 每个请求执行的SQL条数与耗时（由引擎事件统计）；
+- 上游AI调用的延迟、状态与提示/生成token用量。
+
+热路径上只有一次加锁的字典累加。各工作进程定期把自己的累计值写入共享目录
+（每进程一个快照文件），导出时合并全部快照，因此gunicorn多进程下任一进程返回的都是全局数据。
+已退出进程的快照在导出时并入归档文件后删除，文件数不随重启增长，计数器也不回退；
+快照目录只应由同一台主机上的进程共享。
+
+统计只在服务进程中开启（startup.load_app 与 python app.py 调用 metrics.start()），
+导入脚本、命令行工具、测试与基准创建应用时不累计，也不写快照。
+"""
+import atexit
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 接口延迟（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 上游AI调用延迟（秒）
+AI_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+# 每个请求的SQL条数
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# 指标定义：名称 -> (类型, 说明, 标签名, 直方图分桶)
+METRICS = {
+    'feiyi_http_request_duration_seconds': (
+        'histogram', '请求处理耗时', ('method', 'route', 'status'), LATENCY_BUCKETS),
+    'feiyi_db_queries_per_request': (
+        'histogram', '每个请求执行的SQL条数', ('route',), QUERY_COUNT_BUCKETS),
+    'feiyi_db_query_seconds_per_request': (
+        'histogram', '每个请求的SQL总耗时', ('route',), LATENCY_BUCKETS),
+    'feiyi_http_compression_bytes_total': (
+        'counter', '压缩响应的字节数，stage为in（压缩前）/out（压缩后）', ('encoding', 'stage'), None),
+    'feiyi_db_statements_total': (
+        'counter', '执行的SQL语句数（含请求外的后台任务）', (), None),
+    'feiyi_db_statement_seconds_total': (
+        'counter', 'SQL语句累计耗时', (), None),
+    'feiyi_ai_upstream_duration_seconds': (
+        'histogram', '上游AI单次HTTP调用耗时（至响应头），status为状态码或异常名', ('mode', 'status'),
+        AI_LATENCY_BUCKETS),
+    'feiyi_ai_stream_first_delta_seconds': (
+        'histogram', '流式调用至首个内容增量的耗时', (), AI_LATENCY_BUCKETS),
+    'feiyi_ai_circuit_open_total': (
+        'counter', '熔断期间被拒绝的上游调用数', (), None),
+    'feiyi_ai_tokens_total': (
+        'counter', '上游返回的token用量', ('model', 'type'), None),
+    'feiyi_ai_admission_rejected_total': (
+        'counter', '未获准入的上游调用数，reason为queue_full/session_limit/timeout', ('reason',), None),
+}
+
+# 已退出进程的快照并入的归档文件
+ARCHIVE_NAME = 'archive.json'
+
+# 当前请求的SQL统计 [条数, 耗时]，请求外为None
+_request_queries: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar(
+    'feiyi_request_queries', default=None)
+
+
+class MetricsRegistry:
+    """进程内指标累计与跨进程合并导出"""
+
+    def __init__(self, directory: str = None, flush_interval: float = None, enabled: bool = None):
+        """
+        初始化指标注册表
+
+        Args:
+            directory: 各进程快照文件所在的共享目录
+            flush_interval: 后台写入快照的间隔（秒），决定其他进程的数据多久后可见
+            enabled: 是否立即开始累计；默认不累计，由服务进程调用 start() 开启
+        """
+        default_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics')
+        self.directory = directory or os.getenv('FEIYI_METRICS_DIR', default_directory)
+        self.flush_interval = flush_interval or float(os.getenv('FEIYI_METRICS_FLUSH_INTERVAL', 5))
+        self.enabled = bool(enabled)
+
+        self._reset()
+        atexit.register(self.shutdown)
+        if hasattr(os, 'register_at_fork'):
+            # fork出的工作进程从零开始累计，写入自己的快照文件
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._values: Dict[str, Dict[Tuple[str, ...], object]] = {name: {} for name in METRICS}
+        self._thread = None
+        self._stopping = threading.Event()
+        self._path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+        self._lock = threading.Lock()
+        # 后台线程与 /metrics 请求可能同时写快照
+        self._flush_lock = threading.Lock()
+
+    def start(self):
+        """在服务进程中开启统计（FEIYI_METRICS_ENABLED 设为 0 时不开启）"""
+        self.enabled = os.getenv('FEIYI_METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+    def _ensure_flusher(self):
+        """按需启动写快照的后台线程"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='metrics-flusher', daemon=True)
+            self._thread.start()
+
+    def inc(self, name: str, labels: Tuple[str, ...] = (), value: float = 1):
+        """累加计数器"""
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self._ensure_flusher()
+        values = self._values[name]
+        with self._lock:
+            values[labels] = values.get(labels, 0) + value
+
+    def observe(self, name: str, labels: Tuple[str, ...], value: float):
+        """记录一次直方图观测值"""
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self._ensure_flusher()
+        buckets = METRICS[name][3]
+        index = bisect.bisect_left(buckets, value)
+        values = self._values[name]
+        with self._lock:
+            series = values.get(labels)
+            if series is None:
+                # 各分桶计数（非累积，最后一格为+Inf）、总和
+                series = values[labels] = [0] * (len(buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """本进程累计值的可序列化副本，标签组合以JSON数组为键"""
+        with self._lock:
+            return {
+                name: {json.dumps(labels, ensure_ascii=False): (list(value) if isinstance(value, list) else value)
+                       for labels, value in series.items()}
+                for name, series in self._values.items()
+            }
+
+    def flush(self):
+        """将本进程快照写入共享目录（先写临时文件再替换，读取方不会看到半个文件）"""
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self._path}.tmp"
+            with self._flush_lock:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.snapshot(), f, ensure_ascii=False)
+                os.replace(temp_path, self._path)
+        except OSError as e:
+            logger.warning(f"指标快照写入失败: {e}")
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+
+    def shutdown(self):
+        """进程退出时写入最终快照；已退出进程的快照保留，计数器不会回退"""
+        self._stopping.set()
+        if self._thread is not None:
+            self.flush()
+
+    def _fold_dead(self):
+        """把已退出进程的快照并入归档文件后删除，并发导出时由文件锁串行"""
+        if fcntl is None:
+            return
+        dead = []
+        for path in glob.glob(os.path.join(self.directory, '*-*.json')):
+            pid = os.path.basename(path).split('-', 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                dead.append(path)
+        if not dead:
+            return
+
+        archive_path = os.path.join(self.directory, ARCHIVE_NAME)
+        try:
+            with open(os.path.join(self.directory, 'archive.lock'), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                archive = _read_snapshot(archive_path) or {}
+                folded = []
+                for path in dead:
+                    data = _read_snapshot(path)
+                    if data is not None:
+                        _merge(archive, data)
+                        folded.append(path)
+                if not folded:
+                    return
+                temp_path = f"{archive_path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(archive, f, ensure_ascii=False)
+                os.replace(temp_path, archive_path)
+                for path in folded:
+                    os.remove(path)
+        except OSError as e:
+            logger.warning(f"指标快照归档失败: {e}")
+
+    def collect(self) -> Dict[str, Dict[str, object]]:
+        """合并全部进程的快照与归档，本进程使用最新值"""
+        self.flush()
+        self._fold_dead()
+        merged = {name: {} for name in METRICS}
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            data = _read_snapshot(path)
+            if data is not None:
+                _merge(merged, {name: series for name, series in data.items() if name in merged})
+        return merged
+
+    def render(self) -> str:
+        """以Prometheus文本格式（0.0.4）导出全部进程的指标"""
+        lines = []
+        for name, series in self.collect().items():
+            kind, help_text, label_names, buckets = METRICS[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in sorted(series):
+                labels = list(zip(label_names, json.loads(key)))
+                value = series[key]
+                if kind == 'counter':
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ['+Inf'], value[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, app):
+        """
+        为Flask应用注册请求计时与SQL统计
+
+        Args:
+            app: Flask应用
+        """
+        app.before_request(_start_request)
+
+        @app.after_request
+        def _finish_request(response):
+            started = g.pop('metrics_started', None)
+            if started is None:
+                return response
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            self.record_request(request.method, route, response.status_code,
+                                time.perf_counter() - started, _request_queries.get())
+            _request_queries.set(None)
+            return response
+
+    def record_request(self, method: str, route: str, status: int, seconds: float,
+                       queries: Optional[Sequence[float]] = None):
+        """
+        记录一次请求
+
+        Args:
+            method: 请求方法
+            route: 路由规则（而非实际路径，以限制标签取值数量）
+            status: 响应状态码
+            seconds: 处理耗时；流式响应为返回响应头之前的耗时
+            queries: 请求内的 [SQL条数, SQL耗时]
+        """
+        self.observe('feiyi_http_request_duration_seconds', (method, route, str(status)), seconds)
+        if queries is not None:
+            self.observe('feiyi_db_queries_per_request', (route,), queries[0])
+            self.observe('feiyi_db_query_seconds_per_request', (route,), queries[1])
+
+    def record_ai_request(self, mode: str, status: str, seconds: float):
+        """记录一次上游AI HTTP调用"""
+        self.observe('feiyi_ai_upstream_duration_seconds', (mode, status), seconds)
+
+    def record_ai_usage(self, model: str, usage: Optional[dict]):
+        """记录上游返回的token用量"""
+        if not usage:
+            return
+        for kind in ('prompt', 'completion'):
+            tokens = usage.get(f'{kind}_tokens')
+            if tokens:
+                self.inc('feiyi_ai_tokens_total', (model or '', kind), tokens)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 进程存在但属于其他用户
+        return True
+    return True
+
+
+def _read_snapshot(path: str) -> Optional[Dict[str, Dict[str, object]]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(target: Dict[str, Dict[str, object]], data: Dict[str, Dict[str, object]]):
+    """把一份快照累加到 target（计数器相加，直方图逐格相加）"""
+    for name, series in data.items():
+        merged = target.setdefault(name, {})
+        for labels, value in series.items():
+            current = merged.get(labels)
+            if current is None:
+                merged[labels] = value
+            elif isinstance(value, list):
+                merged[labels] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[labels] = current + value
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') + '"'
+        for name, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    _request_queries.set([0, 0.0])
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_started'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    metrics.inc('feiyi_db_statements_total')
+    metrics.inc('feiyi_db_statement_seconds_total', (), elapsed)
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+        queries[1] += elapsed
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
@@ -0,0 +1,208 @@
+"""
+数据模型
+
+数据库实例、模型与分类定义，以及网站与命令行工具共用的数据层组件（全文索引、项目详情读模型）。
+db 在此创建但不绑定应用：网站由 app.create_app() 绑定，导入脚本等命令行工具用 create_db_app()
+得到只配置了数据库的应用，不创建Web组件与AI客户端。
+"""
+from datetime import datetime
+
+from dotenv import load_dotenv
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from database import configure_database
+
+db = SQLAlchemy()
+
+# 数据库模型定义
+class FeiyiItem(db.Model):
+    """非遗项目模型"""
+    __tablename__ = 'feiyi_items'
+    __table_args__ = (
+        # 列表与游标分页按 (created_at, id) 排序
+        db.Index('ix_feiyi_items_created_id', 'created_at', 'id'),
+        db.Index('ix_feiyi_items_category_created_id', 'category_id', 'created_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False, comment='项目名称')
+    category_id = db.Column(db.Integer, nullable=False, comment='分类ID')
+    description = db.Column(db.Text, comment='项目描述')
+    origin_location = db.Column(db.String(100), comment='发源地')
+    historical_background = db.Column(db.Text, comment='历史背景')
+    cultural_value = db.Column(db.Text, comment='文化价值')
+    inheritance_status = db.Column(db.Text, comment='传承状况')
+    protection_measures = db.Column(db.Text, comment='保护措施')
+    protection_level = db.Column(db.String(50), comment='保护级别')
+    representative_inheritor = db.Column(db.String(200), comment='代表性传承人')
+    declaration_date = db.Column(db.String(50), comment='申报时间')
+    images = db.Column(db.Text, comment='相关图片URL，JSON格式')
+    videos = db.Column(db.Text, comment='相关视频URL，JSON格式')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'category_id': self.category_id,
+            'description': self.description,
+            'origin_location': self.origin_location,
+            'historical_background': self.historical_background,
+            'cultural_value': self.cultural_value,
+            'inheritance_status': self.inheritance_status,
+            'protection_measures': self.protection_measures,
+            'protection_level': self.protection_level,
+            'representative_inheritor': self.representative_inheritor,
+            'declaration_date': self.declaration_date,
+            'images': self.images,
+            'videos': self.videos,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class FeiyiKnowledge(db.Model):
+    """非遗知识库模型"""
+    __tablename__ = 'feiyi_knowledge'
+    __table_args__ = (
+        db.Index('ix_feiyi_knowledge_created_id', 'created_at', 'id'),
+        db.Index('ix_feiyi_knowledge_category_created_id', 'category_id', 'created_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(300), nullable=False, comment='知识标题')
+    content = db.Column(db.Text, nullable=False, comment='知识内容')
+    category_id = db.Column(db.Integer, comment='关联分类ID')
+    item_id = db.Column(db.Integer, db.ForeignKey('feiyi_items.id'), comment='关联项目ID')
+    keywords = db.Column(db.String(500), comment='关键词，逗号分隔')
+    source = db.Column(db.String(200), comment='知识来源')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+
+    # 关联关系
+    item = db.relationship('FeiyiItem', backref=db.backref('knowledge_items', lazy=True))
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'content': self.content,
+            'category_id': self.category_id,
+            'item_id': self.item_id,
+            'keywords': self.keywords,
+            'source': self.source,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class UserInteraction(db.Model):
+    """用户交互记录模型"""
+    __tablename__ = 'user_interactions'
+    __table_args__ = (
+        # 按会话重建对话历史
+        db.Index('ix_user_interactions_session_created', 'session_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(100), comment='会话ID')
+    question = db.Column(db.Text, nullable=False, comment='用户问题')
+    answer = db.Column(db.Text, comment='AI回答')
+    category_id = db.Column(db.Integer, comment='相关分类ID')
+    item_id = db.Column(db.Integer, comment='相关项目ID')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'session_id': self.session_id,
+            'question': self.question,
+            'answer': self.answer,
+            'category_id': self.category_id,
+            'item_id': self.item_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+# 非遗分类
+FEIYI_CATEGORIES = [
+    {'id': 1, 'name': '民间文学', 'description': '包括神话、传说、民间故事、民间歌谣、谚语等'},
+    {'id': 2, 'name': '传统音乐', 'description': '包括民间音乐、文人音乐、宫廷音乐、宗教音乐等'},
+    {'id': 3, 'name': '传统舞蹈', 'description': '包括民间舞蹈、宫廷舞蹈、宗教舞蹈等'},
+    {'id': 4, 'name': '传统戏剧', 'description': '包括昆曲、京剧、豫剧、越剧等各种地方戏曲'},
+    {'id': 5, 'name': '曲艺', 'description': '包括相声、评书、快板、大鼓等说唱艺术'},
+    {'id': 6, 'name': '传统体育、游艺与杂技', 'description': '包括武术、龙舟、风筝、杂技等'},
+    {'id': 7, 'name': '传统美术', 'description': '包括绘画、雕塑、建筑装饰、工艺美术等'},
+    {'id': 8, 'name': '传统技艺', 'description': '包括纺织、冶炼、制茶、烹饪、中医药等传统工艺'},
+    {'id': 9, 'name': '传统医药', 'description': '包括中医诊疗法、中药炮制技艺、针灸等'},
+    {'id': 10, 'name': '民俗', 'description': '包括节庆、婚丧嫁娶、祭祀等民间习俗'}
+]
+
+def ensure_indexes():
+    """为已存在的数据表补建模型中声明的索引（create_all 不会修改已有表）"""
+    for model in (FeiyiItem, FeiyiKnowledge, UserInteraction):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def init_db(app, config=None):
+    """
+    为应用配置数据库（DATABASE_URL 及连接参数见 database.py）并绑定 db
+
+    Args:
+        app: Flask应用
+        config: 覆盖的配置项（如测试使用的 SQLALCHEMY_DATABASE_URI）
+    """
+    configure_database(app)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.update(config or {})
+    db.init_app(app)
+
+def create_db_app(config=None):
+    """
+    创建只配置了数据库的Flask应用，供导入脚本与命令行工具使用
+
+    Args:
+        config: 覆盖的配置项
+
+    Returns:
+        Flask应用（未注册路由与Web组件）
+    """
+    load_dotenv()
+    app = Flask(__name__)
+    init_db(app, config)
+    return app
+
+def build_search_indexes(app):
+    """
+    项目与知识的全文索引，随应用内的ORM写入自动同步
+
+    Returns:
+        (项目索引, 知识索引)
+    """
+    from search_index import FullTextIndex
+    item_index = FullTextIndex(
+        app, db, FeiyiItem,
+        ['name', 'description', 'origin_location', 'representative_inheritor',
+         'historical_background', 'cultural_value'],
+        weights=[10.0, 4.0, 2.0, 2.0, 1.0, 1.0]
+    )
+    knowledge_index = FullTextIndex(
+        app, db, FeiyiKnowledge,
+        ['title', 'content', 'keywords'],
+        weights=[8.0, 1.0, 5.0]
+    )
+    return item_index, knowledge_index
+
+def build_item_documents(app):
+    """
+    项目详情读模型，连同它读取的预生成介绍（python introductions.py）与图片衍生图（python media.py）
+
+    介绍存储与图片库分别为返回值的 introductions 与 media 属性。
+    """
+    from introductions import IntroductionStore
+    from media import MediaLibrary
+    from read_model import ItemDocumentStore
+    return ItemDocumentStore(app, db, FeiyiItem, FeiyiKnowledge, FEIYI_CATEGORIES,
+                             introductions=IntroductionStore(app, db), media=MediaLibrary(app, db))
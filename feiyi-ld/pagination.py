@@ -0,0 +1,146 @@
+"""
+游标分页模块
+
+列表接口按 (created_at, id) 倒序做键集分页：游标记录上一页最后一行的排序键，
+下一页以 (created_at, id) < 游标 的条件借助复合索引直接定位，每页代价与翻页深度无关。
+按相关度排序的关键词检索没有稳定的排序键，游标改为记录偏移量（检索结果本身有限）。
+游标对客户端不透明，为URL安全的Base64编码JSON。
+"""
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import event, tuple_
+
+# 单页最大条数
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    """游标格式错误"""
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """将游标内容编码为不透明字符串"""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    解码游标
+
+    Raises:
+        InvalidCursor: 游标无法解析
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'无效的游标: {token}') from e
+    if not isinstance(payload, dict) or not ({'k', 'o'} & payload.keys()):
+        raise InvalidCursor(f'无效的游标: {token}')
+    return payload
+
+
+def paginate_by_cursor(query, model, after: str, per_page: int,
+                       ranked: bool = False) -> Tuple[List[Any], Optional[str]]:
+    """
+    按游标取一页数据
+
+    Args:
+        query: 已完成过滤的查询；ranked为True时须已按相关度排序
+        model: 查询的模型，须有 created_at 与 id 列
+        after: 上一页返回的游标，空字符串表示第一页
+        per_page: 每页条数（上限 MAX_PER_PAGE）
+        ranked: 是否为按相关度排序的检索结果
+
+    Returns:
+        (本页数据, 下一页游标)，没有下一页时游标为None
+
+    Raises:
+        InvalidCursor: 游标无法解析或与查询类型不符
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    cursor = decode_cursor(after) if after else {}
+
+    if ranked:
+        offset = cursor.get('o', 0)
+        if 'k' in cursor or not isinstance(offset, int) or offset < 0:
+            raise InvalidCursor(f'无效的游标: {after}')
+        rows = query.offset(offset).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        return rows, encode_cursor({'o': offset + per_page}) if has_more else None
+
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        try:
+            created_at, row_id = cursor['k']
+            created_at = datetime.fromisoformat(created_at)
+            row_id = int(row_id)
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursor(f'无效的游标: {after}') from e
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not has_more:
+        return rows, None
+    last = rows[-1]
+    return rows, encode_cursor({'k': [last.created_at.isoformat(), last.id]})
+
+
+class CountCache:
+    """列表总数缓存：本进程写入后清空，其他进程的写入在有效期到期后生效"""
+
+    def __init__(self, models, ttl: float = None, max_entries: int = 1024):
+        """
+        初始化总数缓存
+
+        Args:
+            models: 写入时需清空缓存的模型
+            ttl: 缓存有效期（秒）
+            max_entries: 最大条目数，超出时整体清空
+        """
+        self.ttl = ttl or float(os.getenv('FEIYI_COUNT_CACHE_TTL', 60))
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+        for model in models:
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, name, self._on_change)
+
+    def _on_change(self, mapper, connection, target):
+        self.clear()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def count(self, key: Hashable, query) -> int:
+        """
+        返回查询的总行数，命中缓存时不查询数据库
+
+        Args:
+            key: 描述查询条件的可哈希键
+            query: 未排序的查询对象
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry[1]
+
+        total = query.order_by(None).count()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (now, total)
+        return total
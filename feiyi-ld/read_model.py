@@ -0,0 +1,277 @@
+"""
+项目详情读模型
+
+为每个非遗项目维护一份反规范化的详情文档（项目字段、所属分类、关联知识、相关项目、预生成的介绍、图片衍生图），
+存放在 feiyi_item_documents 表中，详情页与详情接口只需一次主键查询。
+文档在项目或知识写入的同一事务中由 SQLAlchemy 事件增量刷新；
+批量写入绕过事件时调用 refresh / rebuild 重建。
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from database import owned_by
+from media import image_names
+
+logger = logging.getLogger(__name__)
+
+# 详情页展示的相关项目数
+RELATED_ITEMS = 4
+
+# 相关项目中保留的字段
+RELATED_ITEM_FIELDS = ('id', 'name', 'category_id', 'description', 'origin_location', 'protection_level')
+
+# 每批重建的项目数
+REFRESH_CHUNK = 500
+
+_PENDING_KEY = 'feiyi_item_documents_pending'
+
+
+def _row_dict(row) -> Dict[str, Any]:
+    """将查询行转为字典，日期时间转为ISO格式"""
+    return {key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row._mapping.items()}
+
+
+class ItemDocumentStore:
+    """项目详情文档的存储与增量刷新"""
+
+    def __init__(self, app, db, item_model, knowledge_model, categories: List[Dict[str, Any]],
+                 introductions=None, media=None):
+        """
+        初始化读模型
+
+        Args:
+            app: Flask应用（在无应用上下文的线程中使用），只随该应用内的ORM写入刷新
+            db: Flask-SQLAlchemy实例
+            item_model: 非遗项目模型
+            knowledge_model: 知识库模型
+            categories: 分类列表
+            introductions: 预生成介绍的存储（可选），介绍随文档一并读取
+            media: 图片库（可选），已生成的衍生图地址随文档一并读取
+        """
+        self.app = app
+        self.db = db
+        self.item_model = item_model
+        self.knowledge_model = knowledge_model
+        self.categories = {category['id']: category for category in categories}
+        self.introductions = introductions
+        self.media = media
+        self.items = item_model.__table__
+        self.knowledge = knowledge_model.__table__
+        # 同一进程创建多个应用（如测试）时沿用已定义的表
+        self.table = db.metadata.tables.get('feiyi_item_documents')
+        if self.table is None:
+            self.table = db.Table(
+                'feiyi_item_documents',
+                db.Column('item_id', db.Integer, primary_key=True, comment='项目ID'),
+                db.Column('category_id', db.Integer, index=True, comment='分类ID'),
+                db.Column('document', db.Text, nullable=False, comment='详情文档，JSON格式'),
+                db.Column('digest', db.String(40), nullable=False, comment='文档摘要，用作缓存校验值'),
+                db.Column('last_modified', db.DateTime, comment='文档所含数据的最近更新时间'),
+                db.Column('refreshed_at', db.DateTime, default=datetime.utcnow, comment='刷新时间'),
+            )
+        self._lock = threading.Lock()
+
+        event.listen(item_model, 'after_insert', self._on_item_change)
+        event.listen(item_model, 'after_update', self._on_item_change)
+        event.listen(item_model, 'after_delete', self._on_item_change)
+        event.listen(knowledge_model, 'after_insert', self._on_knowledge_change)
+        event.listen(knowledge_model, 'after_update', self._on_knowledge_change)
+        event.listen(knowledge_model, 'after_delete', self._on_knowledge_change)
+        event.listen(Session, 'after_flush', self._after_flush)
+
+    # ---- 变更收集：在flush中记录受影响的项目，flush结束后统一刷新 ----
+
+    @staticmethod
+    def _pending(connection) -> Dict[str, Set]:
+        return connection.info.setdefault(_PENDING_KEY, {'items': set(), 'touched': set()})
+
+    @staticmethod
+    def _history_values(target, key: str) -> Set:
+        """属性的当前值与变更前的值"""
+        history = inspect(target).attrs[key].history
+        values = set(history.added or ()) | set(history.deleted or ()) | set(history.unchanged or ())
+        values.add(getattr(target, key))
+        values.discard(None)
+        return values
+
+    def _on_item_change(self, mapper, connection, target):
+        if not owned_by(self.app):
+            return
+        pending = self._pending(connection)
+        pending['items'].add(target.id)
+        for category_id in self._history_values(target, 'category_id'):
+            pending['touched'].add((category_id, target.id))
+
+    def _on_knowledge_change(self, mapper, connection, target):
+        if not owned_by(self.app):
+            return
+        self._pending(connection)['items'].update(self._history_values(target, 'item_id'))
+
+    def _after_flush(self, session, flush_context):
+        if not owned_by(self.app):
+            return
+        connection = session.connection()
+        pending = connection.info.pop(_PENDING_KEY, None)
+        if pending:
+            self.items_changed(connection, pending['items'], pending['touched'])
+
+    def items_changed(self, connection, item_ids: Iterable[int], touched: Iterable[Tuple[int, int]] = ()):
+        """
+        刷新受写入影响的文档
+
+        Args:
+            connection: 所在事务的连接
+            item_ids: 自身或其关联知识发生变化的项目ID
+            touched: 发生写入的项目 (分类ID, 项目ID)，分类取变更前后的值；
+                位于分类相关项目列表内时同分类全部文档都要刷新
+        """
+        item_ids = set(item_ids)
+        heads: Dict[int, List[Dict[str, Any]]] = {}
+        refreshed: Set[int] = set()
+        for category_id, item_id in touched:
+            if category_id in refreshed:
+                continue
+            if category_id not in heads:
+                heads[category_id] = self._category_head(connection, category_id)
+            head = heads[category_id]
+            if len(head) <= RELATED_ITEMS or item_id <= head[-1]['id']:
+                refreshed.add(category_id)
+                item_ids.update(connection.execute(
+                    select(self.items.c.id).where(self.items.c.category_id == category_id)).scalars())
+        self.refresh(item_ids, connection)
+
+    # ---- 文档构建 ----
+
+    def _category_head(self, connection, category_id: int) -> List[Dict[str, Any]]:
+        """分类中按ID排序的前 RELATED_ITEMS+1 个项目（排除自身后取前 RELATED_ITEMS 个作为相关项目）"""
+        columns = [self.items.c[name] for name in RELATED_ITEM_FIELDS]
+        rows = connection.execute(
+            select(*columns).where(self.items.c.category_id == category_id)
+            .order_by(self.items.c.id).limit(RELATED_ITEMS + 1))
+        return [_row_dict(row) for row in rows]
+
+    def _build(self, item: Dict[str, Any], knowledge: List[Dict[str, Any]],
+               head: List[Dict[str, Any]], introduction: Optional[str] = None,
+               media: Optional[List[Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], Optional[datetime]]:
+        """组装文档，返回 (文档, 所含数据的最近更新时间)"""
+        related = [r for r in head if r['id'] != item['id']][:RELATED_ITEMS]
+        document = {
+            'item': item,
+            'category': self.categories.get(item['category_id']),
+            'related_knowledge': knowledge,
+            'related_items': related,
+            'introduction': introduction,
+            'media': media or []
+        }
+        stamps = [item.get('updated_at')] + [k.get('updated_at') for k in knowledge]
+        stamps = [s for s in stamps if s]
+        last_modified = datetime.fromisoformat(max(stamps)) if stamps else None
+        return document, last_modified
+
+    def refresh(self, item_ids: Iterable[int], connection=None):
+        """
+        重建指定项目的文档，已删除的项目删除其文档
+
+        Args:
+            item_ids: 项目ID
+            connection: 所在事务的连接，省略时新开事务
+        """
+        item_ids = sorted(set(item_ids))
+        if not item_ids:
+            return
+        if connection is None:
+            with self.db.engine.begin() as conn:
+                return self.refresh(item_ids, conn)
+
+        heads: Dict[int, List[Dict[str, Any]]] = {}
+        for start in range(0, len(item_ids), REFRESH_CHUNK):
+            chunk = item_ids[start:start + REFRESH_CHUNK]
+            items = [_row_dict(row) for row in connection.execute(
+                select(self.items).where(self.items.c.id.in_(chunk)))]
+            knowledge: Dict[int, List[Dict[str, Any]]] = {}
+            for row in connection.execute(select(self.knowledge).where(
+                    self.knowledge.c.item_id.in_(chunk)).order_by(self.knowledge.c.id)):
+                knowledge.setdefault(row.item_id, []).append(_row_dict(row))
+            introductions = self.introductions.load(connection, 'item', chunk) if self.introductions else {}
+            media = {}
+            if self.media:
+                media = self.media.load(connection, [name for item in items for name in image_names(item['images'])])
+
+            rows = []
+            for item in items:
+                category_id = item['category_id']
+                if category_id not in heads:
+                    heads[category_id] = self._category_head(connection, category_id)
+                document, last_modified = self._build(
+                    item, knowledge.get(item['id'], []), heads[category_id], introductions.get(item['id']),
+                    self.media.pictures(item['images'], media) if self.media else None)
+                payload = json.dumps(document, ensure_ascii=False, sort_keys=True)
+                rows.append({
+                    'item_id': item['id'],
+                    'category_id': category_id,
+                    'document': payload,
+                    'digest': hashlib.sha1(payload.encode('utf-8')).hexdigest(),
+                    'last_modified': last_modified,
+                    'refreshed_at': datetime.utcnow()
+                })
+
+            # 先删后插，兼容各数据库；不存在的项目只删除
+            connection.execute(self.table.delete().where(self.table.c.item_id.in_(chunk)))
+            if rows:
+                connection.execute(self.table.insert(), rows)
+        logger.debug(f"已刷新 {len(item_ids)} 个项目详情文档")
+
+    def rebuild(self):
+        """重建全部文档"""
+        if not has_app_context():
+            with self.app.app_context():
+                return self.rebuild()
+        with self.db.engine.begin() as connection:
+            connection.execute(self.table.delete())
+            item_ids = list(connection.execute(select(self.items.c.id)).scalars())
+            self.refresh(item_ids, connection)
+        logger.info(f"项目详情文档已重建: {len(item_ids)} 个")
+
+    # ---- 读取 ----
+
+    def _fetch(self, item_id: int, columns):
+        if not has_app_context():
+            with self.app.app_context():
+                return self._fetch(item_id, columns)
+        row = self.db.session.execute(
+            select(*columns).where(self.table.c.item_id == item_id)).first()
+        if row is not None:
+            return row
+        # 文档缺失（如读模型上线前的数据）时按需补建
+        if self.db.session.get(self.item_model, item_id) is None:
+            return None
+        with self._lock:
+            self.refresh([item_id])
+        return self.db.session.execute(
+            select(*columns).where(self.table.c.item_id == item_id)).first()
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """
+        读取项目详情文档
+
+        Returns:
+            {'item', 'category', 'related_knowledge', 'related_items', 'introduction', 'media'}，项目不存在时返回None
+        """
+        row = self._fetch(item_id, [self.table.c.document])
+        return json.loads(row.document) if row is not None else None
+
+    def version(self, item_id: int) -> Tuple[Optional[datetime], str]:
+        """文档的 (最近更新时间, 摘要)，用作HTTP缓存校验值"""
+        row = self._fetch(item_id, [self.table.c.last_modified, self.table.c.digest])
+        if row is None:
+            return None, 'missing'
+        return row.last_modified, row.digest
@@ -0,0 +1,202 @@
+"""
+本地知识检索模块
+
+基于全文索引（BM25）从知识库与非遗项目中召回与问题相关的段落：
+高置信度命中时直接以知识库内容作答，其余情况将相关段落注入提示词，
+在不调用大模型或缩短提示词的前提下回答问题。
+索引随模型写入由 search_index 自动增量更新。
+"""
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from flask import has_app_context
+
+from search_index import tokenize, build_any_match_query
+
+logger = logging.getLogger(__name__)
+
+# 问句中的虚词与疑问用字，含这些字的二元组不参与召回与置信度计算
+QUESTION_STOP_CHARS = set('的了是吗呢吧啊呀么什哪些怎样如何为请问介绍一下和与及或你我他她它们这那个有在')
+
+_CJK_CHAR_RE = re.compile('[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+_LATIN_WORD_RE = re.compile('[A-Za-z0-9]+')
+
+
+def estimate_tokens(value: str) -> int:
+    """粗略估算文本的token数：每个汉字约1个，每个拉丁词约1.3个"""
+    if not value:
+        return 0
+    return len(_CJK_CHAR_RE.findall(value)) + int(len(_LATIN_WORD_RE.findall(value)) * 1.3)
+
+
+def question_terms(question: str) -> List[str]:
+    """将问题切分为去除虚词后的检索词项"""
+    terms = []
+    for term in tokenize(question).split():
+        if len(term) == 2 and _CJK_CHAR_RE.match(term) and (set(term) & QUESTION_STOP_CHARS):
+            continue
+        if len(term) == 1 and term in QUESTION_STOP_CHARS:
+            continue
+        terms.append(term)
+    return list(dict.fromkeys(terms))
+
+
+def _coverage(terms: List[str], value: str) -> float:
+    """词项在文本中的覆盖比例"""
+    if not terms:
+        return 0.0
+    present = set(tokenize(value).split())
+    return sum(1 for t in terms if t in present) / len(terms)
+
+
+@dataclass
+class Passage:
+    """召回的知识段落"""
+    source: str
+    id: int
+    title: str
+    text: str
+    reference: Optional[str] = None
+    score: float = 0.0
+
+    def render(self) -> str:
+        """渲染为注入提示词的文本"""
+        return f"【{self.title}】{self.text}"
+
+
+@dataclass
+class RetrievalResult:
+    """检索结果"""
+    passages: List[Passage] = field(default_factory=list)
+    confidence: float = 0.0
+    direct_answer: Optional[str] = None
+
+    def context(self) -> str:
+        """拼接后的参考资料文本"""
+        return '\n'.join(f"[{i}] {p.render()}" for i, p in enumerate(self.passages, 1))
+
+
+class KnowledgeRetriever:
+    """知识库与非遗项目的本地检索器"""
+
+    def __init__(self, app, item_index, knowledge_index,
+                 token_budget: int = None,
+                 top_k: int = None,
+                 direct_threshold: float = None,
+                 enabled: bool = None):
+        """
+        初始化检索器
+
+        Args:
+            app: Flask应用（在无应用上下文的线程中检索时使用）
+            item_index: 非遗项目全文索引
+            knowledge_index: 知识库全文索引
+            token_budget: 注入提示词的段落token预算
+            top_k: 每个索引召回的候选数
+            direct_threshold: 直接作答所需的最低置信度（0~1）
+            enabled: 是否启用检索
+        """
+        self.app = app
+        self.item_index = item_index
+        self.knowledge_index = knowledge_index
+        self.token_budget = token_budget or int(os.getenv('FEIYI_RETRIEVAL_TOKEN_BUDGET', 800))
+        self.top_k = top_k or int(os.getenv('FEIYI_RETRIEVAL_TOP_K', 5))
+        self.direct_threshold = direct_threshold or float(os.getenv('FEIYI_RETRIEVAL_DIRECT_THRESHOLD', 0.85))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_RETRIEVAL_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+    def _item_passage(self, item) -> Passage:
+        parts = [item.description, item.historical_background, item.cultural_value, item.inheritance_status]
+        return Passage('item', item.id, item.name, '\n'.join(p for p in parts if p))
+
+    def _knowledge_passage(self, knowledge) -> Passage:
+        return Passage('knowledge', knowledge.id, knowledge.title, knowledge.content or '',
+                       reference=knowledge.source)
+
+    def _candidates(self, match: str) -> List[Passage]:
+        """从两个索引召回候选段落，保持各自的BM25顺序"""
+        candidates = []
+        for index, to_passage in ((self.knowledge_index, self._knowledge_passage),
+                                  (self.item_index, self._item_passage)):
+            ranked = index.top(match, self.top_k)
+            if not ranked:
+                continue
+            rows = {row.id: row for row in index.model.query.filter(
+                index.model.id.in_([row_id for row_id, _ in ranked])).all()}
+            for row_id, _ in ranked:
+                if row_id in rows:
+                    candidates.append(to_passage(rows[row_id]))
+        return candidates
+
+    @staticmethod
+    def _relevance(terms: List[str], passage: Passage) -> float:
+        """问题词项在段落中的覆盖率与段落标题词项被问题覆盖的比例的平均值"""
+        title_terms = question_terms(passage.title)
+        title_coverage = sum(1 for t in title_terms if t in terms) / max(len(title_terms), 1)
+        return (title_coverage + _coverage(terms, f'{passage.title}\n{passage.text}')) / 2
+
+    def retrieve(self, question: str) -> RetrievalResult:
+        """
+        检索与问题相关的段落
+
+        候选由BM25召回，再按标题与正文的词项覆盖程度重排，
+        最佳段落的得分即为置信度。
+
+        Args:
+            question: 用户问题
+
+        Returns:
+            检索结果，高置信度时 direct_answer 非空
+        """
+        if not self.enabled:
+            return RetrievalResult()
+        if not has_app_context():
+            with self.app.app_context():
+                return self.retrieve(question)
+
+        terms = question_terms(question)
+        match = build_any_match_query(terms)
+        if not match:
+            return RetrievalResult()
+
+        try:
+            candidates = self._candidates(match)
+        except Exception as e:
+            logger.warning(f"本地知识检索失败: {e}")
+            return RetrievalResult()
+        if not candidates:
+            return RetrievalResult()
+
+        for rank, passage in enumerate(candidates):
+            passage.score = self._relevance(terms, passage) - rank * 1e-3
+        candidates.sort(key=lambda p: p.score, reverse=True)
+
+        best = candidates[0]
+        confidence = round(self._relevance(terms, best), 4)
+        direct_answer = self.compose_answer(best) if confidence >= self.direct_threshold else None
+
+        # 在token预算内依次收录段落，最后一段按剩余预算截断
+        passages, remaining = [], self.token_budget
+        for passage in candidates:
+            cost = estimate_tokens(passage.render())
+            if cost > remaining:
+                if remaining >= 50:
+                    ratio = remaining / cost
+                    passage.text = passage.text[:int(len(passage.text) * ratio)] + '…'
+                    passages.append(passage)
+                break
+            passages.append(passage)
+            remaining -= cost
+
+        return RetrievalResult(passages=passages, confidence=confidence, direct_answer=direct_answer)
+
+    def compose_answer(self, passage: Passage) -> str:
+        """由知识段落组织直接回答"""
+        answer = f"{passage.title}\n\n{passage.text}"
+        if passage.reference:
+            answer += f"\n\n（资料来源：{passage.reference}）"
+        return answer
@@ -0,0 +1,331 @@
+"""
+全文检索模块（SQLite FTS5 + 中文二元切分）
+"""
+import re
+import sqlite3
+import threading
+import logging
+from typing import List, Optional, Sequence
+
+from markupsafe import escape
+from sqlalchemy import event, text, table, column
+from sqlalchemy.engine import Engine
+
+from database import owned_by
+
+logger = logging.getLogger(__name__)
+
+# 中日韩统一表意文字（含扩展A区与兼容区）
+_CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_SEGMENT_RE = re.compile(rf'[{_CJK}]+|[^\W_{_CJK}]+')
+
+# 注册到每个SQLite连接上的分词函数名
+TOKENIZE_FUNCTION = 'feiyi_tokenize'
+
+
+def _segments(value: str):
+    """按中文连续片段与拉丁词切分文本"""
+    for match in _SEGMENT_RE.finditer(value or ''):
+        segment = match.group(0)
+        yield segment, bool(re.match(rf'[{_CJK}]', segment))
+
+
+def tokenize(value: Optional[str]) -> str:
+    """
+    将文本转换为FTS5可索引的词串
+
+    中文连续片段切分为重叠的二元组（单字片段保留原字），
+    拉丁字母与数字按词保留并转为小写，结果以空格分隔。
+    """
+    if not value:
+        return ''
+    tokens = []
+    for segment, is_cjk in _segments(value):
+        if is_cjk and len(segment) > 1:
+            tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            tokens.append(segment.lower())
+    return ' '.join(tokens)
+
+
+def build_match_query(keyword: str) -> Optional[str]:
+    """
+    将用户关键词转换为FTS5 MATCH表达式
+
+    每个中文片段转为由二元组组成的短语（等价于子串匹配），
+    拉丁词使用前缀匹配，各片段之间为AND关系。
+    含单个汉字的片段无法由二元组索引表达，返回None由调用方回退到LIKE。
+    """
+    clauses = []
+    for segment, is_cjk in _segments(keyword):
+        if is_cjk:
+            if len(segment) < 2:
+                return None
+            bigrams = [segment[i:i + 2] for i in range(len(segment) - 1)]
+            clauses.append('"%s"' % ' '.join(bigrams))
+        else:
+            clauses.append('"%s"*' % segment.lower())
+    return ' '.join(clauses) or None
+
+
+def build_any_match_query(terms: Sequence[str]) -> Optional[str]:
+    """
+    构建任一词项命中即可的FTS5 MATCH表达式（OR），用于自然语言问题的候选召回
+
+    Args:
+        terms: 已切分的词项（中文二元组或小写拉丁词）
+    """
+    quoted = ['"%s"' % t.replace('"', '') for t in dict.fromkeys(terms) if t]
+    return ' OR '.join(quoted) or None
+
+
+def search_terms(keyword: str) -> List[str]:
+    """提取用于高亮的关键词片段"""
+    return [segment for segment, _ in _segments(keyword)]
+
+
+def highlight(value: Optional[str], keyword: str, width: int = 80) -> str:
+    """
+    生成带<mark>高亮的摘要片段
+
+    Args:
+        value: 原始文本
+        keyword: 搜索关键词
+        width: 摘要长度（字符数）
+
+    Returns:
+        已转义的HTML摘要
+    """
+    if not value:
+        return ''
+    terms = search_terms(keyword)
+    if not terms:
+        return str(escape(value[:width]))
+
+    pattern = re.compile('|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)),
+                         re.IGNORECASE)
+    first = pattern.search(value)
+    start = max(0, first.start() - width // 4) if first else 0
+    end = min(len(value), start + width)
+    window = value[start:end]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(window):
+        parts.append(str(escape(window[last:match.start()])))
+        parts.append('<mark>%s</mark>' % escape(match.group(0)))
+        last = match.end()
+    parts.append(str(escape(window[last:])))
+
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(value) else '')
+
+
+@event.listens_for(Engine, 'connect')
+def _register_tokenizer(dbapi_connection, connection_record):
+    """为每个SQLite连接注册分词函数，供索引重建语句使用"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(TOKENIZE_FUNCTION, 1, tokenize, deterministic=True)
+
+
+class FullTextIndex:
+    """基于FTS5的模型全文索引，随ORM写入自动同步"""
+
+    def __init__(self, app, db, model, fields: Sequence[str], weights: Sequence[float] = None):
+        """
+        初始化全文索引
+
+        Args:
+            app: 所属Flask应用，只同步该应用内的ORM写入
+            db: Flask-SQLAlchemy实例
+            model: 被索引的模型类
+            fields: 参与检索的列名，顺序即FTS5列顺序
+            weights: 各列的BM25权重
+        """
+        self.app = app
+        self.db = db
+        self.model = model
+        self.fields = list(fields)
+        self.weights = list(weights or [1.0] * len(self.fields))
+        self.base_table = model.__tablename__
+        self.name = f'{self.base_table}_fts'
+        self.fts = table(self.name, column('rowid'), column('rank'))
+
+        self._ready = False
+        self._enabled = True
+        self._lock = threading.Lock()
+
+        for name in ('after_insert', 'after_update'):
+            event.listen(model, name, self._on_upsert)
+        event.listen(model, 'after_delete', self._on_delete)
+
+    @property
+    def enabled(self) -> bool:
+        """索引是否可用（非SQLite或缺少FTS5时为False）"""
+        return self._enabled
+
+    def _select_tokenized(self) -> str:
+        columns = ', '.join(f'{TOKENIZE_FUNCTION}({f})' for f in self.fields)
+        return f'SELECT id, {columns} FROM {self.base_table}'
+
+    def ensure_ready(self, connection=None) -> bool:
+        """
+        确保索引表存在且与基表一致
+
+        首次调用时建表；若索引行数与基表不一致则整体重建。
+
+        Returns:
+            索引是否可用
+        """
+        if self._ready:
+            return self._enabled
+        if connection is None:
+            with self.db.engine.begin() as conn:
+                return self.ensure_ready(conn)
+
+        with self._lock:
+            if self._ready:
+                return self._enabled
+            if connection.dialect.name != 'sqlite':
+                logger.info(f"数据库非SQLite，{self.name} 使用LIKE检索")
+                self._enabled = False
+                self._ready = True
+                return False
+
+            has_base = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+                {'name': self.base_table}
+            ).first()
+            if not has_base:
+                # 基表尚未创建，等待下一次调用
+                return False
+
+            try:
+                exists = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+                    {'name': self.name}
+                ).first()
+                if not exists:
+                    columns = ', '.join(self.fields)
+                    connection.execute(text(
+                        f"CREATE VIRTUAL TABLE {self.name} USING fts5({columns}, tokenize='unicode61')"
+                    ))
+                    ranking = ', '.join(str(w) for w in self.weights)
+                    connection.execute(text(
+                        f"INSERT INTO {self.name}({self.name}, rank) VALUES('rank', 'bm25({ranking})')"
+                    ))
+                indexed = connection.execute(text(f"SELECT count(*) FROM {self.name}")).scalar()
+                total = connection.execute(text(f"SELECT count(*) FROM {self.base_table}")).scalar()
+                if not exists or indexed != total:
+                    self._rebuild(connection)
+            except Exception as e:
+                logger.warning(f"FTS5不可用，{self.name} 使用LIKE检索: {e}")
+                self._enabled = False
+
+            self._ready = True
+            return self._enabled
+
+    def _rebuild(self, connection):
+        connection.execute(text(f"DELETE FROM {self.name}"))
+        columns = ', '.join(self.fields)
+        connection.execute(text(
+            f"INSERT INTO {self.name}(rowid, {columns}) {self._select_tokenized()}"
+        ))
+        logger.info(f"全文索引 {self.name} 已重建")
+
+    def rebuild(self):
+        """从基表整体重建索引"""
+        with self.db.engine.begin() as conn:
+            if self.ensure_ready(conn):
+                self._rebuild(conn)
+
+    def reindex(self, ids: Sequence[int], connection=None):
+        """
+        增量刷新指定行的索引
+
+        供绕过ORM事件的批量写入（如bulk insert/update）在提交后调用。
+        """
+        if not ids:
+            return
+        if connection is None:
+            with self.db.engine.begin() as conn:
+                return self.reindex(ids, conn)
+        if not self.ensure_ready(connection):
+            return
+        columns = ', '.join(self.fields)
+        for start in range(0, len(ids), 500):
+            chunk = ','.join(str(int(i)) for i in ids[start:start + 500])
+            connection.execute(text(f"DELETE FROM {self.name} WHERE rowid IN ({chunk})"))
+            connection.execute(text(
+                f"INSERT INTO {self.name}(rowid, {columns}) "
+                f"{self._select_tokenized()} WHERE id IN ({chunk})"
+            ))
+
+    def _on_upsert(self, mapper, connection, target):
+        if not owned_by(self.app) or not self.ensure_ready(connection):
+            return
+        connection.execute(text(f"DELETE FROM {self.name} WHERE rowid = :id"), {'id': target.id})
+        placeholders = ', '.join(f':{f}' for f in self.fields)
+        params = {f: tokenize(getattr(target, f)) for f in self.fields}
+        params['id'] = target.id
+        connection.execute(text(
+            f"INSERT INTO {self.name}(rowid, {', '.join(self.fields)}) VALUES(:id, {placeholders})"
+        ), params)
+
+    def _on_delete(self, mapper, connection, target):
+        if not owned_by(self.app) or not self.ensure_ready(connection):
+            return
+        connection.execute(text(f"DELETE FROM {self.name} WHERE rowid = :id"), {'id': target.id})
+
+    def search(self, query, keyword: str):
+        """
+        对查询应用关键词检索
+
+        索引可用时按BM25相关度排序；否则回退为LIKE过滤并按创建时间倒序。
+
+        Args:
+            query: 模型的查询对象
+            keyword: 搜索关键词
+
+        Returns:
+            过滤并排序后的查询对象
+        """
+        match = build_match_query(keyword)
+        if match and self.ensure_ready():
+            return query.join(self.fts, self.fts.c.rowid == self.model.id) \
+                .filter(text(f"{self.name} MATCH :match").bindparams(match=match)) \
+                .order_by(self.fts.c.rank, self.model.id)
+
+        condition = None
+        for f in self.fields:
+            clause = getattr(self.model, f).contains(keyword)
+            condition = clause if condition is None else condition | clause
+        return query.filter(condition).order_by(self.model.created_at.desc())
+
+    def top(self, match: str, limit: int = 10) -> List[tuple]:
+        """
+        按BM25返回最相关的行
+
+        Args:
+            match: FTS5 MATCH表达式
+            limit: 返回条数
+
+        Returns:
+            (行ID, BM25得分) 列表，得分越小越相关；索引不可用时为空
+        """
+        if not match or not self.ensure_ready():
+            return []
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(text(
+                f"SELECT rowid, rank FROM {self.name} WHERE {self.name} MATCH :match "
+                f"ORDER BY rank LIMIT :limit"
+            ), {'match': match, 'limit': limit}).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def snippet(self, obj, keyword: str, width: int = 80) -> str:
+        """取第一个命中关键词的正文字段生成高亮摘要（标题字段最后考虑）"""
+        terms = [t.lower() for t in search_terms(keyword)]
+        for f in self.fields[1:] + self.fields[:1]:
+            value = getattr(obj, f) or ''
+            if any(t in value.lower() for t in terms):
+                return highlight(value, keyword, width)
+        return highlight(getattr(obj, self.fields[0]), keyword, width)
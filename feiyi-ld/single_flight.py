@@ -0,0 +1,358 @@
+"""
+相同问题的请求合并（single-flight）模块
+
+同一时刻多个用户提出归一化后相同的问题时，只发起一次上游调用：
+- 进程内：第一个请求成为领头者，其余请求等待领头者的结果；
+- 跨进程：领头者在共享的回答缓存中为该问题加锁，其他工作进程的领头者轮询缓存，
+  回答写入后直接返回；锁被释放却没有回答（上游失败）时再自行尝试。
+等待超过上限时各自调用上游，锁带有效期，持有进程崩溃也不会永久阻塞。
+高峰期的上游调用数由不同问题的数量决定，而非用户数。
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from answer_cache import AnswerCache
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """进程内一次进行中的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        # 成功时为完整回答，失败或中断时为None
+        self.answer = None
+
+
+class SingleFlight:
+    """以回答缓存为共享存储的请求合并器"""
+
+    def __init__(self, cache: AnswerCache,
+                 wait_timeout: float = None,
+                 poll_interval: float = None,
+                 lock_ttl: float = None,
+                 enabled: bool = None):
+        """
+        初始化请求合并器
+
+        Args:
+            cache: 共享回答缓存，成功的回答写入其中，跨进程锁也保存在其中
+            wait_timeout: 跟随者最长等待时间（秒），超时后自行调用上游
+            poll_interval: 跨进程等待时轮询缓存的间隔（秒）
+            lock_ttl: 跨进程锁的有效期（秒），应大于一次上游调用（含重试）的最长耗时
+            enabled: 为False时每个请求各自调用上游
+        """
+        self.cache = cache
+        self.wait_timeout = wait_timeout or float(os.getenv('FEIYI_SINGLE_FLIGHT_WAIT', 60))
+        self.poll_interval = poll_interval or float(os.getenv('FEIYI_SINGLE_FLIGHT_POLL_INTERVAL', 0.25))
+        self.lock_ttl = lock_ttl or float(os.getenv('FEIYI_SINGLE_FLIGHT_LOCK_TTL', 90))
+        if enabled is None:
+            enabled = os.getenv('FEIYI_SINGLE_FLIGHT_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'followers': 0, 'remote_followers': 0, 'remote_hits': 0, 'timeouts': 0}
+
+    def _incr(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _store(self, question: str, model: str, system_prompt: str, answer: Optional[str]):
+        if answer:
+            self.cache.set(question, model, system_prompt, answer)
+
+    def _try_turn(self, key: str, token: str) -> Tuple[bool, Optional[str]]:
+        """
+        尝试取得跨进程领头权
+
+        Returns:
+            (是否取得锁, 其他进程已写入的回答)
+        """
+        if self.cache.try_lock(key, token, self.lock_ttl):
+            # 加锁前其他进程可能刚写入回答
+            answer = self.cache.peek(key)
+            if answer is not None:
+                self.cache.unlock(key, token)
+            return answer is None, answer
+        return False, None
+
+    def _poll(self, key: str) -> Tuple[bool, Optional[str]]:
+        """
+        跨进程等待中的一次检查
+
+        Returns:
+            (是否应停止等待, 已写入的回答)
+        """
+        answer = self.cache.peek(key)
+        if answer is not None:
+            self._incr('remote_hits')
+            return True, answer
+        return not self.cache.is_locked(key), None
+
+    def _acquire(self, key: str, token: str) -> Tuple[bool, Optional[str]]:
+        """
+        等待跨进程领头权或其他进程的回答
+
+        Returns:
+            (是否持有锁, 回答)；二者皆无表示等待超时，调用方直接调用上游
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        waiting = False
+        while True:
+            locked, answer = self._try_turn(key, token)
+            if locked or answer is not None:
+                return locked, answer
+            if not waiting:
+                waiting = True
+                self._incr('remote_followers')
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                released, answer = self._poll(key)
+                if answer is not None:
+                    return False, answer
+                if released:
+                    break
+            else:
+                self._incr('timeouts')
+                return False, None
+
+    async def _acquire_async(self, key: str, token: str) -> Tuple[bool, Optional[str]]:
+        """_acquire 的协程版本，SQLite查询在线程中执行，不阻塞事件循环"""
+        deadline = time.monotonic() + self.wait_timeout
+        waiting = False
+        while True:
+            locked, answer = await asyncio.to_thread(self._try_turn, key, token)
+            if locked or answer is not None:
+                return locked, answer
+            if not waiting:
+                waiting = True
+                self._incr('remote_followers')
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                released, answer = await asyncio.to_thread(self._poll, key)
+                if answer is not None:
+                    return False, answer
+                if released:
+                    break
+            else:
+                self._incr('timeouts')
+                return False, None
+
+    def _join(self, key: str) -> Tuple[bool, _Flight]:
+        """加入进程内的调用，返回(是否为领头者, 调用)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats['followers'] += 1
+                return False, flight
+            flight = self._flights[key] = _Flight()
+            self._stats['leaders'] += 1
+            return True, flight
+
+    def _leave(self, key: str, flight: _Flight, answer: Optional[str]):
+        flight.answer = answer
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    @staticmethod
+    def _success(answer: str) -> Dict[str, Any]:
+        return {'success': True, 'content': answer, 'coalesced': True}
+
+    def run(self, question: str, model: str, system_prompt: str,
+            call: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        合并执行一次聊天完成调用，成功的回答写入缓存
+
+        Args:
+            question: 用户问题（归一化后作为合并键）
+            model: 模型名称
+            system_prompt: 系统提示
+            call: 实际的上游调用，返回 chat_completion 结构的结果
+
+        Returns:
+            chat_completion 结构的结果，跟随者得到领头者的回答
+        """
+        if not self.enabled:
+            result = call()
+            if result.get('success'):
+                self._store(question, model, system_prompt, result['content'])
+            return result
+
+        key = self.cache.make_key(question, model, system_prompt)
+        leader, flight = self._join(key)
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and flight.answer is not None:
+                return self._success(flight.answer)
+            return call()
+
+        result = None
+        token = uuid.uuid4().hex
+        locked = False
+        try:
+            locked, answer = self._acquire(key, token)
+            if answer is not None:
+                result = self._success(answer)
+            else:
+                result = call()
+                if result.get('success'):
+                    self._store(question, model, system_prompt, result['content'])
+            return result
+        finally:
+            if locked:
+                self.cache.unlock(key, token)
+            self._leave(key, flight, result['content'] if result is not None and result.get('success') else None)
+
+    async def run_async(self, question: str, model: str, system_prompt: str,
+                        call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """run 的协程版本，进程内的跟随者在事件循环中等待"""
+        if not self.enabled:
+            result = await call()
+            if result.get('success'):
+                await asyncio.to_thread(self._store, question, model, system_prompt, result['content'])
+            return result
+
+        key = self.cache.make_key(question, model, system_prompt)
+        future = self._async_flights.get(key)
+        if future is not None:
+            self._incr('followers')
+            try:
+                answer = await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+            except asyncio.TimeoutError:
+                answer = None
+            return self._success(answer) if answer is not None else await call()
+
+        future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        self._incr('leaders')
+        result = None
+        token = uuid.uuid4().hex
+        locked = False
+        try:
+            locked, answer = await self._acquire_async(key, token)
+            if answer is not None:
+                result = self._success(answer)
+            else:
+                result = await call()
+                if result.get('success'):
+                    await asyncio.to_thread(self._store, question, model, system_prompt, result['content'])
+            return result
+        finally:
+            self._async_flights.pop(key, None)
+            future.set_result(result['content'] if result is not None and result.get('success') else None)
+            if locked:
+                await asyncio.to_thread(self.cache.unlock, key, token)
+
+    def stream(self, question: str, model: str, system_prompt: str,
+               start: Callable[[Callable[[str], None]], Iterator[str]]) -> Iterator[str]:
+        """
+        合并执行一次流式调用
+
+        领头者逐段转发上游内容；跟随者等待领头者完成后一次性得到完整回答，
+        领头者失败或中断时自行发起流式调用。
+
+        Args:
+            question: 用户问题
+            model: 模型名称
+            system_prompt: 系统提示
+            start: 以完成回调为参数发起流式调用，流正常结束时须以完整回答调用该回调
+
+        Yields:
+            回答内容增量
+        """
+        def store(answer):
+            self._store(question, model, system_prompt, answer)
+
+        if not self.enabled:
+            yield from start(store)
+            return
+
+        key = self.cache.make_key(question, model, system_prompt)
+        leader, flight = self._join(key)
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and flight.answer is not None:
+                yield flight.answer
+            else:
+                yield from start(store)
+            return
+
+        completed = []
+        token = uuid.uuid4().hex
+        locked = False
+
+        def complete(answer):
+            completed.append(answer)
+            store(answer)
+
+        try:
+            locked, answer = self._acquire(key, token)
+            if answer is not None:
+                completed.append(answer)
+                yield answer
+            else:
+                yield from start(complete)
+        finally:
+            if locked:
+                self.cache.unlock(key, token)
+            self._leave(key, flight, completed[0] if completed else None)
+
+    async def stream_async(self, question: str, model: str, system_prompt: str,
+                           start: Callable[[Callable[[str], None]], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """stream 的协程版本，回答在流结束后于线程中写入缓存"""
+        async def relay(completed):
+            async for delta in start(completed.append):
+                yield delta
+            if completed:
+                await asyncio.to_thread(self._store, question, model, system_prompt, completed[0])
+
+        if not self.enabled:
+            async for delta in relay([]):
+                yield delta
+            return
+
+        key = self.cache.make_key(question, model, system_prompt)
+        future = self._async_flights.get(key)
+        if future is not None:
+            self._incr('followers')
+            try:
+                answer = await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+            except asyncio.TimeoutError:
+                answer = None
+            if answer is not None:
+                yield answer
+            else:
+                async for delta in relay([]):
+                    yield delta
+            return
+
+        future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        self._incr('leaders')
+        completed = []
+        token = uuid.uuid4().hex
+        locked = False
+
+        try:
+            locked, answer = await self._acquire_async(key, token)
+            if answer is not None:
+                completed.append(answer)
+                yield answer
+            else:
+                async for delta in relay(completed):
+                    yield delta
+        finally:
+            self._async_flights.pop(key, None)
+            future.set_result(completed[0] if completed else None)
+            if locked:
+                await asyncio.to_thread(self.cache.unlock, key, token)
+
+    def stats(self) -> Dict[str, int]:
+        """领头者、进程内跟随者、跨进程等待及其命中与超时计数"""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._flights) + len(self._async_flights))
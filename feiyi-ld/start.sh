@@ -6,4 +6,4 @@ echo "🛑 停止服务: 按 Ctrl+C"
 echo ""
 
 source venv/bin/activate
-gunicorn --bind 0.0.0.0:5000 --workers 2 app:app
\ No newline at end of file
+gunicorn -c gunicorn.conf.py
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+应用启动模块
+
+app.create_app() 创建应用并注册各组件，组件的重量级状态都在首次使用时才建立：
+全文索引检查、关键词自动机、分类统计、模板编译以及页面与接口的响应缓存，首批请求要为此多等一段时间。
+本模块集中处理入口进程的启动：
+- load_app()：配置日志、创建应用并预热，开启运行指标，供 asgi.py 与 gunicorn 使用；
+- warmup()：预先建立上述状态，并以测试客户端请求热点页面，填充响应缓存与压缩缓存；
+- after_fork()：gunicorn preload 模式（gunicorn.conf.py）下创建与预热只在主进程执行一次，
+  fork 出的工作进程写时复制共享这些只读状态，只需丢弃继承的数据库连接。
+
+配置（环境变量）：
+- FEIYI_WARMUP：设为 0 时 load_app() 不预热
+- FEIYI_WARMUP_PATHS：预热请求的路径，逗号分隔（默认首页、分类页、各分类详情页与分类接口）
+- FEIYI_LOG_LEVEL：入口配置的日志级别（INFO）
+
+用法：
+    python startup.py            # 创建应用并预热一次，输出各阶段耗时
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+
+# 预热请求的 Accept-Encoding，与常见浏览器一致，压缩缓存按此编码填充
+WARMUP_ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() not in ('0', 'false', 'no')
+
+
+def configure_logging(level: str = None):
+    """入口进程的日志配置，根日志器已配置时不生效"""
+    logging.basicConfig(level=(level or os.getenv('FEIYI_LOG_LEVEL', 'INFO')).upper(), format=LOG_FORMAT)
+
+
+def warmup_paths() -> List[str]:
+    """预热请求的路径"""
+    configured = os.getenv('FEIYI_WARMUP_PATHS', '').strip()
+    if configured:
+        return [path.strip() for path in configured.split(',') if path.strip()]
+    from models import FEIYI_CATEGORIES
+    paths = ['/', '/categories', '/api/categories', '/api/categories?stats=1']
+    paths.extend(f"/category/{category['id']}" for category in FEIYI_CATEGORIES)
+    return paths
+
+
+def _stage(timings: Dict[str, Any], name: str, func):
+    """执行一个预热阶段并记录耗时，失败只记录警告（如数据库尚未迁移）"""
+    started = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        logger.warning(f"预热 {name} 失败: {e}")
+    timings[name] = round(time.perf_counter() - started, 4)
+
+
+def warmup(app=None, pages: bool = True) -> Dict[str, Any]:
+    """
+    预先建立首批请求需要的状态
+
+    预热不计入运行指标；结束时关闭连接池中的连接，fork 出的工作进程不会继承打开的数据库连接。
+
+    Args:
+        app: create_app() 创建的应用，默认新建
+        pages: 是否请求热点页面填充响应缓存
+
+    Returns:
+        各阶段耗时（秒）与预热请求的状态码
+    """
+    if app is None:
+        from app import create_app
+        app = create_app()
+    services = app.extensions['feiyi']
+    timings: Dict[str, Any] = {}
+    started = time.perf_counter()
+
+    def compile_templates():
+        for name in app.jinja_env.list_templates(extensions=['html']):
+            app.jinja_env.get_template(name)
+
+    def prepare_indexes():
+        services.item_index.ensure_ready()
+        services.knowledge_index.ensure_ready()
+
+    # 预热不计入运行指标，主进程也不因此启动写快照的线程
+    from metrics import metrics
+    statuses = {}
+    enabled, metrics.enabled = metrics.enabled, False
+    try:
+        with app.app_context():
+            _stage(timings, 'templates', compile_templates)
+            _stage(timings, 'search_index', prepare_indexes)
+            _stage(timings, 'keyword_router', services.keyword_router.automaton)
+            _stage(timings, 'category_stats', services.category_stats.all)
+
+        if pages:
+            def request_pages():
+                client = app.test_client()
+                for path in warmup_paths():
+                    statuses[path] = client.get(path, headers={'Accept-Encoding': WARMUP_ACCEPT_ENCODING}).status_code
+            _stage(timings, 'pages', request_pages)
+    finally:
+        metrics.enabled = enabled
+
+    with app.app_context():
+        for engine in services.db.engines.values():
+            engine.dispose()
+
+    timings['total'] = round(time.perf_counter() - started, 4)
+    failed = {path: status for path, status in statuses.items() if status >= 400}
+    if failed:
+        logger.warning(f"预热请求未成功: {failed}")
+    logger.info(f"预热完成，用时 {timings['total']}s，请求 {len(statuses)} 个页面")
+    return {'seconds': timings, 'pages': statuses}
+
+
+def load_app(warm: bool = None):
+    """
+    创建并预热入口进程的Flask应用
+
+    入口进程的一次性工作：配置日志、调用 app.create_app()、按需预热，并开启运行指标。
+    测试等需要独立实例时直接调用 create_app()。
+
+    Args:
+        warm: 是否预热，默认由 FEIYI_WARMUP 决定
+
+    Returns:
+        Flask应用
+    """
+    configure_logging()
+    started = time.perf_counter()
+    from app import create_app
+    from metrics import metrics
+    app = create_app()
+    logger.info(f"应用创建用时 {time.perf_counter() - started:.3f}s")
+    if warm is None:
+        warm = _env_flag('FEIYI_WARMUP', '1')
+    if warm:
+        warmup(app)
+    # 只有服务进程累计运行指标
+    metrics.start()
+    return app
+
+
+def after_fork(app):
+    """
+    fork 出的工作进程中调用
+
+    丢弃从主进程继承的连接池（不关闭连接本身，主进程可能仍在使用），工作进程按需新建自己的连接。
+    指标注册表与交互记录写入线程已自行处理 fork。
+
+    Args:
+        app: 主进程中 load_app() 返回的应用
+    """
+    with app.app_context():
+        for engine in app.extensions['feiyi'].db.engines.values():
+            engine.dispose(close=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='创建应用并预热，输出各阶段耗时')
+    parser.add_argument('--no-pages', action='store_true', help='不请求热点页面')
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    started = time.perf_counter()
+    from app import create_app
+    app = create_app()
+    created = time.perf_counter() - started
+    result = warmup(app, pages=not args.no_pages)
+    result['seconds']['create_app'] = round(created, 4)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# 模块位于项目根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture()
+def make_app(tmp_path, monkeypatch):
+    """创建使用临时数据库、回答缓存与图片目录的应用并建表"""
+    monkeypatch.setenv('FEIYI_ANSWER_CACHE_PATH', str(tmp_path / 'answer_cache.db'))
+    monkeypatch.setenv('FEIYI_MEDIA_DIR', str(tmp_path / 'originals'))
+    monkeypatch.setenv('FEIYI_MEDIA_CACHE_DIR', str(tmp_path / 'derivatives'))
+    from app import create_app
+    from models import db
+
+    apps = []
+
+    def make(name='feiyi'):
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / (name + '.db')}"})
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+@pytest.fixture()
+def app(make_app):
+    return make_app()
@@ -0,0 +1,53 @@
+"""准入控制的排队与保留名额"""
+import threading
+import time
+
+import pytest
+
+from admission import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, AdmissionController, AdmissionRejected
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_reserved_slot_admits_interactive_while_background_is_queued():
+    controller = AdmissionController(max_concurrent=2, max_queue=8, max_wait=2.0, per_session=4, reserved=1,
+                                     enabled=True)
+    running = controller.slot('bg', PRIORITY_BACKGROUND)
+    running.__enter__()
+
+    release = threading.Event()
+
+    def queued_background():
+        with controller.slot('bg', PRIORITY_BACKGROUND):
+            release.wait()
+
+    worker = threading.Thread(target=queued_background)
+    worker.start()
+    try:
+        _wait_for(lambda: controller.stats()['waiting'] == 1)
+
+        started = time.monotonic()
+        with controller.slot('user', PRIORITY_INTERACTIVE):
+            assert controller.stats()['active'] == 2
+        assert time.monotonic() - started < 0.5
+        # 后台任务仍不可占用保留名额
+        assert controller.stats()['waiting'] == 1
+    finally:
+        running.__exit__(None, None, None)
+        release.set()
+        worker.join(2)
+    assert controller.stats()['timeouts'] == 0
+
+
+def test_interactive_waits_behind_queued_interactive():
+    controller = AdmissionController(max_concurrent=1, max_queue=8, max_wait=0.2, per_session=4, reserved=0,
+                                     enabled=True)
+    with controller.slot('a', PRIORITY_INTERACTIVE):
+        with pytest.raises(AdmissionRejected):
+            with controller.slot('b', PRIORITY_INTERACTIVE):
+                pass
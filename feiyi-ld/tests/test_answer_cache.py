@@ -0,0 +1,63 @@
+"""AI回答缓存：问题归一化、过期与淘汰"""
+from types import SimpleNamespace
+
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, normalize_question
+
+MODEL, PROMPT = 'model', '你是非遗助手'
+
+
+def test_equivalent_questions_normalize_alike():
+    expected = normalize_question('昆曲是什么？')
+    for question in (' 崑曲是什麼 ', '昆曲 是 什么?', '昆曲是什么！！', '昆曲是什么　'):
+        assert normalize_question(question) == expected
+    assert normalize_question('ＵＮＥＳＣＯ名录') == normalize_question('unesco 名录')
+    assert normalize_question('京剧是什么') != expected
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(answer_cache, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture()
+def cache(tmp_path, clock):
+    return AnswerCache(path=str(tmp_path / 'answers.db'), ttl=60, max_entries=2, enabled=True)
+
+
+def test_equivalent_questions_share_an_entry(cache):
+    cache.set('昆曲是什么？', MODEL, PROMPT, '昆曲是中国古老的剧种')
+    assert cache.get('崑曲是什麼', MODEL, PROMPT) == '昆曲是中国古老的剧种'
+    assert cache.get('昆曲是什么？', MODEL, '另一个系统提示') is None
+    assert cache.get('昆曲是什么？', 'other-model', PROMPT) is None
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set('昆曲是什么', MODEL, PROMPT, '回答')
+    clock.now += 59
+    assert cache.get('昆曲是什么', MODEL, PROMPT) == '回答'
+    clock.now += 1
+    assert cache.get('昆曲是什么', MODEL, PROMPT) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    cache.set('昆曲', MODEL, PROMPT, '昆曲回答')
+    clock.now += 1
+    cache.set('京剧', MODEL, PROMPT, '京剧回答')
+    clock.now += 1
+    # 读取使昆曲成为最近访问的条目
+    assert cache.get('昆曲', MODEL, PROMPT) == '昆曲回答'
+    clock.now += 1
+    cache.set('剪纸', MODEL, PROMPT, '剪纸回答')
+
+    assert cache.get('京剧', MODEL, PROMPT) is None
+    assert cache.get('昆曲', MODEL, PROMPT) == '昆曲回答'
+    assert cache.get('剪纸', MODEL, PROMPT) == '剪纸回答'
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
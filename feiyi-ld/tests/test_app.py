@@ -0,0 +1,39 @@
+"""create_app 创建的应用相互独立"""
+from sqlalchemy import text
+
+from models import db, FeiyiItem
+
+
+def _add_item(app, **fields):
+    with app.app_context():
+        item = FeiyiItem(**fields)
+        db.session.add(item)
+        db.session.commit()
+        return item.id
+
+
+def _search(app, keyword):
+    response = app.test_client().get('/api/search', query_string={'keyword': keyword})
+    return [item['name'] for item in response.json['items']]
+
+
+def test_apps_use_their_own_database_and_components(make_app):
+    first, second = make_app('first'), make_app('second')
+    assert first.extensions['feiyi'].item_index is not second.extensions['feiyi'].item_index
+
+    _add_item(first, name='皮影戏', category_id=4, description='以兽皮剪制人物剪影表演故事')
+    assert _search(first, '皮影') == ['皮影戏']
+    assert _search(second, '皮影') == []
+    assert second.test_client().get('/api/items').json['total'] == 0
+
+
+def test_model_events_only_update_the_owning_app(make_app):
+    first, second = make_app('first'), make_app('second')
+    item_id = _add_item(second, name='剪纸', category_id=7, description='镂空剪刻的民间美术')
+
+    with second.app_context():
+        assert db.session.execute(text('SELECT count(*) FROM feiyi_items_fts')).scalar() == 1
+        assert db.session.execute(text('SELECT count(*) FROM feiyi_item_documents')).scalar() == 1
+    with first.app_context():
+        assert db.session.execute(text('SELECT count(*) FROM feiyi_item_documents')).scalar() == 0
+    assert second.test_client().get(f'/api/item/{item_id}').json['name'] == '剪纸'
@@ -0,0 +1,64 @@
+"""多轮对话记忆在多个进程间的一致性"""
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from conversation import ConversationStore
+
+
+@pytest.fixture()
+def env(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    db = SQLAlchemy(app)
+
+    class Interaction(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        session_id = db.Column(db.String(100))
+        question = db.Column(db.Text)
+        answer = db.Column(db.Text)
+        created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    with app.app_context():
+        db.create_all()
+
+    def ask(store, question, answer):
+        """模拟一个工作进程处理一轮问答：先记入记忆，再写入交互记录"""
+        store.append('s1', question, answer)
+        with app.app_context():
+            db.session.add(Interaction(session_id='s1', question=question, answer=answer))
+            db.session.commit()
+
+    def new_store():
+        return ConversationStore(app, db, Interaction, enabled=True)
+
+    return new_store, ask
+
+
+def _questions(messages):
+    return [m['content'] for m in messages if m['role'] == 'user']
+
+
+def test_turns_handled_by_another_process_are_visible(env):
+    new_store, ask = env
+    worker_a, worker_b = new_store(), new_store()
+
+    ask(worker_a, '昆曲起源于何时？', '元末明初。')
+    ask(worker_b, '有哪些代表剧目？', '《牡丹亭》等。')
+    assert _questions(worker_a.history('s1')) == ['昆曲起源于何时？', '有哪些代表剧目？']
+
+    ask(worker_a, '何时列入名录？', '2001年。')
+    assert _questions(worker_b.history('s1')) == ['昆曲起源于何时？', '有哪些代表剧目？', '何时列入名录？']
+    assert worker_b.stats()['stale'] == 1
+
+
+def test_own_turns_do_not_force_reload(env):
+    new_store, ask = env
+    store = new_store()
+    ask(store, '问题一', '回答一')
+    ask(store, '问题二', '回答二')
+    assert _questions(store.history('s1')) == ['问题一', '问题二']
+    assert store.stats()['loads'] == 1
+    assert store.stats()['stale'] == 0
@@ -0,0 +1,90 @@
+"""只读接口的条件请求：校验值随所依赖的数据变化"""
+import json
+
+import pytest
+
+from introductions import KIND_CATEGORY
+from models import db, FeiyiItem, FeiyiKnowledge
+
+
+@pytest.fixture()
+def client(app):
+    with app.app_context():
+        db.session.add(FeiyiItem(id=1, name='剪纸', category_id=7, description='镂空剪刻的民间美术',
+                                 images=json.dumps(['jianzhi.jpg'])))
+        db.session.add(FeiyiKnowledge(id=1, title='剪纸的起源', content='剪纸最早见于北朝', item_id=1, category_id=7))
+        db.session.commit()
+    return app.test_client()
+
+
+def _etag(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def _revalidate(client, path, etag):
+    return client.get(path, headers={'If-None-Match': etag})
+
+
+@pytest.mark.parametrize('path', ['/api/category/7', '/api/item/1'])
+def test_matching_etag_returns_304(client, path):
+    etag = _etag(client, path)
+    response = _revalidate(client, path, etag)
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_item_update_changes_etags(app, client):
+    category_etag, item_etag = _etag(client, '/api/category/7'), _etag(client, '/api/item/1')
+    with app.app_context():
+        db.session.get(FeiyiItem, 1).description = '以剪刀或刻刀在纸上剪刻花纹'
+        db.session.commit()
+
+    response = _revalidate(client, '/api/item/1', item_etag)
+    assert response.status_code == 200
+    assert response.json['description'] == '以剪刀或刻刀在纸上剪刻花纹'
+    assert _revalidate(client, '/api/category/7', category_etag).status_code == 200
+
+
+def test_knowledge_update_changes_item_etag(app, client):
+    etag = _etag(client, '/api/item/1')
+    with app.app_context():
+        db.session.get(FeiyiKnowledge, 1).content = '剪纸最早见于南北朝时期的团花'
+        db.session.commit()
+
+    response = _revalidate(client, '/api/item/1', etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_introduction_write_changes_category_etag(app, client):
+    services = app.extensions['feiyi']
+    etag = _etag(client, '/api/category/7')
+    with app.app_context(), db.engine.begin() as connection:
+        services.introductions.save(connection, [{
+            'kind': KIND_CATEGORY, 'target_id': 7, 'content': '传统美术包括剪纸、年画等',
+            'model': 'test', 'prompt_version': '1', 'input_digest': 'input', 'digest': 'content',
+        }])
+    # 介绍由其他进程写入，本进程的校验值在缓存有效期到期后重新计算
+    services.response_cache.clear()
+
+    response = _revalidate(client, '/api/category/7', etag)
+    assert response.status_code == 200
+    assert response.json['introduction'] == '传统美术包括剪纸、年画等'
+
+
+def test_media_write_changes_category_etag(app, client):
+    services = app.extensions['feiyi']
+    etag = _etag(client, '/api/category/7')
+    assert client.get('/api/category/7').json['items'][0]['media'] == []
+    with app.app_context(), db.engine.begin() as connection:
+        services.media_library.save(connection, [{
+            'filename': 'jianzhi.jpg', 'digest': 'a' * 32, 'formats': 'jpeg',
+            'variants': json.dumps({'thumb': [320, 240], 'card': [640, 480], 'hero': [1280, 960]}),
+        }])
+
+    response = _revalidate(client, '/api/category/7', etag)
+    assert response.status_code == 200
+    assert response.json['items'][0]['media'][0]['src'] == f"/media/{'a' * 32}/card.jpg"
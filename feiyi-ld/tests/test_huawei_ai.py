@@ -0,0 +1,122 @@
+"""上游请求：请求体、重试与熔断"""
+import io
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import huawei_ai
+from huawei_ai import CircuitBreaker, CircuitOpenError, HuaweiAIClient
+
+MESSAGES = [{'role': 'user', 'content': '昆曲'}]
+
+
+def test_payload_carries_generation_limits():
+    client = HuaweiAIClient(api_key='key', endpoint='http://127.0.0.1:9/v1', answer_cache=None)
+    payload = client._request_payload(MESSAGES, stream=True, max_tokens=1500, temperature=0.3)
+    assert payload['max_tokens'] == 1500
+    assert payload['temperature'] == 0.3
+    assert payload['stream'] is True
+
+
+def test_payload_uses_upstream_defaults_when_unset():
+    client = HuaweiAIClient(api_key='key', endpoint='http://127.0.0.1:9/v1', answer_cache=None)
+    payload = client._request_payload(MESSAGES)
+    assert 'max_tokens' not in payload
+    assert 'temperature' not in payload
+
+
+class StubSession:
+    """按顺序返回预设响应或抛出预设异常的 requests.Session 替身"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _response(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(b'{}')
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    """可拨动的单调时钟，sleep 只记录时长"""
+    clock = SimpleNamespace(now=1000.0, sleeps=[])
+    monkeypatch.setattr(huawei_ai, 'time', SimpleNamespace(
+        monotonic=lambda: clock.now, sleep=clock.sleeps.append, perf_counter=time.perf_counter))
+    return clock
+
+
+def _client(*outcomes, max_retries=2, **kwargs):
+    client = HuaweiAIClient(api_key='key', endpoint='http://127.0.0.1:9/v1', answer_cache=None,
+                            max_retries=max_retries, **kwargs)
+    client.session = StubSession(*outcomes)
+    return client
+
+
+def test_retries_503_honouring_retry_after(clock):
+    client = _client(_response(503, retry_after='3'), _response(503), _response(200))
+    assert client._post({}, {}).status_code == 200
+    assert client.session.calls == 3
+    assert clock.sleeps[0] == 3.0
+    assert 0 <= clock.sleeps[1] <= client.backoff_base * 2
+
+
+def test_gives_up_after_max_retries(clock):
+    client = _client(*[_response(503)] * 3)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._post({}, {})
+    assert client.session.calls == 3
+
+
+def test_read_timeout_is_not_retried(clock):
+    client = _client(requests.exceptions.ReadTimeout(), _response(200))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client._post({}, {})
+    assert client.session.calls == 1
+    assert clock.sleeps == []
+
+
+def test_breaker_opens_and_probes_once_after_recovery(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    client = _client(requests.exceptions.ReadTimeout(), requests.exceptions.ReadTimeout(),
+                     _response(502), _response(200), circuit_breaker=breaker, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client._post({}, {})
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        client._post({}, {})
+    assert client.session.calls == 2
+
+    # 恢复期结束：放行一个探测请求，探测失败则重新打开
+    clock.now += 30
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        client._post({}, {})
+
+    # 再次恢复后探测成功，熔断器关闭
+    clock.now += 30
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._post({}, {})
+    assert breaker.is_open
+    clock.now += 30
+    assert client._post({}, {}).status_code == 200
+    assert not breaker.is_open
+    assert breaker.allow_request()
@@ -0,0 +1,37 @@
+"""运行指标快照的合并与归档"""
+import json
+import os
+import subprocess
+import sys
+
+from metrics import ARCHIVE_NAME, MetricsRegistry
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_disabled_until_started(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path))
+    registry.inc('feiyi_db_statements_total')
+    registry.shutdown()
+    assert os.listdir(tmp_path) == []
+
+
+def test_dead_snapshots_fold_into_archive(tmp_path):
+    pid = _dead_pid()
+    for n in range(2):
+        with open(tmp_path / f"{pid}-{n}.json", 'w', encoding='utf-8') as f:
+            json.dump({'feiyi_db_statements_total': {'[]': 5}}, f)
+
+    registry = MetricsRegistry(directory=str(tmp_path), enabled=True)
+    registry.inc('feiyi_db_statements_total', (), 1)
+    assert registry.collect()['feiyi_db_statements_total']['[]'] == 11
+    assert not list(tmp_path.glob(f"{pid}-*.json"))
+    # 归档后的计数不回退
+    assert registry.collect()['feiyi_db_statements_total']['[]'] == 11
+    with open(tmp_path / ARCHIVE_NAME, encoding='utf-8') as f:
+        assert json.load(f)['feiyi_db_statements_total']['[]'] == 10
+    registry.shutdown()
@@ -0,0 +1,65 @@
+"""列表接口的游标分页"""
+from datetime import datetime
+
+import pytest
+
+from models import db, FeiyiItem
+from pagination import encode_cursor
+
+CREATED = datetime(2024, 5, 1, 8, 0, 0)
+
+
+@pytest.fixture()
+def client(app):
+    with app.app_context():
+        # 前三个项目创建时间相同，由 id 决定先后
+        db.session.add_all([FeiyiItem(id=i, name=f'项目{i}', category_id=7,
+                                      created_at=CREATED if i <= 3 else datetime(2024, 5, i))
+                            for i in range(1, 8)])
+        db.session.commit()
+    return app.test_client()
+
+
+def _pages(client, **params):
+    """沿 next_cursor 翻完全部页，返回各页的项目ID"""
+    pages, after = [], ''
+    while after is not None:
+        data = client.get('/api/items', query_string=dict(params, after=after, per_page=3)).json
+        pages.append([item['id'] for item in data['items']])
+        assert data['has_more'] == (data['next_cursor'] is not None)
+        after = data['next_cursor']
+    return pages
+
+
+def test_cursor_pages_cover_every_row_once(client):
+    assert _pages(client) == [[7, 6, 5], [4, 3, 2], [1]]
+
+
+def test_cursor_is_stable_when_rows_are_inserted(app, client):
+    first = client.get('/api/items', query_string={'after': '', 'per_page': 3}).json
+    with app.app_context():
+        db.session.add(FeiyiItem(id=8, name='项目8', category_id=7))
+        db.session.commit()
+
+    second = client.get('/api/items', query_string={'after': first['next_cursor'], 'per_page': 3}).json
+    assert [item['id'] for item in second['items']] == [4, 3, 2]
+
+
+@pytest.mark.parametrize('after', [
+    'not-a-cursor!',
+    encode_cursor({'x': 1}),
+    encode_cursor({'k': ['yesterday', 3]}),
+    encode_cursor({'k': [CREATED.isoformat()]}),
+    encode_cursor({'o': 3}),
+    'WzEsMl0',  # Base64 编码的 [1,2]
+])
+def test_tampered_cursor_is_rejected(client, after):
+    response = client.get('/api/items', query_string={'after': after})
+    assert response.status_code == 400
+    assert '无效的游标' in response.json['error']
+
+
+def test_ranked_cursor_rejects_keyset_payload(client):
+    response = client.get('/api/items', query_string={
+        'keyword': '项目', 'after': encode_cursor({'k': [CREATED.isoformat(), 3]})})
+    assert response.status_code == 400
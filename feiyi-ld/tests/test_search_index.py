@@ -0,0 +1,69 @@
+"""全文检索：中文二元切分与索引同步"""
+import pytest
+from sqlalchemy import text
+
+from models import db, FeiyiItem
+from search_index import build_match_query, tokenize
+
+
+def test_tokenize_splits_cjk_into_bigrams():
+    assert tokenize('昆曲艺术') == '昆曲 曲艺 艺术'
+    assert tokenize('剪纸 Paper-Cut 2009') == '剪纸 paper cut 2009'
+    # 单字片段保留原字
+    assert tokenize('龙，舞') == '龙 舞'
+    assert tokenize(None) == ''
+
+
+def test_match_query_is_a_bigram_phrase():
+    assert build_match_query('昆曲艺术') == '"昆曲 曲艺 艺术"'
+    assert build_match_query('UNESCO 昆曲') == '"unesco"* "昆曲"'
+    # 单个汉字无法由二元组表达，由调用方回退到LIKE
+    assert build_match_query('纸') is None
+    assert build_match_query('剪纸 龙') is None
+
+
+@pytest.fixture()
+def index(app):
+    with app.app_context():
+        db.session.add_all([
+            FeiyiItem(id=1, name='剪纸', category_id=7, description='以剪刀在纸上剪刻花纹'),
+            FeiyiItem(id=2, name='昆曲', category_id=4, description='中国最古老的剧种之一'),
+        ])
+        db.session.commit()
+        yield app.extensions['feiyi'].item_index
+
+
+def _search(index, keyword):
+    return [item.id for item in index.search(FeiyiItem.query, keyword).all()]
+
+
+def _indexed(index, keyword):
+    return [rowid for rowid, _ in index.top(build_match_query(keyword))]
+
+
+def test_search_matches_substrings(index):
+    assert index.enabled
+    assert _search(index, '剪刻') == [1]
+    assert _search(index, '古老剧种') == []
+    assert _search(index, '古老的剧种') == [2]
+
+
+def test_single_character_falls_back_to_like(index):
+    assert _search(index, '纸') == [1]
+    assert _search(index, '曲') == [2]
+
+
+def test_index_follows_insert_update_and_delete(index):
+    db.session.add(FeiyiItem(id=3, name='皮影戏', category_id=4, description='以灯光投射兽皮剪影'))
+    db.session.commit()
+    assert _indexed(index, '皮影') == [3]
+
+    db.session.get(FeiyiItem, 3).name = '木偶戏'
+    db.session.commit()
+    assert _indexed(index, '皮影') == []
+    assert _indexed(index, '木偶') == [3]
+
+    db.session.delete(db.session.get(FeiyiItem, 1))
+    db.session.commit()
+    assert _indexed(index, '剪纸') == []
+    assert db.session.execute(text('SELECT count(*) FROM feiyi_items_fts')).scalar() == 2